@@ -1,6 +1,6 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
 import AsyncStorage from '@react-native-async-storage/async-storage';
-import { api } from '../services/api';
+import { api, ACCESS_TOKEN_KEY } from '../services/api';
 
 const AuthContext = createContext();
 
@@ -22,7 +22,7 @@ export const AuthProvider = ({ children }) => {
 
   const checkAuthStatus = async () => {
     try {
-      const token = await AsyncStorage.getItem('token');
+      const token = await AsyncStorage.getItem(ACCESS_TOKEN_KEY);
       if (token) {
         // Set the token in API headers
         api.defaults.headers.common['Authorization'] = `Bearer ${token}`;
@@ -33,8 +33,9 @@ export const AuthProvider = ({ children }) => {
       }
     } catch (error) {
       console.error('Auth check failed:', error);
-      await AsyncStorage.removeItem('token');
+      await AsyncStorage.removeItem(ACCESS_TOKEN_KEY);
       await AsyncStorage.removeItem('user_id');
+      await AsyncStorage.removeItem('refresh_token');
       delete api.defaults.headers.common['Authorization'];
     } finally {
       setLoading(false);
@@ -65,11 +66,14 @@ export const AuthProvider = ({ children }) => {
   const login = async (credentials) => {
     try {
       const response = await api.post('/api/auth/login', credentials);
-      const { access_token, user_id } = response.data;
+      const { access_token, refresh_token, user_id } = response.data;
       
-      // Store token and user ID
-      await AsyncStorage.setItem('token', access_token);
+      // Store tokens and user ID
+      await AsyncStorage.setItem(ACCESS_TOKEN_KEY, access_token);
       await AsyncStorage.setItem('user_id', user_id);
+      if (refresh_token) {
+        await AsyncStorage.setItem('refresh_token', refresh_token);
+      }
       
       // Set API header
       api.defaults.headers.common['Authorization'] = `Bearer ${access_token}`;
@@ -90,11 +94,14 @@ export const AuthProvider = ({ children }) => {
   const register = async (userData) => {
     try {
       const response = await api.post('/api/auth/register', userData);
-      const { access_token, user_id } = response.data;
+      const { access_token, refresh_token, user_id } = response.data;
       
-      // Store token and user ID
-      await AsyncStorage.setItem('token', access_token);
+      // Store tokens and user ID
+      await AsyncStorage.setItem(ACCESS_TOKEN_KEY, access_token);
       await AsyncStorage.setItem('user_id', user_id);
+      if (refresh_token) {
+        await AsyncStorage.setItem('refresh_token', refresh_token);
+      }
       
       // Set API header
       api.defaults.headers.common['Authorization'] = `Bearer ${access_token}`;
@@ -114,8 +121,9 @@ export const AuthProvider = ({ children }) => {
 
   const logout = async () => {
     try {
-      await AsyncStorage.removeItem('token');
+      await AsyncStorage.removeItem(ACCESS_TOKEN_KEY);
       await AsyncStorage.removeItem('user_id');
+      await AsyncStorage.removeItem('refresh_token');
       delete api.defaults.headers.common['Authorization'];
       setUser(null);
     } catch (error) {
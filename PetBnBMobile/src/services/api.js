@@ -6,6 +6,13 @@ import axios from 'axios';
 // Use your server's IP address - replace with your actual IP
 const BASE_URL = 'http://192.168.68.105:8000';
 
+// Storage key of the access token, shared with AuthContext
+export const ACCESS_TOKEN_KEY = 'token';
+// Response header carrying an access token reissued with fresh claims (axios lowercases header names)
+const REISSUED_TOKEN_HEADER = 'x-access-token';
+// Everything stored for a signed-in session
+const SESSION_KEYS = [ACCESS_TOKEN_KEY, 'refresh_token', 'user_id', 'user_data'];
+
 // Create axios instance
 const api = axios.create({
   baseURL: BASE_URL,
@@ -19,7 +26,7 @@ const api = axios.create({
 api.interceptors.request.use(
   async (config) => {
     try {
-      const token = await AsyncStorage.getItem('access_token');
+      const token = await AsyncStorage.getItem(ACCESS_TOKEN_KEY);
       if (token) {
         config.headers.Authorization = `Bearer ${token}`;
       }
@@ -42,37 +49,59 @@ api.interceptors.request.use(
   }
 );
 
+// Refresh in flight, shared by every request that got a 401 meanwhile. Refresh tokens
+// rotate: a second refresh with the same token would count as reuse and revoke the session
+let refreshPromise = null;
+
+const refreshAccessToken = async () => {
+  const refreshToken = await AsyncStorage.getItem('refresh_token');
+  if (!refreshToken) {
+    return null;
+  }
+  // Marked as retried so a 401 from the refresh itself is not refreshed again
+  const response = await api.post('/api/auth/refresh', { refresh_token: refreshToken }, { _retry: true });
+  const { access_token, refresh_token } = response.data;
+  await AsyncStorage.multiSet([[ACCESS_TOKEN_KEY, access_token], ['refresh_token', refresh_token]]);
+  api.defaults.headers.common.Authorization = `Bearer ${access_token}`;
+  return access_token;
+};
+
 // Response interceptor for error handling
 api.interceptors.response.use(
-  (response) => {
+  async (response) => {
     console.log(`✅ ${response.config.method?.toUpperCase()} ${response.config.url} - Status: ${response.status}`);
+    // The server reissues the token when its claims changed, e.g. after email verification;
+    // sending the new one spares the server a database read on every gated call
+    const reissuedToken = response.headers?.[REISSUED_TOKEN_HEADER];
+    if (reissuedToken) {
+      await AsyncStorage.setItem(ACCESS_TOKEN_KEY, reissuedToken);
+      api.defaults.headers.common.Authorization = `Bearer ${reissuedToken}`;
+    }
     return response;
   },
   async (error) => {
     const originalRequest = error.config;
 
-    if (error.response?.status === 401 && !originalRequest._retry) {
+    if (error.response?.status === 401 && originalRequest && !originalRequest._retry) {
       originalRequest._retry = true;
       
       try {
-        // Try to refresh token
-        const refreshToken = await AsyncStorage.getItem('refresh_token');
-        if (refreshToken) {
-          const response = await api.post('/api/auth/refresh', {
-            refresh_token: refreshToken
+        if (!refreshPromise) {
+          refreshPromise = refreshAccessToken().finally(() => {
+            refreshPromise = null;
           });
-          
-          const { access_token } = response.data;
-          await AsyncStorage.setItem('access_token', access_token);
-          
+        }
+        const accessToken = await refreshPromise;
+        if (accessToken) {
           // Retry original request
-          originalRequest.headers.Authorization = `Bearer ${access_token}`;
+          originalRequest.headers.Authorization = `Bearer ${accessToken}`;
           return api(originalRequest);
         }
       } catch (refreshError) {
         console.error('Token refresh failed:', refreshError);
-        // Clear stored tokens
-        await AsyncStorage.multiRemove(['access_token', 'refresh_token', 'user_data']);
+        // Clear the stored session, so the app no longer looks signed in
+        await AsyncStorage.multiRemove(SESSION_KEYS);
+        delete api.defaults.headers.common.Authorization;
         // Redirect to login would be handled by auth context
       }
     }
@@ -127,7 +156,8 @@ export const authAPI = {
       console.warn('Logout API call failed:', error);
     }
     // Clear local storage regardless
-    await AsyncStorage.multiRemove(['access_token', 'refresh_token', 'user_data']);
+    await AsyncStorage.multiRemove(SESSION_KEYS);
+    delete api.defaults.headers.common.Authorization;
   },
 
   verifyEmail: async (token) => {
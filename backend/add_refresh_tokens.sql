@@ -0,0 +1,45 @@
+-- Rotating refresh tokens for the /api/auth/refresh endpoint
+-- Run this in Supabase SQL Editor
+
+-- Only a SHA-256 digest of each token is stored; every refresh consumes its token (revoked_at)
+-- and issues the next one of the same family
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    token_hash VARCHAR(64) UNIQUE NOT NULL,
+    family_id UUID NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Indexes for refresh tokens
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_id ON refresh_tokens(user_id);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family_id ON refresh_tokens(family_id);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
+
+-- Deletes at most batch_size expired tokens and returns how many it deleted, so cleanup
+-- runs as short transactions that never hold many row locks
+CREATE OR REPLACE FUNCTION delete_expired_refresh_tokens(batch_size INTEGER DEFAULT 500)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    WITH expired AS (
+        SELECT id
+        FROM refresh_tokens
+        WHERE expires_at < NOW()
+        ORDER BY expires_at
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    deleted AS (
+        DELETE FROM refresh_tokens t
+        USING expired e
+        WHERE t.id = e.id
+        RETURNING 1
+    )
+    SELECT count(*)::INTEGER FROM deleted
+$$;
+
+REVOKE EXECUTE ON FUNCTION delete_expired_refresh_tokens(INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION delete_expired_refresh_tokens(INTEGER) TO service_role;
@@ -11,6 +11,7 @@ from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from token_cache import token_cache
 
 # Load environment variables
 load_dotenv()
@@ -18,9 +19,11 @@ load_dotenv()
 # Configuration
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# Access tokens are short-lived, clients renew them at /api/auth/refresh
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 class TokenData(BaseModel):
     email: Optional[str] = None
@@ -57,7 +60,23 @@ class AuthService:
     
     @staticmethod
     def verify_token(token: str) -> Dict[str, Any]:
-        """Verify and decode JWT token"""
+        """Verify and decode JWT token, served from the token cache until it expires"""
+        payload = token_cache.get(token)
+        if payload is None:
+            payload = AuthService.decode_token(token)
+            token_cache.set(token, payload)
+
+        if token_cache.is_revoked(payload):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return payload
+
+    @staticmethod
+    def decode_token(token: str) -> Dict[str, Any]:
+        """Check the token's signature and claims with jwt.decode"""
         try:
             payload = jwt.decode(
                 token, 
@@ -98,6 +117,18 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     
     return payload
 
+async def get_optional_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Optional[Dict[str, Any]]:
+    """FastAPI dependency for endpoints that also serve anonymous users"""
+    if not credentials:
+        return None
+    
+    try:
+        payload = AuthService.verify_token(credentials.credentials)
+    except HTTPException:
+        return None
+    
+    return payload if payload.get("email") else None
+
 async def get_current_active_user(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
     """Get current active user with additional validation"""
     return current_user
@@ -0,0 +1,253 @@
+"""
+In-memory availability interval index of caregivers for availability-aware search
+"""
+
+import asyncio
+import bisect
+import os
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import numpy as np
+from geo_index import caregiver_geo_index, fetch_all
+from search_cache import search_cache
+from projections import BOOKING_INTERVAL, CAREGIVER_SCHEDULE
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_INDEX_REFRESH_SECONDS = int(os.getenv("AVAILABILITY_INDEX_REFRESH_SECONDS", 300))
+
+# Timezone of the weekly hours in availability schedules, the caregivers' local time in Malaysia and Singapore
+AVAILABILITY_SCHEDULE_TIMEZONE = ZoneInfo(os.getenv("AVAILABILITY_SCHEDULE_TIMEZONE", "Asia/Singapore"))
+
+# Bookings in these states block the caregiver's calendar
+BLOCKING_BOOKING_STATUSES = ["confirmed", "in_progress"]
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MINUTES_PER_DAY = 24 * 60
+
+# Weekly slots per weekday index as (start minute, end minute)
+WeeklySchedule = Dict[int, List[Tuple[int, int]]]
+
+
+def _parse_minutes(value: str) -> int:
+    hours, minutes = str(value).split(":")[:2]
+    return min(int(hours) * 60 + int(minutes), MINUTES_PER_DAY)
+
+
+def parse_schedule(schedule: Optional[Dict]) -> Optional[WeeklySchedule]:
+    """Parse an availability_schedule into weekly slots.
+
+    The schedule maps weekday names to a slot or list of slots like
+    {"start": "09:00", "end": "17:00"}, a slot may set "available": false.
+    An empty or missing schedule means the caregiver has not restricted
+    their hours and is returned as None.
+    """
+    if not schedule:
+        return None
+
+    weekly: WeeklySchedule = {day: [] for day in range(7)}
+    for day_name, slots in schedule.items():
+        day_name = str(day_name).lower()
+        if day_name not in WEEKDAYS:
+            continue
+        if isinstance(slots, dict):
+            slots = [slots]
+        for slot in slots or []:
+            if not isinstance(slot, dict) or slot.get("available") is False:
+                continue
+            try:
+                start = _parse_minutes(slot.get("start", "00:00"))
+                end = _parse_minutes(slot.get("end", "24:00"))
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring malformed availability slot: {slot}")
+                continue
+            if end > start:
+                weekly[WEEKDAYS.index(day_name)].append((start, end))
+
+    for slots in weekly.values():
+        slots.sort()
+    return weekly
+
+
+def _to_timestamp(value) -> float:
+    """Epoch seconds of a datetime or ISO string, naive values are taken as UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _schedule_local(value: datetime) -> datetime:
+    """The same instant in the schedule timezone, naive values are taken as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(AVAILABILITY_SCHEDULE_TIMEZONE)
+
+
+def _covers(slots: List[Tuple[int, int]], start: int, end: int) -> bool:
+    """Whether the union of sorted slots covers [start, end] minutes"""
+    reached = start
+    for slot_start, slot_end in slots:
+        if slot_start > reached:
+            break
+        reached = max(reached, slot_end)
+        if reached >= end:
+            return True
+    return reached >= end
+
+
+def schedule_allows(weekly: Optional[WeeklySchedule], start: datetime, end: datetime) -> bool:
+    """Check a window against the weekly schedule.
+
+    The window is converted to the schedule timezone first, so its weekday
+    and hours match the caregiver's whatever offset the client sent. A
+    window inside one day must fit in that day's slots, longer windows
+    need every day they touch to be a working day.
+    """
+    if weekly is None:
+        return True
+
+    start, end = _schedule_local(start), _schedule_local(end)
+
+    if start.date() == end.date():
+        start_minute = start.hour * 60 + start.minute
+        end_minute = end.hour * 60 + end.minute
+        return _covers(weekly[start.weekday()], start_minute, end_minute)
+
+    day = start.date()
+    while day <= end.date():
+        if not weekly[day.weekday()]:
+            return False
+        day += timedelta(days=1)
+    return True
+
+
+class BusyIntervals:
+    """Blocking bookings of one caregiver sorted by start, with a running max of the ends"""
+
+    def __init__(self, intervals: Iterable[Tuple[float, float]]):
+        intervals = sorted(intervals)
+        self.starts = [interval[0] for interval in intervals]
+        self.max_ends = np.maximum.accumulate([interval[1] for interval in intervals]).tolist() if intervals else []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlaps(self, start: float, end: float) -> bool:
+        # Only bookings starting before the window ends can overlap it
+        position = bisect.bisect_left(self.starts, end)
+        return position > 0 and self.max_ends[position - 1] > start
+
+
+class CaregiverAvailabilityIndex:
+    """Weekly schedules and busy intervals for every caregiver.
+
+    Built from two queries so search can drop unavailable caregivers
+    without any per-candidate database round trip.
+    """
+
+    def __init__(self, refresh_seconds: int = AVAILABILITY_INDEX_REFRESH_SECONDS):
+        self._refresh_seconds = refresh_seconds
+        self._schedules: Dict[str, Optional[WeeklySchedule]] = {}
+        self._busy: Dict[str, BusyIntervals] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at > self._refresh_seconds
+
+    async def ensure_loaded(self, db):
+        """Build the index on first use and rebuild it once it is older than the refresh interval"""
+        if not self._is_stale():
+            return
+
+        async with self._lock:
+            if not self._is_stale():
+                return
+            await self.load(db)
+
+    async def _fetch_bookings(self, db, caregiver_id: Optional[str] = None) -> Dict[str, List[Tuple[float, float]]]:
+        # Bookings that already ended can never overlap a search window
+        now = datetime.utcnow().isoformat()
+
+        def build_query():
+            query = db.table("bookings").select(BOOKING_INTERVAL).in_(
+                "booking_status", BLOCKING_BOOKING_STATUSES
+            ).gte("end_datetime", now)
+            if caregiver_id:
+                query = query.eq("caregiver_id", caregiver_id)
+            return query
+
+        intervals: Dict[str, List[Tuple[float, float]]] = {}
+        for booking in await fetch_all(build_query):
+            intervals.setdefault(booking["caregiver_id"], []).append(
+                (_to_timestamp(booking["start_datetime"]), _to_timestamp(booking["end_datetime"]))
+            )
+        return intervals
+
+    async def load(self, db):
+        """Rebuild schedules and busy intervals for all caregivers"""
+        profiles = await fetch_all(lambda: db.table("caregiver_profiles").select(CAREGIVER_SCHEDULE))
+        intervals = await self._fetch_bookings(db)
+
+        self._schedules = {
+            profile["id"]: parse_schedule(profile.get("availability_schedule"))
+            for profile in profiles
+        }
+        self._busy = {caregiver_id: BusyIntervals(busy) for caregiver_id, busy in intervals.items()}
+
+        self._loaded_at = time.monotonic()
+        logger.info(
+            f"Caregiver availability index loaded with {len(self._schedules)} schedules "
+            f"and {sum(len(busy) for busy in self._busy.values())} busy intervals"
+        )
+
+    async def refresh_caregiver(self, db, caregiver_id: str) -> bool:
+        """Re-read one caregiver's schedule and bookings, returns False when the index is not loaded yet"""
+        if self._loaded_at is None:
+            return False
+
+        profile_result = await db.table("caregiver_profiles").select(CAREGIVER_SCHEDULE).eq("id", caregiver_id).execute()
+        intervals = await self._fetch_bookings(db, caregiver_id)
+
+        if profile_result.data:
+            self._schedules[caregiver_id] = parse_schedule(profile_result.data[0].get("availability_schedule"))
+        else:
+            self._schedules.pop(caregiver_id, None)
+        if caregiver_id in intervals:
+            self._busy[caregiver_id] = BusyIntervals(intervals[caregiver_id])
+        else:
+            self._busy.pop(caregiver_id, None)
+        return True
+
+    def is_available(self, caregiver_id: str, start: datetime, end: datetime) -> bool:
+        if not schedule_allows(self._schedules.get(caregiver_id), start, end):
+            return False
+        busy = self._busy.get(caregiver_id)
+        return busy is None or not busy.overlaps(_to_timestamp(start), _to_timestamp(end))
+
+    def available_mask(self, caregiver_ids: Iterable[str], start: datetime, end: datetime) -> np.ndarray:
+        """Boolean mask over the caregiver ids, evaluated once per distinct caregiver"""
+        caregiver_ids = list(caregiver_ids)
+        verdicts = {caregiver_id: self.is_available(caregiver_id, start, end) for caregiver_id in set(caregiver_ids)}
+        return np.fromiter((verdicts[caregiver_id] for caregiver_id in caregiver_ids), dtype=bool, count=len(caregiver_ids))
+
+
+# Global index instance
+caregiver_availability_index = CaregiverAvailabilityIndex()
+
+
+async def refresh_caregiver_availability(db, caregiver_id: str):
+    """Sync the availability index after a booking status change and drop cached searches around the caregiver"""
+    try:
+        if await caregiver_availability_index.refresh_caregiver(db, caregiver_id):
+            search_cache.invalidate_locations(caregiver_geo_index.caregiver_locations(caregiver_id))
+    except Exception as e:
+        # The periodic rebuild will pick the change up
+        logger.error(f"Availability refresh error for caregiver {caregiver_id}: {e}")
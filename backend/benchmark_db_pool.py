@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Throughput of the shared database HTTP client at different connection pool sizes
+"""
+
+import time
+import asyncio
+import logging
+from database import build_http_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Simulated PostgREST round trip, requests in flight and pool sizes to compare
+SERVER_LATENCY = 0.02
+CONCURRENCY = 200
+REQUESTS = 2_000
+POOL_SIZES = [5, 10, 25, 50, 100, 200]
+
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 2\r\n"
+    b"Connection: keep-alive\r\n"
+    b"\r\n"
+    b"[]"
+)
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Minimal keep-alive HTTP/1.1 server answering every GET after a fixed delay"""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            await asyncio.sleep(SERVER_LATENCY)
+            writer.write(RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run(url: str, pool_size: int) -> dict:
+    client = build_http_client(max_connections=pool_size, max_keepalive=pool_size, http2=False)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one():
+        async with semaphore:
+            response = await client.get(url)
+            response.raise_for_status()
+
+    try:
+        # Warm up the pool so connection setup is not counted
+        await asyncio.gather(*(one() for _ in range(pool_size)))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(REQUESTS)))
+        elapsed = time.perf_counter() - start
+        return {"elapsed": elapsed, **client._transport.stats()}
+    finally:
+        await client.aclose()
+
+
+async def benchmark():
+    server = await asyncio.start_server(handle_connection, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    url = f"http://{host}:{port}/rest/v1/users"
+    logger.info(
+        f"⏱  {REQUESTS:,} requests, {CONCURRENCY} concurrent, "
+        f"{SERVER_LATENCY * 1000:.0f} ms simulated server latency"
+    )
+
+    async with server:
+        for pool_size in POOL_SIZES:
+            result = await run(url, pool_size)
+            logger.info(
+                f"   pool {pool_size:>4}: {REQUESTS / result['elapsed']:8.0f} req/s, "
+                f"{result['connections_open']:>4} connections open, "
+                f"peak waiting {result['peak_waiting']:>4}"
+            )
+
+
+def main():
+    logger.info("🚀 Starting database connection pool benchmark...")
+    asyncio.run(benchmark())
+    logger.info("✅ Benchmark completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the FastAPI app served from the in-memory fake Supabase client
+"""
+
+import os
+import time
+import asyncio
+import logging
+import numpy as np
+import httpx
+
+# Placeholders for the settings server.py requires, no external service is contacted
+for name, value in {
+    "JWT_SECRET_KEY": "offline-benchmark",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "STRIPE_SECRET_KEY": "sk_test_offline",
+    "GOOGLE_MAPS_API_KEY": "AIzaOfflineBenchmark",
+    "CLOUDINARY_CLOUD_NAME": "offline",
+    "CLOUDINARY_API_KEY": "offline",
+    "CLOUDINARY_API_SECRET": "offline",
+}.items():
+    os.environ.setdefault(name, value)
+
+from server import app
+from auth import AuthService
+from fake_supabase import FakeAsyncClient, FakeDatabase, install
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CAREGIVERS = 5_000
+OWNERS = 500
+BOOKINGS_PER_OWNER = 20
+REQUESTS = 1_000
+CONCURRENCY = 50
+# Simulated PostgREST round trip per call
+DB_LATENCY = 0.005
+
+
+def seed(seed: int = 42) -> FakeDatabase:
+    """Caregivers around Singapore with one service each, and owners with booking histories"""
+    rng = np.random.default_rng(seed)
+    database = FakeDatabase()
+
+    for i in range(CAREGIVERS):
+        user_id, profile_id, service_id = f"caregiver-user-{i}", f"caregiver-{i}", f"service-{i}"
+        database.insert("users", {
+            "id": user_id, "email": f"caregiver{i}@demo.com", "first_name": "Care", "last_name": f"Giver {i}",
+            "user_type": "caregiver", "is_active": True, "email_verified": True,
+            "latitude": float(rng.uniform(1.25, 1.45)), "longitude": float(rng.uniform(103.65, 104.0))
+        })
+        database.insert("caregiver_profiles", {
+            "id": profile_id, "user_id": user_id, "bio": "Loves animals",
+            "rating": float(rng.uniform(3, 5)), "total_reviews": int(rng.integers(0, 200))
+        })
+        database.insert("caregiver_services", {
+            "id": service_id, "caregiver_id": profile_id, "service_type": "pet_sitting",
+            "title": "Pet sitting", "base_price": float(rng.uniform(20, 120)), "is_active": True
+        })
+
+    for i in range(OWNERS):
+        owner_id = f"owner-{i}"
+        database.insert("users", {
+            "id": owner_id, "email": f"owner{i}@demo.com", "first_name": "Pet", "last_name": f"Owner {i}",
+            "user_type": "pet_owner", "is_active": True, "email_verified": True
+        })
+        database.insert("pets", {"id": f"pet-{i}", "owner_id": owner_id, "name": f"Pet {i}", "species": "dog"})
+        for j in range(BOOKINGS_PER_OWNER):
+            caregiver = int(rng.integers(0, CAREGIVERS))
+            database.insert("bookings", {
+                "pet_owner_id": owner_id, "caregiver_id": f"caregiver-{caregiver}",
+                "service_id": f"service-{caregiver}", "pet_id": f"pet-{i}",
+                "booking_status": "completed", "total_amount": 50.0,
+                "start_datetime": f"2026-0{1 + j % 9}-10T09:00:00", "end_datetime": f"2026-0{1 + j % 9}-10T17:00:00"
+            })
+    return database
+
+
+async def run(client: httpx.AsyncClient, name: str, request) -> None:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    durations, queries = [], []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request(i)
+            durations.append(time.perf_counter() - start)
+            response.raise_for_status()
+            timing = response.headers.get("Server-Timing", "")
+            queries.append(int(timing.split('desc="', 1)[1].split(" ", 1)[0]) if 'desc="' in timing else 0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        f"   {name:<28} {REQUESTS / elapsed:8.0f} req/s, "
+        f"p50 {np.percentile(durations, 50) * 1000:7.1f} ms, p99 {np.percentile(durations, 99) * 1000:7.1f} ms, "
+        f"{np.mean(queries):.1f} queries per request"
+    )
+
+
+async def benchmark():
+    fake = FakeAsyncClient(seed(), latency=DB_LATENCY)
+    install(app, fake)
+    rng = np.random.default_rng(7)
+    tokens = [
+        AuthService.create_access_token({
+            "sub": f"owner{i}@demo.com", "user_id": f"owner-{i}",
+            "user_type": "pet_owner", "email": f"owner{i}@demo.com"
+        })
+        for i in range(OWNERS)
+    ]
+
+    logger.info(
+        f"⏱  {CAREGIVERS:,} caregivers, {OWNERS * BOOKINGS_PER_OWNER:,} bookings, "
+        f"{REQUESTS:,} requests per endpoint, {CONCURRENCY} concurrent, {DB_LATENCY * 1000:.0f} ms per database call"
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await run(client, "POST /api/search/location", lambda i: client.post("/api/search/location", json={
+            "latitude": float(rng.uniform(1.25, 1.45)), "longitude": float(rng.uniform(103.65, 104.0)),
+            "radius": 5, "sort": "distance"
+        }))
+        await run(client, "GET /api/bookings/history", lambda i: client.get(
+            "/api/bookings/history", headers={"Authorization": f"Bearer {tokens[i % OWNERS]}"}
+        ))
+        await run(client, "GET /api/stats/user", lambda i: client.get(
+            "/api/stats/user", headers={"Authorization": f"Bearer {tokens[i % OWNERS]}"}
+        ))
+
+    logger.info(f"   {fake.call_count:,} database calls in total")
+
+
+def main():
+    logger.info("🚀 Starting offline app benchmark...")
+    asyncio.run(benchmark())
+    logger.info("✅ Benchmark completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Accuracy check and benchmark of the vectorized search distance engine against geopy.geodesic
+"""
+
+import time
+import logging
+import numpy as np
+from geopy.distance import geodesic
+from geo_distance import haversine_km, lambert_km, filter_candidates
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Search origin in Singapore, candidates spread across Malaysia and Singapore
+ORIGIN = (1.3521, 103.8198)
+CANDIDATE_SIZES = [10_000, 100_000, 1_000_000]
+GEODESIC_SAMPLE_SIZE = 10_000
+
+
+def make_candidates(count: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    latitudes = rng.uniform(1.0, 7.0, count)
+    longitudes = rng.uniform(99.5, 104.5, count)
+    prices = rng.uniform(10, 200, count)
+    ratings = rng.uniform(0, 5, count)
+    return latitudes, longitudes, prices, ratings
+
+
+def check_accuracy():
+    """Compare haversine and Lambert against the WGS-84 geodesic on a random sample"""
+    latitudes, longitudes, _, _ = make_candidates(GEODESIC_SAMPLE_SIZE, seed=7)
+
+    # Include short hops around the origin, the common case for search
+    rng = np.random.default_rng(11)
+    latitudes[:1000] = ORIGIN[0] + rng.uniform(-0.1, 0.1, 1000)
+    longitudes[:1000] = ORIGIN[1] + rng.uniform(-0.1, 0.1, 1000)
+
+    expected = np.array([
+        geodesic(ORIGIN, (lat, lng)).kilometers for lat, lng in zip(latitudes, longitudes)
+    ])
+    logger.info(f"📏 Accuracy over {GEODESIC_SAMPLE_SIZE:,} pairs (distances up to {expected.max():.0f} km)")
+
+    for name, distance_fn in [("haversine", haversine_km), ("lambert", lambert_km)]:
+        actual = distance_fn(ORIGIN[0], ORIGIN[1], latitudes, longitudes)
+        abs_error = np.abs(actual - expected)
+        rel_error = abs_error / np.maximum(expected, 1e-9)
+        near = expected <= 10
+
+        logger.info(
+            f"   {name:<9} max abs error: {abs_error.max() * 1000:8.1f} m, "
+            f"max rel error: {rel_error.max() * 100:.4f}%, "
+            f"max abs error within 10 km: {abs_error[near].max() * 1000:.2f} m"
+        )
+
+
+def time_geodesic_per_row() -> float:
+    latitudes, longitudes, _, _ = make_candidates(GEODESIC_SAMPLE_SIZE)
+    start = time.perf_counter()
+    for lat, lng in zip(latitudes, longitudes):
+        geodesic(ORIGIN, (lat, lng)).kilometers
+    return (time.perf_counter() - start) / GEODESIC_SAMPLE_SIZE
+
+
+def benchmark():
+    geodesic_per_row = time_geodesic_per_row()
+    logger.info(f"⏱  geopy.geodesic: {geodesic_per_row * 1e6:.1f} µs per candidate")
+
+    for count in CANDIDATE_SIZES:
+        latitudes, longitudes, prices, ratings = make_candidates(count)
+
+        runs = 5
+        start = time.perf_counter()
+        for _ in range(runs):
+            indices, distances = filter_candidates(
+                ORIGIN[0], ORIGIN[1], 25.0,
+                latitudes, longitudes,
+                prices=prices, max_price=120,
+                ratings=ratings, min_rating=3.5
+            )
+        elapsed = (time.perf_counter() - start) / runs
+
+        logger.info(
+            f"   {count:>9,} candidates: vectorized {elapsed * 1000:8.2f} ms "
+            f"(geodesic loop ≈ {geodesic_per_row * count * 1000:10.0f} ms, "
+            f"{geodesic_per_row * count / elapsed:6.0f}x), {len(indices)} matches"
+        )
+
+
+def main():
+    logger.info("🚀 Starting geo distance benchmark...")
+    check_accuracy()
+    benchmark()
+    logger.info("✅ Benchmark completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Login throughput, and latency of an endpoint that does not hash passwords, while logins are under load
+or under a credential-stuffing attack
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Tuple
+import numpy as np
+import httpx
+
+# Placeholders for the settings server.py requires, no external service is contacted
+for name, value in {
+    "JWT_SECRET_KEY": "offline-benchmark",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "STRIPE_SECRET_KEY": "sk_test_offline",
+    "GOOGLE_MAPS_API_KEY": "AIzaOfflineBenchmark",
+    "CLOUDINARY_CLOUD_NAME": "offline",
+    "CLOUDINARY_API_KEY": "offline",
+    "CLOUDINARY_API_SECRET": "offline",
+}.items():
+    os.environ.setdefault(name, value)
+
+import server
+from server import app
+from auth import AuthService
+from password_hashing import password_hasher
+from login_throttle import LoginThrottle
+from fake_supabase import FakeAsyncClient, FakeDatabase, install
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+USERS = 200
+PASSWORD = "benchmark-password"
+# Ids must be UUIDs, UserResponse rejects anything else
+USER_IDS = [str(uuid.uuid4()) for _ in range(USERS)]
+# Clients logging in back to back, and clients calling GET /api/auth/me meanwhile
+LOGIN_CONCURRENCY = 32
+PROBE_CONCURRENCY = 16
+# Seconds each scenario runs
+DURATION = 5.0
+# Simulated PostgREST round trip per call
+DB_LATENCY = 0.005
+# Credential stuffing: attempts per second from a few IPs, sent at a fixed rate whatever the
+# responses say, while other users log in at a fixed rate, each once from an IP of its own
+ATTACKER_IPS = 4
+ATTACK_RATE = 40
+LEGIT_RATE = 1
+# Accounts the users log in to; the attack tries the others
+LEGIT_ACCOUNTS = 50
+# Seconds each attack runs; latencies are reported separately for requests started during the
+# opening burst, which the throttle admits until each attacking IP has spent its attempts, and after
+ATTACK_DURATION = 40.0
+ATTACK_BURST = 10.0
+# Attempts per IP and minute that the attacking IPs together can spend without queueing minutes
+# of bcrypt work on a single hashing worker
+SIZED_IP_ATTEMPTS = 3
+
+def seed(password_hash: str) -> FakeDatabase:
+    database = FakeDatabase()
+    for i in range(USERS):
+        database.insert("users", {
+            "id": USER_IDS[i], "email": f"user{i}@demo.com", "password_hash": password_hash,
+            "first_name": "Demo", "last_name": f"User {i}", "user_type": "pet_owner",
+            "is_active": True, "email_verified": True
+        })
+    return database
+
+
+async def probe(client: httpx.AsyncClient, tokens: List[str], stop: asyncio.Event) -> List[float]:
+    """Latencies of GET /api/auth/me, which reads a user but never touches bcrypt"""
+    durations = []
+
+    async def one(worker: int):
+        i = worker
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {tokens[i % USERS]}"})
+            durations.append(time.perf_counter() - start)
+            response.raise_for_status()
+            i += PROBE_CONCURRENCY
+
+    await asyncio.gather(*(one(worker) for worker in range(PROBE_CONCURRENCY)))
+    return durations
+
+
+async def pooled_logins(client: httpx.AsyncClient, stop: asyncio.Event) -> Dict[str, int]:
+    """POST /api/auth/login back to back, bcrypt runs on the password hashing pool"""
+    counts = {"logins": 0, "rejected": 0}
+
+    async def one(worker: int):
+        i = worker
+        while not stop.is_set():
+            response = await client.post(
+                "/api/auth/login", json={"email": f"user{i % USERS}@demo.com", "password": PASSWORD}
+            )
+            if response.status_code == 503:
+                counts["rejected"] += 1
+                await asyncio.sleep(float(response.headers.get("Retry-After", 1)) / 10)
+                continue
+            response.raise_for_status()
+            counts["logins"] += 1
+            i += LOGIN_CONCURRENCY
+
+    await asyncio.gather(*(one(worker) for worker in range(LOGIN_CONCURRENCY)))
+    return counts
+
+
+async def inline_logins(password_hash: str, stop: asyncio.Event) -> Dict[str, int]:
+    """bcrypt checked on the event loop itself, as the login handler used to do"""
+    counts = {"logins": 0, "rejected": 0}
+    while not stop.is_set():
+        AuthService.verify_password(PASSWORD, password_hash)
+        counts["logins"] += 1
+        await asyncio.sleep(0)
+    return counts
+
+
+async def scenario(
+    client: httpx.AsyncClient,
+    tokens: List[str],
+    name: str,
+    load: Callable[[asyncio.Event], Awaitable[Dict[str, int]]]
+):
+    stop = asyncio.Event()
+    probes = asyncio.ensure_future(probe(client, tokens, stop))
+    logins = asyncio.ensure_future(load(stop))
+    await asyncio.sleep(DURATION)
+    stop.set()
+    durations, counts = await asyncio.gather(probes, logins)
+
+    logger.info(
+        f"   {name:<26} logins {counts['logins'] / DURATION:7.1f}/s ({counts['rejected']} refused), "
+        f"GET /api/auth/me {len(durations) / DURATION:7.0f} req/s, "
+        f"p50 {np.percentile(durations, 50) * 1000:7.1f} ms, p99 {np.percentile(durations, 99) * 1000:7.1f} ms"
+    )
+
+
+async def idle(stop: asyncio.Event) -> Dict[str, int]:
+    await stop.wait()
+    return {"logins": 0, "rejected": 0}
+
+
+def client_from(ip: str) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, client=(ip, 40000))
+    return httpx.AsyncClient(transport=transport, base_url="http://benchmark")
+
+
+async def at_rate(stop: asyncio.Event, rate: float, send: Callable[[int], Awaitable[None]]):
+    """send(0), send(1), ... started `rate` times a second whatever their responses, then awaited"""
+    sent: List[asyncio.Future] = []
+    start = time.perf_counter()
+    while rate and not stop.is_set():
+        sent.append(asyncio.ensure_future(send(len(sent))))
+        await asyncio.sleep(max(start + len(sent) / rate - time.perf_counter(), 0))
+    await asyncio.gather(*sent)
+
+
+async def attack(stop: asyncio.Event, logins: List[Tuple[float, float]], rate: float) -> Dict[str, int]:
+    """Wrong passwords for real accounts from a few IPs, while other users log in with the right one.
+
+    `logins` gets the start time and duration of every user login.
+    """
+    counts = {"logins": 0, "rejected": 0, "attempts": 0, "refused": 0}
+    attackers = [client_from(f"203.0.113.{n + 1}") for n in range(ATTACKER_IPS)]
+
+    async def attempt(i: int):
+        email = f"user{LEGIT_ACCOUNTS + i % (USERS - LEGIT_ACCOUNTS)}@demo.com"
+        response = await attackers[i % ATTACKER_IPS].post("/api/auth/login", json={"email": email, "password": "guess"})
+        counts["attempts"] += 1
+        if response.status_code in (429, 503):
+            counts["refused"] += 1
+
+    async def login(n: int):
+        async with client_from(f"198.51.{n // 250}.{n % 250 + 1}") as user:
+            start = time.perf_counter()
+            response = await user.post(
+                "/api/auth/login", json={"email": f"user{n % LEGIT_ACCOUNTS}@demo.com", "password": PASSWORD}
+            )
+            logins.append((start, time.perf_counter() - start))
+        if response.status_code == 200:
+            counts["logins"] += 1
+        else:
+            counts["rejected"] += 1
+
+    try:
+        await asyncio.gather(at_rate(stop, rate, attempt), at_rate(stop, LEGIT_RATE, login))
+    finally:
+        for client in attackers:
+            await client.aclose()
+    return counts
+
+
+async def attack_scenario(
+    client: httpx.AsyncClient,
+    tokens: List[str],
+    name: str,
+    throttle: LoginThrottle,
+    rate: float = ATTACK_RATE
+):
+    # Let checks queued by the previous scenario finish first
+    while password_hasher.stats()["pending"]:
+        await asyncio.sleep(0.1)
+    server.login_throttle = throttle
+
+    stop, burst_over = asyncio.Event(), asyncio.Event()
+    user_logins: List[Tuple[float, float]] = []
+    started = time.perf_counter()
+    logins = asyncio.ensure_future(attack(stop, user_logins, rate))
+    burst = asyncio.ensure_future(probe(client, tokens, burst_over))
+    await asyncio.sleep(ATTACK_BURST)
+    burst_over.set()
+    burst_durations = await burst
+    steady = asyncio.ensure_future(probe(client, tokens, stop))
+    await asyncio.sleep(ATTACK_DURATION - ATTACK_BURST)
+    stop.set()
+    steady_durations, counts = await asyncio.gather(steady, logins)
+
+    logger.info(
+        f"   {name:<26} attack {counts['attempts'] / ATTACK_DURATION:5.1f}/s ({counts['refused']} refused), "
+        f"user logins {counts['logins']} ok / {counts['rejected']} failed"
+    )
+    in_burst = [duration for start, duration in user_logins if start - started < ATTACK_BURST]
+    after_burst = [duration for start, duration in user_logins if start - started >= ATTACK_BURST]
+    for phase, durations, legit in (
+        (f"first {ATTACK_BURST:.0f} s", burst_durations, in_burst),
+        (f"after {ATTACK_BURST:.0f} s", steady_durations, after_burst)
+    ):
+        logger.info(
+            f"      {phase:<11} GET /api/auth/me p99 {np.percentile(durations, 99) * 1000:7.1f} ms, "
+            f"user login p99 {np.percentile(legit, 99) * 1000:7.1f} ms"
+        )
+
+
+async def benchmark():
+    password_hash = AuthService.get_password_hash(PASSWORD)
+    install(app, FakeAsyncClient(seed(password_hash), latency=DB_LATENCY))
+    # The scenarios before the attack measure the hashing pool, with every login from one client
+    unthrottled = LoginThrottle(ip_attempts=0, email_attempts=0)
+    server.login_throttle = unthrottled
+    tokens = [
+        AuthService.create_access_token({
+            "sub": f"user{i}@demo.com", "user_id": USER_IDS[i],
+            "user_type": "pet_owner", "email": f"user{i}@demo.com"
+        })
+        for i in range(USERS)
+    ]
+
+    logger.info(
+        f"⏱  {LOGIN_CONCURRENCY} clients logging in, {PROBE_CONCURRENCY} clients reading, "
+        f"{DURATION:.0f} s per scenario, {password_hasher.stats()['workers']} password hashing workers"
+    )
+    logger.info(
+        f"   attacks: {ATTACK_RATE} attempts/s from {ATTACKER_IPS} IPs, {LEGIT_RATE} user login/s "
+        f"from other IPs, {ATTACK_DURATION:.0f} s per attack"
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await scenario(client, tokens, "no logins", idle)
+        await scenario(client, tokens, "bcrypt on the event loop", lambda stop: inline_logins(password_hash, stop))
+        await scenario(client, tokens, "bcrypt on the worker pool", lambda stop: pooled_logins(client, stop))
+        await attack_scenario(client, tokens, "users only, no attack", LoginThrottle(), rate=0)
+        await attack_scenario(client, tokens, "attack, no throttle", unthrottled)
+        await attack_scenario(client, tokens, "attack, default throttle", LoginThrottle())
+        await attack_scenario(
+            client, tokens, f"attack, {SIZED_IP_ATTEMPTS} per IP/min", LoginThrottle(ip_attempts=SIZED_IP_ATTEMPTS)
+        )
+
+    logger.info(f"   password hashing: {password_hasher.stats()}")
+    logger.info(f"   login throttle: {server.login_throttle.stats()}")
+    password_hasher.shutdown()
+
+
+def main():
+    logger.info("🚀 Starting login load benchmark...")
+    asyncio.run(benchmark())
+    logger.info("✅ Benchmark completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the multi-factor ranking stage of location search
+"""
+
+import time
+import logging
+import numpy as np
+from search_ranking import CaregiverFeatureStore, score_candidates, repeat_mask
+from search_pagination import top_k_after
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CANDIDATE_SIZES = [100, 1_000, 10_000]
+INDEXED_SERVICES = 50_000
+PAGE_SIZE = 50
+RUNS = 200
+
+
+def build_store(count: int, seed: int = 42) -> CaregiverFeatureStore:
+    rng = np.random.default_rng(seed)
+    store = CaregiverFeatureStore()
+    for i in range(count):
+        store.upsert(
+            f"service-{i}",
+            rng.uniform(1.2, 1.5), rng.uniform(103.6, 104.0),
+            rng.uniform(10, 200), rng.uniform(0, 5), int(rng.integers(0, 300))
+        )
+    return store
+
+
+def benchmark(store: CaregiverFeatureStore):
+    rng = np.random.default_rng(7)
+    for count in CANDIDATE_SIZES:
+        rows = rng.choice(len(store), size=count, replace=False)
+        distances = rng.uniform(0, 10, count)
+        caregiver_ids = [f"caregiver-{row}" for row in rows]
+        service_ids = [f"service-{row}" for row in rows]
+        previous = set(caregiver_ids[:5])
+
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            scores = score_candidates(
+                distances, 10.0,
+                store.column("rating", rows), store.column("reviews", rows), store.column("price", rows),
+                repeat=repeat_mask(caregiver_ids, previous)
+            )
+        scoring = (time.perf_counter() - start) / RUNS
+
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            top_k_after(-scores, service_ids, PAGE_SIZE)
+        paging = (time.perf_counter() - start) / RUNS
+
+        logger.info(
+            f"   {count:>6,} candidates: scoring {scoring * 1e6:8.1f} µs, "
+            f"top-{PAGE_SIZE} page {paging * 1e6:8.1f} µs"
+        )
+
+
+def main():
+    logger.info("🚀 Starting search ranking benchmark...")
+    store = build_store(INDEXED_SERVICES)
+    logger.info(f"📦 Feature store holds {len(store):,} services")
+    benchmark(store)
+    logger.info("✅ Benchmark completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Cost of get_current_user per request with and without the verified token cache
+"""
+
+import os
+import time
+import asyncio
+import logging
+
+os.environ.setdefault("JWT_SECRET_KEY", "offline-benchmark")
+
+from fastapi.security import HTTPAuthorizationCredentials
+from auth import AuthService, get_current_user
+from token_cache import token_cache, TOKEN_CACHE_MAX_ENTRIES
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Signed-in clients, each sending its token again and again
+CLIENTS = 500
+CALLS = 200_000
+
+
+async def run(credentials) -> float:
+    start = time.perf_counter()
+    for i in range(CALLS):
+        await get_current_user(credentials[i % CLIENTS])
+    return time.perf_counter() - start
+
+
+async def benchmark():
+    credentials = [
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=AuthService.create_access_token({
+            "sub": f"user{i}@demo.com", "user_id": f"user-{i}",
+            "user_type": "pet_owner", "email": f"user{i}@demo.com"
+        }))
+        for i in range(CLIENTS)
+    ]
+    logger.info(f"⏱  {CALLS:,} calls from {CLIENTS} clients")
+
+    for name, max_entries in (("without cache", 0), ("with cache", TOKEN_CACHE_MAX_ENTRIES)):
+        token_cache.clear()
+        token_cache.resize(max_entries)
+        hits = token_cache.hits
+        elapsed = await run(credentials)
+        logger.info(
+            f"   {name:<14} {CALLS / elapsed:10.0f} calls/s, {elapsed / CALLS * 1e6:6.2f} µs per call, "
+            f"{(token_cache.hits - hits) / CALLS:.1%} served from the cache"
+        )
+
+
+def main():
+    logger.info("🚀 Starting token verification benchmark...")
+    asyncio.run(benchmark())
+    logger.info("✅ Benchmark completed")
+
+
+if __name__ == "__main__":
+    main()
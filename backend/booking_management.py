@@ -9,9 +9,12 @@ from datetime import datetime, timedelta
 from enum import Enum
 import uuid
 import logging
-from database import get_db_client
+from database import get_db_client, get_read_db_client, get_read_request_loaders, RequestLoaders
 from auth import get_current_user
 from models import BookingStatus, PaymentStatus
+from projections import BOOKING_COMPLETION, BOOKING_CONFIRMATION, BOOKING_FILTERED_FOR_CAREGIVER, BOOKING_FILTERED_FOR_OWNER, BOOKING_WITH_CAREGIVER_USER
+from availability_index import refresh_caregiver_availability
+from caregiver_resolver import caregiver_id_resolver
 import asyncio
 
 logger = logging.getLogger(__name__)
@@ -32,7 +35,7 @@ class BookingFilters(str, Enum):
 async def get_filtered_bookings(
     filter_type: BookingFilters,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_db_client),
+    db = Depends(get_read_db_client),
     limit: int = 50,
     offset: int = 0
 ):
@@ -42,25 +45,14 @@ async def get_filtered_bookings(
         
         # Build base query based on user type
         if current_user.get("user_type") == "pet_owner":
-            base_query = db.table("bookings").select("""
-                *,
-                caregiver_profiles!inner(*, users!caregiver_profiles_user_id_fkey(first_name, last_name, profile_image_url)),
-                pets(name, species, breed, images),
-                caregiver_services(service_name, title, service_type)
-            """).eq("pet_owner_id", current_user["user_id"])
+            base_query = db.table("bookings").select(BOOKING_FILTERED_FOR_OWNER).eq("pet_owner_id", current_user["user_id"])
         else:
             # Get caregiver profile first
-            profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", current_user["user_id"]).execute()
-            if not profile_result.data:
+            caregiver_id = await caregiver_id_resolver.resolve(db, current_user["user_id"])
+            if not caregiver_id:
                 return []
             
-            caregiver_id = profile_result.data[0]["id"]
-            base_query = db.table("bookings").select("""
-                *,
-                users!bookings_pet_owner_id_fkey(first_name, last_name, profile_image_url),
-                pets(name, species, breed, images),
-                caregiver_services(service_name, title, service_type)
-            """).eq("caregiver_id", caregiver_id)
+            base_query = db.table("bookings").select(BOOKING_FILTERED_FOR_CAREGIVER).eq("caregiver_id", caregiver_id)
         
         # Apply filters
         if filter_type == BookingFilters.UPCOMING:
@@ -113,13 +105,7 @@ async def confirm_booking(
     """Caregiver confirms a pending booking"""
     try:
         # Get booking with related data
-        booking_result = await db.table("bookings").select("""
-            *,
-            users!bookings_pet_owner_id_fkey(first_name, last_name, email),
-            caregiver_profiles!inner(*, users!caregiver_profiles_user_id_fkey(first_name, last_name)),
-            caregiver_services(service_name, title),
-            pets(name, breed)
-        """).eq("id", booking_id).execute()
+        booking_result = await db.table("bookings").select(BOOKING_CONFIRMATION).eq("id", booking_id).execute()
         
         if not booking_result.data:
             raise HTTPException(status_code=404, detail="Booking not found")
@@ -142,6 +128,8 @@ async def confirm_booking(
         if not update_result.data:
             raise HTTPException(status_code=500, detail="Failed to confirm booking")
         
+        await refresh_caregiver_availability(db, booking["caregiver_id"])
+        
         # Send confirmation email
         background_tasks.add_task(
             send_booking_confirmation_email,
@@ -173,10 +161,7 @@ async def start_service(
 ):
     """Mark service as started"""
     try:
-        booking_result = await db.table("bookings").select("""
-            *,
-            caregiver_profiles!inner(user_id)
-        """).eq("id", booking_id).execute()
+        booking_result = await db.table("bookings").select(BOOKING_WITH_CAREGIVER_USER).eq("id", booking_id).execute()
         
         if not booking_result.data:
             raise HTTPException(status_code=404, detail="Booking not found")
@@ -233,13 +218,7 @@ async def complete_service(
         service_notes = completion_data.get("service_notes", "")
         completion_photos = completion_data.get("completion_photos", [])
         
-        booking_result = await db.table("bookings").select("""
-            *,
-            users!bookings_pet_owner_id_fkey(first_name, email),
-            caregiver_profiles!inner(*, users!caregiver_profiles_user_id_fkey(first_name)),
-            caregiver_services(title),
-            pets(name)
-        """).eq("id", booking_id).execute()
+        booking_result = await db.table("bookings").select(BOOKING_COMPLETION).eq("id", booking_id).execute()
         
         if not booking_result.data:
             raise HTTPException(status_code=404, detail="Booking not found")
@@ -265,6 +244,8 @@ async def complete_service(
         
         update_result = await db.table("bookings").update(update_data).eq("id", booking_id).execute()
         
+        await refresh_caregiver_availability(db, booking["caregiver_id"])
+        
         # Send completion email with review request
         background_tasks.add_task(
             send_service_completion_email,
@@ -295,25 +276,23 @@ async def complete_service(
 async def get_booking_timeline(
     booking_id: str,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_db_client)
+    db = Depends(get_read_db_client),
+    loaders: RequestLoaders = Depends(get_read_request_loaders)
 ):
     """Get booking timeline/history"""
     try:
         # Get booking
-        booking_result = await db.table("bookings").select("*").eq("id", booking_id).execute()
-        if not booking_result.data:
+        booking = await loaders.load("bookings", booking_id)
+        if not booking:
             raise HTTPException(status_code=404, detail="Booking not found")
         
-        booking = booking_result.data[0]
-        
         # Check authorization
         is_pet_owner = booking["pet_owner_id"] == current_user["user_id"]
         is_caregiver = False
         
-        if not is_pet_owner:
-            profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", current_user["user_id"]).execute()
-            if profile_result.data:
-                is_caregiver = booking["caregiver_id"] == profile_result.data[0]["id"]
+        if not is_pet_owner and current_user.get("user_type") == "caregiver":
+            caregiver_id = await caregiver_id_resolver.resolve(db, current_user["user_id"])
+            is_caregiver = bool(caregiver_id) and booking["caregiver_id"] == caregiver_id
         
         if not (is_pet_owner or is_caregiver):
             raise HTTPException(status_code=403, detail="Not authorized")
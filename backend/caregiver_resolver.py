@@ -0,0 +1,73 @@
+"""
+Process-lifetime map of user ids to caregiver profile ids
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+from projections import ID
+
+logger = logging.getLogger(__name__)
+
+
+class CaregiverIdResolver:
+    """Resolves a caregiver's profile id from their user id.
+
+    A caregiver profile is created once at signup and its id never changes
+    afterwards, so a resolved id is kept for the life of the process with no
+    TTL or invalidation. Users without a profile are not remembered, a
+    profile created later is found on the next lookup.
+    """
+
+    def __init__(self):
+        self._caregiver_ids: Dict[str, str] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._caregiver_ids)
+
+    def prime(self, user_id: str, caregiver_id: str):
+        """Record the id of a profile that was just created"""
+        self._caregiver_ids[str(user_id)] = str(caregiver_id)
+
+    def peek(self, user_id: str) -> Optional[str]:
+        return self._caregiver_ids.get(str(user_id))
+
+    async def resolve(self, db, user_id: str) -> Optional[str]:
+        """Caregiver profile id of the user, or None when they have no profile"""
+        user_id = str(user_id)
+        caregiver_id = self._caregiver_ids.get(user_id)
+        if caregiver_id is not None:
+            self.hits += 1
+            return caregiver_id
+
+        pending = self._inflight.get(user_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        try:
+            result = await db.table("caregiver_profiles").select(ID).eq("user_id", user_id).execute()
+            caregiver_id = result.data[0]["id"] if result.data else None
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(user_id, None)
+
+        if caregiver_id is not None:
+            self._caregiver_ids[user_id] = caregiver_id
+        future.set_result(caregiver_id)
+        return caregiver_id
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._caregiver_ids), "hits": self.hits, "misses": self.misses}
+
+
+# Global resolver instance
+caregiver_id_resolver = CaregiverIdResolver()
@@ -5,11 +5,19 @@ Supabase PostgreSQL database client configuration and management
 import asyncio
 import os
 import logging
-from typing import AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, Dict, Hashable, List, Optional, Set, Tuple
 from contextlib import asynccontextmanager
+from fastapi import Depends, Request
+import httpx
 from supabase import create_async_client, AsyncClient
-from supabase.lib.client_options import ClientOptions
+from supabase.lib.client_options import AsyncClientOptions
 from dotenv import load_dotenv
+from db_metrics import InstrumentedClient, PoolMetricsTransport
+from db_resilience import DatabaseResilience, db_resilience, replica_resilience
+from slow_query_log import slow_query_log
+from replica_routing import READ_PRIMARY_HEADER, read_your_writes, session_key
+from row_cache import RowCache, row_cache, ROW_CACHE_TABLES
+from projections import ROW_PROJECTIONS
 
 # Load environment variables
 load_dotenv()
@@ -23,10 +31,95 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
+# Optional read replica serving read-only endpoints, falls back to the primary when unset
+SUPABASE_REPLICA_URL = os.getenv("SUPABASE_REPLICA_URL")
+SUPABASE_REPLICA_KEY = os.getenv("SUPABASE_REPLICA_KEY", SUPABASE_SERVICE_KEY)
+
+# Connection pool to PostgREST, shared by every request
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", 100))
+DB_POOL_MAX_KEEPALIVE = int(os.getenv("DB_POOL_MAX_KEEPALIVE", 20))
+DB_POOL_KEEPALIVE_EXPIRY = float(os.getenv("DB_POOL_KEEPALIVE_EXPIRY", 30))
+DB_HTTP2 = os.getenv("DB_HTTP2", "false").lower() == "true"
+
+# Timeouts in seconds of each phase of a request
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", 5))
+DB_READ_TIMEOUT = float(os.getenv("DB_READ_TIMEOUT", 30))
+DB_WRITE_TIMEOUT = float(os.getenv("DB_WRITE_TIMEOUT", 30))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+
+def build_http_client(
+    max_connections: int = DB_POOL_MAX_CONNECTIONS,
+    max_keepalive: int = DB_POOL_MAX_KEEPALIVE,
+    keepalive_expiry: float = DB_POOL_KEEPALIVE_EXPIRY,
+    http2: bool = DB_HTTP2
+) -> httpx.AsyncClient:
+    """httpx client with the configured pool, keep-alive, protocol and timeouts"""
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("DB_HTTP2 is enabled but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+
+    transport = PoolMetricsTransport(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        ),
+        http2=http2
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(
+            connect=DB_CONNECT_TIMEOUT,
+            read=DB_READ_TIMEOUT,
+            write=DB_WRITE_TIMEOUT,
+            pool=DB_POOL_TIMEOUT
+        ),
+        follow_redirects=True
+    )
+
 class DatabaseManager:
-    def __init__(self):
+    def __init__(
+        self,
+        url: Optional[str] = SUPABASE_URL,
+        key: Optional[str] = SUPABASE_SERVICE_KEY,
+        replica_url: Optional[str] = SUPABASE_REPLICA_URL,
+        replica_key: Optional[str] = SUPABASE_REPLICA_KEY
+    ):
+        self._url = url
+        self._key = key
+        self._replica_url = replica_url
+        self._replica_key = replica_key
         self._client: Optional[AsyncClient] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._replica_client: Optional[AsyncClient] = None
+        self._replica_http_client: Optional[httpx.AsyncClient] = None
         self._lock = asyncio.Lock()
+
+    @property
+    def has_replica(self) -> bool:
+        return bool(self._replica_url)
+
+    async def _create_client(self, url: str, key: str, http_client: httpx.AsyncClient, resilience: DatabaseResilience) -> AsyncClient:
+        # PostgREST, storage and auth share one pool; timeouts are set on it
+        options = AsyncClientOptions(
+            schema="public",
+            headers={"User-Agent": "PetBnB-FastAPI-Client"},
+            auto_refresh_token=False,
+            persist_session=False,
+            httpx_client=http_client
+        )
+
+        client = await create_async_client(
+            supabase_url=url,
+            supabase_key=key,
+            options=options
+        )
+        # Every table/RPC call is timed, attributed to the request being served,
+        # sent through the circuit breakers and retry budget, and logged when slow
+        return InstrumentedClient(client, executor=resilience.execute, slow_queries=slow_query_log)
     
     async def get_client(self) -> AsyncClient:
         """Get or create async Supabase client with singleton pattern"""
@@ -38,20 +131,8 @@ class DatabaseManager:
                 return self._client
             
             try:
-                options = ClientOptions(
-                    postgrest_client_timeout=30,
-                    storage_client_timeout=30,
-                    schema="public",
-                    headers={"User-Agent": "PetBnB-FastAPI-Client"},
-                    auto_refresh_token=False,
-                    persist_session=False
-                )
-                
-                self._client = await create_async_client(
-                    supabase_url=SUPABASE_URL,
-                    supabase_key=SUPABASE_SERVICE_KEY,
-                    options=options
-                )
+                self._http_client = self._http_client or build_http_client()
+                self._client = await self._create_client(self._url, self._key, self._http_client, db_resilience)
                 
                 logger.info("Supabase async client initialized successfully")
                 return self._client
@@ -59,6 +140,36 @@ class DatabaseManager:
             except Exception as e:
                 logger.error(f"Failed to initialize Supabase client: {e}")
                 raise RuntimeError("Database connection failed") from e
+
+    async def get_replica_client(self) -> AsyncClient:
+        """Get or create the read replica client, the primary one when no replica is configured"""
+        if not self.has_replica:
+            return await self.get_client()
+        if self._replica_client is not None:
+            return self._replica_client
+
+        async with self._lock:
+            if self._replica_client is not None:
+                return self._replica_client
+
+            try:
+                self._replica_http_client = self._replica_http_client or build_http_client()
+                self._replica_client = await self._create_client(
+                    self._replica_url, self._replica_key, self._replica_http_client, replica_resilience
+                )
+
+                logger.info("Supabase read replica client initialized successfully")
+                return self._replica_client
+
+            except Exception as e:
+                logger.error(f"Failed to initialize Supabase read replica client: {e}")
+                raise RuntimeError("Database connection failed") from e
+
+    async def get_read_client(self, session: Optional[str] = None, force_primary: bool = False) -> AsyncClient:
+        """Client for a read-only query: the replica, unless the session must see its own recent writes"""
+        if self.has_replica and read_your_writes.use_replica(session, force_primary):
+            return await self.get_replica_client()
+        return await self.get_client()
     
     async def close_client(self):
         """Close the async client connection"""
@@ -66,6 +177,21 @@ class DatabaseManager:
             # Don't call sign_out for service role key
             self._client = None
             logger.info("Supabase client connection closed")
+        if self._replica_client:
+            self._replica_client = None
+            logger.info("Supabase read replica client connection closed")
+        for http_client in (self._http_client, self._replica_http_client):
+            if http_client is not None:
+                await http_client.aclose()
+        self._http_client = None
+        self._replica_http_client = None
+
+    def pool_stats(self, replica: bool = False) -> Dict[str, Any]:
+        """Connection pool usage of the shared HTTP client of the primary or the replica"""
+        http_client = self._replica_http_client if replica else self._http_client
+        if http_client is None:
+            return {}
+        return http_client._transport.stats()
 
 # Global database manager instance
 db_manager = DatabaseManager()
@@ -74,6 +200,15 @@ async def get_db_client() -> AsyncClient:
     """FastAPI dependency for database client injection"""
     return await db_manager.get_client()
 
+async def get_read_db_client(request: Request) -> AsyncClient:
+    """FastAPI dependency for read-only endpoints, served from the read replica when one is configured.
+
+    A caller that wrote within the sticky window, or sends X-Read-Primary: true,
+    reads from the primary instead so it sees its own writes.
+    """
+    force_primary = request.headers.get(READ_PRIMARY_HEADER, "").lower() == "true"
+    return await db_manager.get_read_client(session_key(request), force_primary)
+
 @asynccontextmanager
 async def get_db_session():
     """Context manager for database sessions with automatic cleanup"""
@@ -87,6 +222,132 @@ async def get_db_session():
         # Cleanup logic if needed
         pass
 
+class DataLoader:
+    """Batches single-row lookups on one table column into a single .in_() query.
+
+    Every load() issued during the same event-loop tick is collected and
+    sent together on the next tick; results are memoized, so later loads of
+    the same key never go back to the database. With a row cache, hits are
+    served from it and misses already being loaded by another request are
+    joined instead of queried again.
+    """
+
+    def __init__(self, db, table: str, column: str = "id", select: str = "*", cache: Optional[RowCache] = None):
+        self._db = db
+        self._table = table
+        self._column = column
+        self._select = select
+        self._row_cache = cache
+        self._memo: Dict[Hashable, asyncio.Future] = {}
+        self._pending: List[Tuple[Hashable, asyncio.Future]] = []
+        # The event loop keeps only weak references to tasks, a batch in flight must not be collected
+        self._dispatches: Set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        key = str(key)
+        future = self._memo.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        if self._row_cache is not None:
+            row = self._row_cache.peek(self._table, key, self._column)
+            if row is not None:
+                future = self._memo[key] = loop.create_future()
+                future.set_result(row)
+                return future
+
+            shared = self._row_cache.join(self._table, key, self._column)
+            if shared is not None:
+                self._memo[key] = shared
+                return shared
+
+        future = self._memo[key] = loop.create_future()
+        if self._row_cache is not None:
+            self._row_cache.begin_load(self._table, key, future, self._column)
+        self._pending.append((key, future))
+        if len(self._pending) == 1:
+            loop.call_soon(self._start_dispatch)
+        return future
+
+    async def load_many(self, keys: List[Hashable]) -> List[Optional[Dict[str, Any]]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def clear(self, key: Hashable):
+        """Forget a memoized row after it has been written"""
+        self._memo.pop(str(key), None)
+
+    def _start_dispatch(self):
+        task = asyncio.ensure_future(self._dispatch())
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self):
+        batch, self._pending = self._pending, []
+        keys = list(dict.fromkeys(key for key, _ in batch))
+        generation = self._row_cache.generation(self._table) if self._row_cache is not None else None
+        try:
+            query = self._db.table(self._table).select(self._select)
+            if len(keys) == 1:
+                query = query.eq(self._column, keys[0])
+            else:
+                query = query.in_(self._column, keys)
+            result = await query.execute()
+        except BaseException as e:
+            for key, future in batch:
+                # A failed lookup is retried by the next load of the key
+                self._memo.pop(key, None)
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        rows = {}
+        for row in result.data or []:
+            rows.setdefault(str(row[self._column]), row)
+            if self._row_cache is not None:
+                self._row_cache.set(self._table, row, self._column, generation)
+        for key, future in batch:
+            if not future.done():
+                future.set_result(rows.get(key))
+
+
+class RequestLoaders:
+    """DataLoaders of one request, created lazily per table and column"""
+
+    def __init__(self, db):
+        self._db = db
+        self._loaders: Dict[Tuple[str, str], DataLoader] = {}
+
+    def loader(self, table: str, column: str = "id") -> DataLoader:
+        loader = self._loaders.get((table, column))
+        if loader is None:
+            cache = row_cache if table in ROW_CACHE_TABLES else None
+            select = ROW_PROJECTIONS.get(table, "*")
+            loader = self._loaders[(table, column)] = DataLoader(self._db, table, column, select, cache=cache)
+        return loader
+
+    def load(self, table: str, key: Hashable, column: str = "id") -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        """Future of one row; loads started before the first await share a query"""
+        return self.loader(table, column).load(key)
+
+    async def load_many(self, table: str, keys: List[Hashable], column: str = "id") -> List[Optional[Dict[str, Any]]]:
+        return await self.loader(table, column).load_many(keys)
+
+    def clear(self, table: str, key: Hashable, column: str = "id"):
+        self.loader(table, column).clear(key)
+
+
+async def get_request_loaders(db = Depends(get_db_client)) -> RequestLoaders:
+    """FastAPI dependency for the per-request DataLoaders"""
+    return RequestLoaders(db)
+
+async def get_read_request_loaders(db = Depends(get_read_db_client)) -> RequestLoaders:
+    """FastAPI dependency for the per-request DataLoaders of read-only endpoints, routed like get_read_db_client"""
+    return RequestLoaders(db)
+
 # Lifespan event handlers for FastAPI
 async def startup_event():
     """Initialize database connection on application startup"""
@@ -103,13 +364,6 @@ async def shutdown_event():
     logger.info("Database connection closed")
 
 # Database connection with retry logic
-async def execute_with_retry(operation, max_retries: int = 3, delay: float = 1.0):
-    """Execute database operation with retry logic"""
-    for attempt in range(max_retries):
-        try:
-            return await operation()
-        except Exception as e:
-            if attempt == max_retries - 1:
-                raise
-            logger.warning(f"Database operation failed (attempt {attempt + 1}): {e}")
-            await asyncio.sleep(delay * (2 ** attempt))  # Exponential backoff
\ No newline at end of file
+async def execute_with_retry(operation, table: str = "default", read: bool = False):
+    """Execute database operation through the circuit breaker, retrying it only if the caller marks it as a read"""
+    return await db_resilience.execute(operation, table, "select" if read else "write")
\ No newline at end of file
@@ -0,0 +1,305 @@
+"""
+Per-request database round-trip instrumentation and per-route latency histograms
+"""
+
+import time
+import logging
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import httpx
+from slow_query_log import SlowQueryLog
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Builder methods that decide the kind of PostgREST request
+OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+# Runs one call given a function sending a single attempt, its table and its operation
+Executor = Callable[[Callable[[], Awaitable[Any]], str, str], Awaitable[Any]]
+
+# Builder method calls of one query in order, as (name, args, kwargs)
+Calls = Tuple[Tuple[str, tuple, dict], ...]
+
+# Told the table, operation, builder calls and duration in milliseconds of every round trip
+Observer = Callable[[str, str, Calls, float], None]
+
+
+class RequestQueryMetrics:
+    """Every PostgREST call made while serving one request"""
+
+    def __init__(self):
+        self.queries: List[Dict[str, Any]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(query["duration_ms"] for query in self.queries)
+
+    @property
+    def total_rows(self) -> int:
+        return sum(query["rows"] for query in self.queries)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(query["bytes"] for query in self.queries)
+
+    def server_timing(self, app_ms: float) -> str:
+        """Server-Timing header value with the database total and the whole request"""
+        return (
+            f'db;dur={self.total_ms:.1f};desc="{self.count} queries, {self.total_rows} rows, {self.total_bytes} bytes", '
+            f"app;dur={app_ms:.1f}"
+        )
+
+
+# Metrics of the request being served and the query currently awaiting its response
+current_request_metrics: ContextVar[Optional[RequestQueryMetrics]] = ContextVar("current_request_metrics", default=None)
+_current_query: ContextVar[Optional[Dict[str, Any]]] = ContextVar("_current_query", default=None)
+
+
+async def record_response_size(response):
+    """httpx response hook adding the body size to the query being executed"""
+    query = _current_query.get()
+    if query is not None:
+        await response.aread()
+        query["bytes"] += len(response.content)
+
+
+class InstrumentedQuery:
+    """Proxy of a PostgREST request builder that times its execute() and remembers the calls shaping it"""
+
+    def __init__(
+        self,
+        builder,
+        table: str,
+        operation: str,
+        executor: Optional[Executor] = None,
+        calls: Calls = (),
+        observer: Optional[Observer] = None
+    ):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+        self._executor = executor
+        self._calls = calls
+        self._observer = observer
+
+    def _wrap(self, builder, operation: str, name: str, args: tuple, kwargs: dict) -> "InstrumentedQuery":
+        return InstrumentedQuery(
+            builder, self._table, operation, self._executor, self._calls + ((name, args, kwargs),), self._observer
+        )
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._builder, name)
+        operation = name if name in OPERATIONS else self._operation
+
+        if hasattr(attribute, "execute"):
+            # Properties such as not_ return a builder directly
+            return self._wrap(attribute, operation, name, (), {})
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return self._wrap(result, operation, name, args, kwargs)
+            return result
+        return call
+
+    async def execute(self):
+        if self._executor is None:
+            return await self._execute_once()
+
+        # The executor owns retries, PostgREST's own retry loop would multiply them
+        if hasattr(self._builder, "retry"):
+            self._builder.retry(False)
+        return await self._executor(self._execute_once, self._table, self._operation)
+
+    async def _execute_once(self):
+        """One round trip, every attempt of a retried call is recorded separately"""
+        query = {"table": self._table, "operation": self._operation, "rows": 0, "bytes": 0, "duration_ms": 0.0}
+        token = _current_query.set(query)
+        start = time.perf_counter()
+        try:
+            result = await self._builder.execute()
+        finally:
+            query["duration_ms"] = (time.perf_counter() - start) * 1000
+            _current_query.reset(token)
+
+            metrics = current_request_metrics.get()
+            if metrics is not None:
+                metrics.queries.append(query)
+            if self._observer is not None:
+                self._observer(self._table, self._operation, self._calls, query["duration_ms"])
+
+        data = getattr(result, "data", None)
+        query["rows"] = len(data) if isinstance(data, list) else int(data is not None)
+        return result
+
+
+class InstrumentedClient:
+    """Proxy of the Supabase AsyncClient recording every table and RPC call"""
+
+    def __init__(self, client, executor: Optional[Executor] = None, slow_queries: Optional[SlowQueryLog] = None):
+        self._client = client
+        self._executor = executor
+        self._observer = self._observe if slow_queries is not None else None
+        self._slow_queries = slow_queries
+        try:
+            client.postgrest.session.event_hooks["response"].append(record_response_size)
+        except AttributeError:
+            logger.warning("PostgREST session does not expose event hooks, response sizes will not be recorded")
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    def _observe(self, table: str, operation: str, calls: Calls, duration_ms: float):
+        # EXPLAINs of slow queries go through the bare client, they are neither retried nor logged again
+        self._slow_queries.observe(table, operation, calls, duration_ms, self._client)
+
+    def table(self, table_name: str) -> InstrumentedQuery:
+        return InstrumentedQuery(
+            self._client.table(table_name), table_name, "select", self._executor, observer=self._observer
+        )
+
+    def from_(self, table_name: str) -> InstrumentedQuery:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[Dict[Any, Any]] = None, **kwargs) -> InstrumentedQuery:
+        return InstrumentedQuery(
+            self._client.rpc(fn, params, **kwargs), fn, "rpc", self._executor, (("rpc", (params,), {}),), self._observer
+        )
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports when it is closed, the moment its connection is released"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._on_close is not None:
+                self._on_close()
+                self._on_close = None
+
+
+class PoolMetricsTransport(httpx.AsyncHTTPTransport):
+    """httpx transport counting the requests in flight and waiting for a pooled connection"""
+
+    def __init__(self, limits: httpx.Limits, http2: bool = False, **kwargs):
+        super().__init__(limits=limits, http2=http2, **kwargs)
+        self._max_connections = limits.max_connections
+        self._http2 = http2
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.peak_waiting = 0
+
+    def _release(self):
+        self.in_flight -= 1
+
+    @property
+    def waiting(self) -> Optional[int]:
+        """Requests queued for a connection; unknown with HTTP/2, where connections are shared"""
+        if self._http2 or self._max_connections is None:
+            return None
+        return max(self.in_flight - self._max_connections, 0)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.peak_waiting = max(self.peak_waiting, self.waiting or 0)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self._release()
+            raise
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, self._release),
+            extensions=response.extensions
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        connections = getattr(self._pool, "connections", [])
+        return {
+            "http2": self._http2,
+            "max_connections": self._max_connections,
+            "connections_open": len(connections),
+            "connections_in_use": sum(1 for connection in connections if not connection.is_idle()),
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_in_flight": self.peak_in_flight,
+            "peak_waiting": self.peak_waiting
+        }
+
+
+class RouteLatencyHistograms:
+    """Cumulative latency, database time and query count histograms per route"""
+
+    def __init__(self, buckets_ms: List[float] = LATENCY_BUCKETS_MS):
+        self._buckets_ms = buckets_ms
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def _bucket(self, value_ms: float) -> int:
+        for position, bound in enumerate(self._buckets_ms):
+            if value_ms <= bound:
+                return position
+        return len(self._buckets_ms)
+
+    def observe(self, route: str, app_ms: float, metrics: RequestQueryMetrics):
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = {
+                "requests": 0,
+                "app_ms_sum": 0.0,
+                "db_ms_sum": 0.0,
+                "queries_sum": 0,
+                "max_queries": 0,
+                "app_ms_buckets": [0] * (len(self._buckets_ms) + 1),
+                "db_ms_buckets": [0] * (len(self._buckets_ms) + 1)
+            }
+
+        stats["requests"] += 1
+        stats["app_ms_sum"] += app_ms
+        stats["db_ms_sum"] += metrics.total_ms
+        stats["queries_sum"] += metrics.count
+        stats["max_queries"] = max(stats["max_queries"], metrics.count)
+        stats["app_ms_buckets"][self._bucket(app_ms)] += 1
+        stats["db_ms_buckets"][self._bucket(metrics.total_ms)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        routes = {}
+        for route, stats in self._routes.items():
+            requests = stats["requests"]
+            routes[route] = {
+                "requests": requests,
+                "avg_ms": round(stats["app_ms_sum"] / requests, 2),
+                "avg_db_ms": round(stats["db_ms_sum"] / requests, 2),
+                "avg_queries": round(stats["queries_sum"] / requests, 2),
+                "max_queries": stats["max_queries"],
+                "app_ms_buckets": list(stats["app_ms_buckets"]),
+                "db_ms_buckets": list(stats["db_ms_buckets"])
+            }
+        return {"buckets_ms": self._buckets_ms + ["+Inf"], "routes": routes}
+
+
+# Global histogram instance
+route_histograms = RouteLatencyHistograms()
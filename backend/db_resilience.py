@@ -0,0 +1,264 @@
+"""
+Resilience layer of the PostgREST calls: per-table circuit breakers, a global
+retry budget, decorrelated jitter and optional hedged reads
+"""
+
+import asyncio
+import os
+import random
+import time
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+import httpx
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker: consecutive transient failures that open a table's circuit and how long it stays open
+DB_BREAKER_FAILURE_THRESHOLD = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", 5))
+DB_BREAKER_RESET_SECONDS = float(os.getenv("DB_BREAKER_RESET_SECONDS", 30))
+
+# Retries: attempts per call including the first one, and the bounds of the jittered delay
+DB_RETRY_MAX_ATTEMPTS = int(os.getenv("DB_RETRY_MAX_ATTEMPTS", 3))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", 0.05))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", 1.0))
+
+# Retry budget: retries and hedges may add at most this share of the calls, plus a small reserve
+DB_RETRY_BUDGET_RATIO = float(os.getenv("DB_RETRY_BUDGET_RATIO", 0.1))
+DB_RETRY_BUDGET_RESERVE = float(os.getenv("DB_RETRY_BUDGET_RESERVE", 10))
+
+# Delay before a hedged read sends its backup request
+DB_HEDGE_AFTER_MS = float(os.getenv("DB_HEDGE_AFTER_MS", 75))
+
+# RPCs that only read and are safe to send more than once
+READ_ONLY_RPCS = {"search_caregivers_within_radius", "search_caregivers_by_keyword"}
+
+# PostgREST errors meaning the database could not be reached, anything else is the query's own fault
+TRANSIENT_API_ERROR_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003", "502", "503", "504", "520"}
+
+# Hedge delay in seconds of the request being served, None when it does not hedge
+_hedge_after: ContextVar[Optional[float]] = ContextVar("_hedge_after", default=None)
+
+
+class CircuitOpenError(HTTPException):
+    """Raised without calling the database while a table's circuit is open"""
+
+    def __init__(self, table: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail="Database temporarily unavailable",
+            headers={"Retry-After": str(max(int(retry_after + 0.999), 1))}
+        )
+        self.table = table
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed call may succeed if sent again"""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, APIError):
+        return str(error.code) in TRANSIENT_API_ERROR_CODES
+    return False
+
+
+def is_read(table: str, operation: str) -> bool:
+    return operation == "select" or (operation == "rpc" and table in READ_ONLY_RPCS)
+
+
+def decorrelated_jitter(previous: float, base: float = DB_RETRY_BASE_DELAY, cap: float = DB_RETRY_MAX_DELAY) -> float:
+    """Next retry delay, random between the base and three times the previous delay"""
+    return min(cap, random.uniform(base, max(previous, base) * 3))
+
+
+class CircuitBreaker:
+    """Closed, open or half-open state of the calls to one table.
+
+    Once open, the first call after the reset interval goes through as a
+    probe and re-arms the timer, so only one probe per interval reaches a
+    struggling database; a success closes the circuit again.
+    """
+
+    def __init__(self, table: str, failure_threshold: int = DB_BREAKER_FAILURE_THRESHOLD, reset_seconds: float = DB_BREAKER_RESET_SECONDS):
+        self.table = table
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self._reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open":
+            self._opened_at = time.monotonic()
+            return True
+        return False
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        if not self.allow():
+            self.rejected += 1
+            raise CircuitOpenError(self.table, self._reset_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        if self._opened_at is not None:
+            logger.info(f"Circuit for table {self.table} closed")
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self._failures >= self._failure_threshold and self._opened_at is None:
+            logger.warning(f"Circuit for table {self.table} opened after {self._failures} failures")
+        if self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """Token bucket capping retries and hedges to a share of all calls.
+
+    Every call deposits `ratio` tokens and every extra request withdraws
+    one, so during an outage retries stop once the reserve is spent instead
+    of multiplying the load on the database.
+    """
+
+    def __init__(self, ratio: float = DB_RETRY_BUDGET_RATIO, reserve: float = DB_RETRY_BUDGET_RESERVE):
+        self._ratio = ratio
+        self._reserve = reserve
+        self._tokens = reserve
+        self.deposits = 0
+        self.withdrawals = 0
+        self.exhausted = 0
+
+    def deposit(self):
+        self.deposits += 1
+        self._tokens = min(self._tokens + self._ratio, self._reserve)
+
+    def try_withdraw(self) -> bool:
+        if self._tokens < 1:
+            self.exhausted += 1
+            return False
+        self._tokens -= 1
+        self.withdrawals += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokens": round(self._tokens, 2),
+            "calls": self.deposits,
+            "extra_requests": self.withdrawals,
+            "exhausted": self.exhausted
+        }
+
+
+class DatabaseResilience:
+    """Runs every PostgREST call through its table's breaker, with retries and hedging for reads only"""
+
+    def __init__(self, max_attempts: int = DB_RETRY_MAX_ATTEMPTS, budget: Optional[RetryBudget] = None):
+        self._max_attempts = max_attempts
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.budget = budget or RetryBudget()
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def breaker(self, table: str) -> CircuitBreaker:
+        breaker = self._breakers.get(table)
+        if breaker is None:
+            breaker = self._breakers[table] = CircuitBreaker(table)
+        return breaker
+
+    async def execute(self, call: Callable[[], Awaitable[Any]], table: str, operation: str) -> Any:
+        """Run one call; writes are sent exactly once, reads are retried while the budget allows"""
+        breaker = self.breaker(table)
+        breaker.check()
+        self.budget.deposit()
+
+        read = is_read(table, operation)
+        hedge_after = _hedge_after.get() if read else None
+        delay = DB_RETRY_BASE_DELAY
+        attempt = 1
+        while True:
+            try:
+                if hedge_after is not None:
+                    result = await self._hedged(call, hedge_after)
+                else:
+                    result = await call()
+            except Exception as e:
+                if not is_transient(e):
+                    # The database answered, the query itself was rejected
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if not read or attempt >= self._max_attempts or breaker.state != "closed" or not self.budget.try_withdraw():
+                    raise
+
+                delay = decorrelated_jitter(delay)
+                logger.warning(f"Read on {table} failed (attempt {attempt}), retrying in {delay * 1000:.0f} ms: {e}")
+                await asyncio.sleep(delay)
+                if breaker.state == "open":
+                    # Other requests opened the circuit meanwhile
+                    raise
+                self.retries += 1
+                attempt += 1
+                continue
+
+            breaker.record_success()
+            return result
+
+    async def _hedged(self, call: Callable[[], Awaitable[Any]], hedge_after: float) -> Any:
+        """Send a backup request if the first one is slow, and return whichever succeeds first"""
+        primary = asyncio.ensure_future(call())
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done or not self.budget.try_withdraw():
+            return await primary
+
+        self.hedges += 1
+        backup = asyncio.ensure_future(call())
+        pending = {primary, backup}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both failed, report the original request's error
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "retry_budget": self.budget.stats(),
+            "circuits": {
+                table: {"state": breaker.state, "rejected": breaker.rejected}
+                for table, breaker in self._breakers.items()
+            }
+        }
+
+
+async def hedged_reads():
+    """FastAPI dependency enabling hedged reads for a latency-sensitive endpoint"""
+    _hedge_after.set(DB_HEDGE_AFTER_MS / 1000)
+
+
+# Global resilience instances; the read replica has its own breakers but shares the retry budget
+db_resilience = DatabaseResilience()
+replica_resilience = DatabaseResilience(budget=db_resilience.budget)
@@ -0,0 +1,455 @@
+"""
+In-process fake of the Supabase AsyncClient for offline tests, benchmarks and profiling.
+
+Covers the part of the PostgREST query builder the app uses: table, select
+with embedded relations, eq, neq, in_, is_, gt, gte, lt, lte, contains, order,
+range, limit, insert, update, upsert, delete and rpc. Every execute() can
+wait an injected latency, so the app behaves as if the database were a
+network hop away.
+"""
+
+import asyncio
+import copy
+import uuid
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from postgrest.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+# (table, column, referenced table) of the foreign keys embeds are resolved through,
+# named {table}_{column}_fkey like the constraints PostgREST hints refer to
+FOREIGN_KEYS = [
+    ("pets", "owner_id", "users"),
+    ("caregiver_profiles", "user_id", "users"),
+    ("caregiver_services", "caregiver_id", "caregiver_profiles"),
+    ("bookings", "pet_owner_id", "users"),
+    ("bookings", "caregiver_id", "caregiver_profiles"),
+    ("bookings", "pet_id", "pets"),
+    ("bookings", "service_id", "caregiver_services"),
+    ("reviews", "booking_id", "bookings"),
+    ("reviews", "reviewer_id", "users"),
+    ("reviews", "reviewee_id", "users"),
+    ("reviews", "caregiver_id", "caregiver_profiles"),
+    ("messages", "booking_id", "bookings"),
+    ("messages", "sender_id", "users"),
+    ("messages", "receiver_id", "users"),
+    ("verification_tokens", "user_id", "users"),
+    ("id_verifications", "user_id", "users"),
+    ("oauth_sessions", "user_id", "users"),
+    ("refresh_tokens", "user_id", "users"),
+    ("user_favorites", "user_id", "users"),
+]
+
+# Seconds one call waits, or a function of its table and operation returning them
+Latency = Union[float, Callable[[str, str], float]]
+
+# Most recent calls kept in FakeAsyncClient.calls
+FAKE_MAX_CALLS = 10_000
+
+
+class FakeResponse:
+    """Result of execute(), shaped like postgrest's APIResponse"""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class Embed:
+    """One embedded resource of a select, e.g. users!caregiver_profiles_user_id_fkey!inner(first_name)"""
+
+    def __init__(self, name: str, hints: List[str], columns: "SelectList"):
+        self.name = name
+        self.inner = "inner" in hints
+        self.constraint = next((hint for hint in hints if hint not in ("inner", "left")), None)
+        self.columns = columns
+
+
+class SelectList:
+    """Parsed select string: plain columns, * and embeds"""
+
+    def __init__(self, columns: List[str], embeds: List[Embed]):
+        self.columns = columns
+        self.embeds = embeds
+
+    @classmethod
+    def parse(cls, select: str) -> "SelectList":
+        columns: List[str] = []
+        embeds: List[Embed] = []
+        for item in _split_top_level(" ".join(select.split())):
+            item = item.strip()
+            if not item:
+                continue
+            if "(" in item:
+                head, body = item.split("(", 1)
+                name, *hints = head.strip().split("!")
+                embeds.append(Embed(name, hints, cls.parse(body.rsplit(")", 1)[0])))
+            else:
+                columns.append(item)
+        return cls(columns, embeds)
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, start = [], 0, 0
+    for position, char in enumerate(text):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:position])
+            start = position + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _text(value: Any) -> str:
+    """Value as PostgREST compares it in a filter"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _ordered(value: Any, other: Any) -> Tuple[Any, Any]:
+    """Both values as numbers when they are numeric, as text otherwise"""
+    try:
+        return float(value), float(other)
+    except (TypeError, ValueError):
+        return _text(value), _text(other)
+
+
+def _contains(value: Any, expected: Any) -> bool:
+    if isinstance(value, dict) and isinstance(expected, dict):
+        return all(key in value and value[key] == item for key, item in expected.items())
+    if isinstance(value, (list, tuple)):
+        return all(item in value or _text(item) in map(_text, value) for item in expected)
+    return False
+
+
+FILTERS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda value, expected: value is not None and _text(value) == _text(expected),
+    "neq": lambda value, expected: value is not None and _text(value) != _text(expected),
+    "in": lambda value, expected: value is not None and _text(value) in {_text(item) for item in expected},
+    "gt": lambda value, expected: value is not None and _ordered(value, expected)[0] > _ordered(value, expected)[1],
+    "gte": lambda value, expected: value is not None and _ordered(value, expected)[0] >= _ordered(value, expected)[1],
+    "lt": lambda value, expected: value is not None and _ordered(value, expected)[0] < _ordered(value, expected)[1],
+    "lte": lambda value, expected: value is not None and _ordered(value, expected)[0] <= _ordered(value, expected)[1],
+    "contains": lambda value, expected: value is not None and _contains(value, expected),
+    "is": lambda value, expected: value is None if _text(expected) == "null" else _text(value) == _text(expected),
+}
+
+
+class FakeDatabase:
+    """Tables of rows kept in process memory, shared by every fake client built on it"""
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None, foreign_keys: Optional[List[Tuple[str, str, str]]] = None):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.foreign_keys = foreign_keys if foreign_keys is not None else FOREIGN_KEYS
+        self.rpcs: Dict[str, Callable[..., Any]] = {}
+        # (table, column) -> rows by the column's text value, built on first lookup and dropped on writes
+        self._indexes: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def touch(self, table: str):
+        """Forget the indexes of a table whose rows were written"""
+        for key in [key for key in self._indexes if key[0] == table]:
+            del self._indexes[key]
+
+    def lookup(self, table: str, column: str, value: Any) -> List[Dict[str, Any]]:
+        """Rows whose column equals value, through an index instead of a scan of the table.
+
+        Rows must be written through insert or a client query, which drop the stale indexes.
+        """
+        index = self._indexes.get((table, column))
+        if index is None:
+            index = self._indexes[(table, column)] = {}
+            for row in self.rows(table):
+                if row.get(column) is not None:
+                    index.setdefault(_text(row[column]), []).append(row)
+        return index.get(_text(value), [])
+
+    def insert(self, table: str, rows: Union[Dict[str, Any], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Add rows with an id and timestamps filled in like the column defaults would"""
+        now = datetime.utcnow().isoformat()
+        inserted = []
+        for row in rows if isinstance(rows, list) else [rows]:
+            row = {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, **copy.deepcopy(row)}
+            self.rows(table).append(row)
+            inserted.append(row)
+        self.touch(table)
+        return inserted
+
+    def register_rpc(self, name: str, function: Callable[..., Any]):
+        """Serve db.rpc(name, params) with function(database, **params)"""
+        self.rpcs[name] = function
+
+    def _relation(self, table: str, embed: Embed) -> Tuple[str, str, bool]:
+        """Local column, remote column and whether the embed is a single row"""
+        for source, column, target in self.foreign_keys:
+            if embed.constraint and embed.constraint != f"{source}_{column}_fkey":
+                continue
+            if source == table and target == embed.name:
+                return column, "id", True
+            if source == embed.name and target == table:
+                return "id", column, False
+        raise APIError({
+            "code": "PGRST200",
+            "message": f"Could not find a relationship between '{table}' and '{embed.name}'",
+            "details": None,
+            "hint": None
+        })
+
+    def project(self, table: str, row: Dict[str, Any], select: SelectList, filters: List[Tuple[str, str, Any]]) -> Optional[Dict[str, Any]]:
+        """Selected columns and embeds of one row; None when an inner embed has no match"""
+        if "*" in select.columns:
+            result = copy.deepcopy(row)
+        else:
+            result = {}
+        for column in select.columns:
+            if column == "*":
+                continue
+            alias, _, name = column.rpartition(":")
+            result[alias or name] = copy.deepcopy(row.get(name))
+
+        for embed in select.embeds:
+            local, remote, single = self._relation(table, embed)
+            embed_filters = [
+                (path.split(".", 1)[1], operator, value)
+                for path, operator, value in filters if path.startswith(f"{embed.name}.")
+            ]
+            key = row.get(local)
+            related = []
+            for other in self.lookup(embed.name, remote, key) if key is not None else []:
+                if not all(FILTERS[operator](other.get(path), value) for path, operator, value in embed_filters if "." not in path):
+                    continue
+                projected = self.project(embed.name, other, embed.columns, embed_filters)
+                if projected is not None:
+                    related.append(projected)
+
+            if embed.inner and not related:
+                return None
+            result[embed.name] = (related[0] if related else None) if single else related
+        return result
+
+
+class FakeQuery:
+    """Chainable fake of a PostgREST request builder"""
+
+    def __init__(self, client: "FakeAsyncClient", table: str):
+        self._client = client
+        self._table = table
+        self._operation = "select"
+        self._select = SelectList(["*"], [])
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "FakeQuery":
+        if self._operation == "select":
+            self._select = SelectList.parse(",".join(columns) or "*")
+        self._count = count
+        return self
+
+    def insert(self, payload: Union[Dict[str, Any], List[Dict[str, Any]]], **kwargs) -> "FakeQuery":
+        self._operation, self._payload = "insert", payload
+        return self
+
+    def upsert(self, payload: Union[Dict[str, Any], List[Dict[str, Any]]], **kwargs) -> "FakeQuery":
+        self._operation, self._payload = "upsert", payload
+        return self
+
+    def update(self, payload: Dict[str, Any], **kwargs) -> "FakeQuery":
+        self._operation, self._payload = "update", payload
+        return self
+
+    def delete(self, **kwargs) -> "FakeQuery":
+        self._operation = "delete"
+        return self
+
+    def _filter(self, column: str, operator: str, value: Any) -> "FakeQuery":
+        self._filters.append((column, operator, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "neq", value)
+
+    def in_(self, column: str, values: List[Any]) -> "FakeQuery":
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "is", value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "lte", value)
+
+    def contains(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "contains", value)
+
+    def order(self, column: str, desc: bool = False, **kwargs) -> "FakeQuery":
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def limit(self, size: int) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        return all(
+            FILTERS[operator](row.get(column), value)
+            for column, operator, value in self._filters if "." not in column
+        )
+
+    def _run(self) -> FakeResponse:
+        database = self._client.database
+        if self._operation == "insert":
+            return FakeResponse(copy.deepcopy(database.insert(self._table, self._payload)))
+
+        if self._operation == "upsert":
+            rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            by_id = {_text(row.get("id")): row for row in database.rows(self._table)}
+            result = []
+            for row in rows:
+                existing = by_id.get(_text(row.get("id"))) if "id" in row else None
+                if existing is not None:
+                    existing.update(copy.deepcopy(row))
+                    result.append(copy.deepcopy(existing))
+                else:
+                    result.extend(copy.deepcopy(database.insert(self._table, row)))
+            database.touch(self._table)
+            return FakeResponse(result)
+
+        # An eq filter narrows the candidates through an index, the other filters check each of them
+        equal = next(((column, value) for column, operator, value in self._filters if operator == "eq" and "." not in column), None)
+        candidates = database.lookup(self._table, *equal) if equal else database.rows(self._table)
+        matched = [row for row in candidates if self._matches(row)]
+        if self._operation == "update":
+            for row in matched:
+                row.update(copy.deepcopy(self._payload))
+            database.touch(self._table)
+            return FakeResponse(copy.deepcopy(matched))
+        if self._operation == "delete":
+            removed = {id(row) for row in matched}
+            database.tables[self._table] = [row for row in database.rows(self._table) if id(row) not in removed]
+            database.touch(self._table)
+            return FakeResponse(copy.deepcopy(matched))
+
+        projected = []
+        for row in matched:
+            result = database.project(self._table, row, self._select, self._filters)
+            if result is not None:
+                projected.append(result)
+
+        # Stable sorts applied last key first give the multi-column order
+        for column, desc in reversed(self._order):
+            present = [row for row in projected if row.get(column) is not None]
+            missing = [row for row in projected if row.get(column) is None]
+            present.sort(key=lambda row: _ordered(row[column], row[column])[0], reverse=desc)
+            # PostgREST puts nulls last ascending and first descending
+            projected = missing + present if desc else present + missing
+
+        count = len(projected) if self._count else None
+        end = None if self._limit is None else self._offset + self._limit
+        return FakeResponse(projected[self._offset:end], count)
+
+    async def execute(self) -> FakeResponse:
+        await self._client.before_call(self._table, self._operation)
+        return self._run()
+
+
+class FakeRpc:
+    """Fake of a PostgREST RPC call served by a registered Python function"""
+
+    def __init__(self, client: "FakeAsyncClient", name: str, params: Dict[str, Any]):
+        self._client = client
+        self._name = name
+        self._params = params
+
+    async def execute(self) -> FakeResponse:
+        await self._client.before_call(self._name, "rpc")
+        function = self._client.database.rpcs.get(self._name)
+        if function is None:
+            raise APIError({
+                "code": "PGRST202",
+                "message": f"Could not find the function public.{self._name}",
+                "details": None,
+                "hint": None
+            })
+        return FakeResponse(function(self._client.database, **self._params))
+
+
+class FakeAsyncClient:
+    """Drop-in for the Supabase AsyncClient backed by a FakeDatabase.
+
+    latency is awaited before every call, either a fixed number of seconds
+    or a function of the table (or RPC name) and operation; calls lists
+    the latest (table, operation) executed, for assertions and profiling,
+    and call_count counts them all.
+    """
+
+    def __init__(self, database: Optional[FakeDatabase] = None, latency: Latency = 0.0, max_calls: int = FAKE_MAX_CALLS):
+        self.database = database or FakeDatabase()
+        self.latency = latency
+        self.calls: "deque[Tuple[str, str]]" = deque(maxlen=max_calls)
+        self.call_count = 0
+
+    async def before_call(self, table: str, operation: str):
+        self.calls.append((table, operation))
+        self.call_count += 1
+        delay = self.latency(table, operation) if callable(self.latency) else self.latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def table(self, table_name: str) -> FakeQuery:
+        return FakeQuery(self, table_name)
+
+    def from_(self, table_name: str) -> FakeQuery:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> FakeRpc:
+        return FakeRpc(self, fn, params or {})
+
+
+def install(app, client: FakeAsyncClient):
+    """Serve every database dependency of the app from the fake client.
+
+    The fake is wrapped in the same instrumentation as the real client, so
+    Server-Timing and the route histograms count its calls. Run the app
+    without its startup event, which would connect to the real database.
+    """
+    from database import get_db_client, get_read_db_client
+    from db_metrics import InstrumentedClient
+
+    instrumented = InstrumentedClient(client)
+
+    async def fake_db_client():
+        return instrumented
+
+    app.dependency_overrides[get_db_client] = fake_db_client
+    app.dependency_overrides[get_read_db_client] = fake_db_client
+    return instrumented
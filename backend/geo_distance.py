@@ -0,0 +1,106 @@
+"""
+Vectorized distance and filter evaluation for location search candidates
+"""
+
+from typing import Optional, Sequence, Tuple
+import numpy as np
+
+# Mean Earth radius (IUGG), keeps haversine within ~0.5% of the WGS-84 geodesic
+EARTH_RADIUS_KM = 6371.0088
+
+# WGS-84 ellipsoid used by the Lambert formula
+WGS84_A_KM = 6378.137
+WGS84_F = 1 / 298.257223563
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to every point in the arrays"""
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlng = np.radians(longitudes) - np.radians(longitude)
+
+    a = np.sin(dlat * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng * 0.5) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def lambert_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Ellipsoidal distance in km using Lambert's formula on WGS-84.
+
+    Stays within a few metres of the Vincenty/Karney geodesic at search
+    distances, while still being a single vectorized pass over the arrays.
+    """
+    beta1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(latitude)))
+    beta2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(latitudes)))
+    dlng = np.radians(longitudes) - np.radians(longitude)
+
+    # Central angle between the reduced latitudes
+    a = np.sin((beta2 - beta1) * 0.5) ** 2 + np.cos(beta1) * np.cos(beta2) * np.sin(dlng * 0.5) ** 2
+    sigma = 2.0 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    p = (beta1 + beta2) * 0.5
+    q = (beta2 - beta1) * 0.5
+    sin_sigma = np.sin(sigma)
+    cos_half = np.cos(sigma * 0.5) ** 2
+    sin_half = np.sin(sigma * 0.5) ** 2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = (sigma - sin_sigma) * np.sin(p) ** 2 * np.cos(q) ** 2 / cos_half
+        y = (sigma + sin_sigma) * np.cos(p) ** 2 * np.sin(q) ** 2 / sin_half
+    correction = np.where(sigma > 0, x + y, 0.0)
+
+    return WGS84_A_KM * (sigma - WGS84_F * 0.5 * correction)
+
+
+def candidate_mask(
+    distances: np.ndarray,
+    radius: float,
+    prices: Optional[np.ndarray] = None,
+    max_price: Optional[float] = None,
+    ratings: Optional[np.ndarray] = None,
+    min_rating: Optional[float] = None,
+    service_types: Optional[np.ndarray] = None,
+    service_type: Optional[str] = None
+) -> np.ndarray:
+    """Combine the radius and LocationSearch filters into one boolean mask"""
+    mask = distances <= radius
+    if max_price and prices is not None:
+        mask &= prices <= max_price
+    if min_rating and ratings is not None:
+        mask &= ratings >= min_rating
+    if service_type and service_types is not None:
+        mask &= service_types == service_type
+    return mask
+
+
+def filter_candidates(
+    latitude: float,
+    longitude: float,
+    radius: float,
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    prices: Optional[Sequence[float]] = None,
+    max_price: Optional[float] = None,
+    ratings: Optional[Sequence[float]] = None,
+    min_rating: Optional[float] = None,
+    service_types: Optional[Sequence[str]] = None,
+    service_type: Optional[str] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (indices, distances) of the candidates that pass every filter"""
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    distances = lambert_km(latitude, longitude, latitudes, longitudes)
+
+    mask = candidate_mask(
+        distances,
+        radius,
+        prices=np.asarray(prices, dtype=np.float64) if prices is not None else None,
+        max_price=max_price,
+        ratings=np.asarray(ratings, dtype=np.float64) if ratings is not None else None,
+        min_rating=min_rating,
+        service_types=np.asarray(service_types, dtype=object) if service_types is not None else None,
+        service_type=service_type
+    )
+
+    indices = np.flatnonzero(mask)
+    return indices, distances[indices]
@@ -0,0 +1,305 @@
+"""
+In-memory spatial index of active caregiver services for location search
+"""
+
+import asyncio
+import math
+import os
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from search_ranking import CaregiverFeatureStore
+from projections import SEARCH_CANDIDATE
+
+logger = logging.getLogger(__name__)
+
+# Grid configuration (0.05 degrees is roughly 5.5 km of latitude)
+GEO_INDEX_CELL_DEGREES = float(os.getenv("GEO_INDEX_CELL_DEGREES", 0.05))
+GEO_INDEX_REFRESH_SECONDS = int(os.getenv("GEO_INDEX_REFRESH_SECONDS", 300))
+
+# Rows read per request when an index loads, at most the PostgREST max-rows setting (1000 on Supabase)
+INDEX_LOAD_PAGE_SIZE = int(os.getenv("INDEX_LOAD_PAGE_SIZE", 1000))
+
+KM_PER_DEGREE_LAT = 111.32
+
+Cell = Tuple[int, int]
+
+
+async def fetch_all(build_query: Callable[[], Any], page_size: int = INDEX_LOAD_PAGE_SIZE) -> List[Dict]:
+    """Every row of a query, read in pages ordered by id.
+
+    A single select is cut at the server's max-rows without an error, so the
+    query is rebuilt for each page and continues after the last id seen until
+    a page comes back short.
+    """
+    rows: List[Dict] = []
+    last_id = None
+    while True:
+        query = build_query().order("id").limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = (await query.execute()).data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        last_id = page[-1]["id"]
+
+
+class CaregiverGeoIndex:
+    """Uniform lat/lng grid over caregiver services.
+
+    Each entry keeps the service, profile and user rows exactly as search
+    returns them, so a radius query only touches the cells overlapping the
+    search circle and never goes back to the database.
+    """
+
+    def __init__(self, cell_degrees: float = GEO_INDEX_CELL_DEGREES, refresh_seconds: int = GEO_INDEX_REFRESH_SECONDS):
+        self._cell_degrees = cell_degrees
+        self._refresh_seconds = refresh_seconds
+        self._cells: Dict[Cell, Set[str]] = {}
+        self._entries: Dict[str, Dict] = {}
+        self._by_caregiver: Dict[str, Set[str]] = {}
+        # Per-cell caregiver aggregates for map clustering: services per caregiver and [count, sum_lat, sum_lng]
+        self._cell_caregivers: Dict[Cell, Dict[str, int]] = {}
+        self._cell_totals: Dict[Cell, List[float]] = {}
+        self.features = CaregiverFeatureStore()
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell_for(self, latitude: float, longitude: float) -> Cell:
+        return (
+            math.floor(latitude / self._cell_degrees),
+            math.floor(longitude / self._cell_degrees)
+        )
+
+    def _is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at > self._refresh_seconds
+
+    async def ensure_loaded(self, db):
+        """Build the index on first use and rebuild it once it is older than the refresh interval"""
+        if not self._is_stale():
+            return
+
+        async with self._lock:
+            if not self._is_stale():
+                return
+            await self.load(db)
+
+    async def load(self, db):
+        """Rebuild the whole index from the active services"""
+        services = await fetch_all(
+            lambda: db.table("caregiver_services").select(SEARCH_CANDIDATE).eq("is_active", True)
+        )
+
+        self._cells = {}
+        self._entries = {}
+        self._by_caregiver = {}
+        self._cell_caregivers = {}
+        self._cell_totals = {}
+        self.features.clear()
+        for service in services:
+            self._upsert_row(service)
+
+        self._loaded_at = time.monotonic()
+        logger.info(f"Caregiver geo index loaded with {len(self._entries)} services")
+
+    async def refresh_caregiver(self, db, caregiver_id: Optional[str] = None, user_id: Optional[str] = None) -> Optional[List[Tuple[float, float]]]:
+        """Re-read every service of one caregiver after a write to its services, profile or user.
+
+        Returns the old and new locations of the affected services, or None
+        when the index has not been loaded yet.
+        """
+        if self._loaded_at is None:
+            # Nothing to keep in sync yet, the first search will load everything
+            return None
+
+        query = db.table("caregiver_services").select(SEARCH_CANDIDATE)
+        if caregiver_id:
+            query = query.eq("caregiver_id", caregiver_id)
+        elif user_id:
+            query = query.eq("caregiver_profiles.user_id", user_id)
+        else:
+            raise ValueError("caregiver_id or user_id is required")
+
+        result = await query.execute()
+        rows = result.data or []
+
+        stale_ids: Set[str] = set()
+        if caregiver_id:
+            stale_ids |= self._by_caregiver.get(caregiver_id, set())
+        for row in rows:
+            stale_ids |= self._by_caregiver.get(row["caregiver_id"], set())
+        locations = []
+        for service_id in list(stale_ids):
+            entry = self._entries.get(service_id)
+            if entry:
+                locations.append((entry["latitude"], entry["longitude"]))
+            self.remove_service(service_id)
+
+        for row in rows:
+            entry = self._upsert_row(row)
+            if entry:
+                locations.append((entry["latitude"], entry["longitude"]))
+        return locations
+
+    def _upsert_row(self, row: Dict) -> Optional[Dict]:
+        service = dict(row)
+        profile = dict(service.pop("caregiver_profiles", None) or {})
+        caregiver = profile.pop("users", None)
+        if not profile or not caregiver:
+            return None
+        return self.upsert(service, profile, caregiver)
+
+    def upsert(self, service: Dict, profile: Dict, caregiver: Dict) -> Optional[Dict]:
+        """Insert or move one service; inactive or unlocated services are dropped"""
+        service_id = service["id"]
+        self.remove_service(service_id)
+
+        if not service.get("is_active", True):
+            return None
+        latitude = caregiver.get("latitude")
+        longitude = caregiver.get("longitude")
+        if not latitude or not longitude:
+            return None
+
+        cell = self._cell_for(latitude, longitude)
+        entry = self._entries[service_id] = {
+            "service": service,
+            "profile": profile,
+            "caregiver": caregiver,
+            "latitude": float(latitude),
+            "longitude": float(longitude),
+            "cell": cell,
+            "row": self.features.upsert(
+                service_id, float(latitude), float(longitude),
+                float(service.get("base_price") or 0),
+                float(profile.get("rating") or 0),
+                int(profile.get("total_reviews") or 0)
+            )
+        }
+        self._cells.setdefault(cell, set()).add(service_id)
+        self._by_caregiver.setdefault(service["caregiver_id"], set()).add(service_id)
+
+        caregiver_refs = self._cell_caregivers.setdefault(cell, {})
+        caregiver_id = service["caregiver_id"]
+        caregiver_refs[caregiver_id] = caregiver_refs.get(caregiver_id, 0) + 1
+        if caregiver_refs[caregiver_id] == 1:
+            totals = self._cell_totals.setdefault(cell, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += entry["latitude"]
+            totals[2] += entry["longitude"]
+        return entry
+
+    def remove_service(self, service_id: str):
+        entry = self._entries.pop(service_id, None)
+        if not entry:
+            return
+        self.features.remove(service_id)
+
+        cell_members = self._cells.get(entry["cell"])
+        if cell_members is not None:
+            cell_members.discard(service_id)
+            if not cell_members:
+                del self._cells[entry["cell"]]
+
+        caregiver_id = entry["service"]["caregiver_id"]
+        caregiver_services = self._by_caregiver.get(caregiver_id)
+        if caregiver_services is not None:
+            caregiver_services.discard(service_id)
+            if not caregiver_services:
+                del self._by_caregiver[caregiver_id]
+
+        caregiver_refs = self._cell_caregivers.get(entry["cell"], {})
+        if caregiver_id in caregiver_refs:
+            caregiver_refs[caregiver_id] -= 1
+            if caregiver_refs[caregiver_id] == 0:
+                del caregiver_refs[caregiver_id]
+                totals = self._cell_totals[entry["cell"]]
+                totals[0] -= 1
+                totals[1] -= entry["latitude"]
+                totals[2] -= entry["longitude"]
+            if not caregiver_refs:
+                del self._cell_caregivers[entry["cell"]]
+                del self._cell_totals[entry["cell"]]
+
+    def _cells_in_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Cell]:
+        lat_delta = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+        lng_delta = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+
+        return self._cells_in_box(
+            latitude - lat_delta, longitude - lng_delta,
+            latitude + lat_delta, longitude + lng_delta
+        )
+
+    def _cells_in_box(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[Cell]:
+        min_row, min_col = self._cell_for(min_lat, min_lng)
+        max_row, max_col = self._cell_for(max_lat, max_lng)
+
+        # For very large radii walking the occupied cells is cheaper than the bounding box
+        box_size = (max_row - min_row + 1) * (max_col - min_col + 1)
+        if box_size > len(self._cells):
+            return [
+                cell for cell in self._cells
+                if min_row <= cell[0] <= max_row and min_col <= cell[1] <= max_col
+            ]
+
+        return [
+            (row, col)
+            for row in range(min_row, max_row + 1)
+            for col in range(min_col, max_col + 1)
+            if (row, col) in self._cells
+        ]
+
+    def query_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Dict]:
+        """Return the entries in the grid cells overlapping the search circle.
+
+        This is a superset of the exact result; callers still compute the
+        precise distance for each candidate.
+        """
+        candidates = []
+        for cell in self._cells_in_radius(latitude, longitude, radius_km):
+            for service_id in self._cells[cell]:
+                candidates.append(self._entries[service_id])
+        return candidates
+
+    def caregiver_locations(self, caregiver_id: str) -> Optional[List[Tuple[float, float]]]:
+        """Locations of one caregiver's services, or None when the index has not been loaded yet"""
+        if self._loaded_at is None:
+            return None
+        return [
+            (self._entries[service_id]["latitude"], self._entries[service_id]["longitude"])
+            for service_id in self._by_caregiver.get(caregiver_id, set())
+        ]
+
+    @property
+    def cell_degrees(self) -> float:
+        return self._cell_degrees
+
+    def cell_aggregates_in_box(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[Tuple[int, float, float]]:
+        """(caregiver count, centroid lat, centroid lng) for every occupied cell overlapping the box"""
+        aggregates = []
+        for cell in self._cells_in_box(min_lat, min_lng, max_lat, max_lng):
+            count, sum_lat, sum_lng = self._cell_totals[cell]
+            if count > 0:
+                aggregates.append((int(count), sum_lat / count, sum_lng / count))
+        return aggregates
+
+    def caregivers_in_box(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[List[Dict]]:
+        """Entries inside the box, grouped per caregiver"""
+        grouped: Dict[str, List[Dict]] = {}
+        for cell in self._cells_in_box(min_lat, min_lng, max_lat, max_lng):
+            for service_id in self._cells[cell]:
+                entry = self._entries[service_id]
+                if min_lat <= entry["latitude"] <= max_lat and min_lng <= entry["longitude"] <= max_lng:
+                    grouped.setdefault(entry["service"]["caregiver_id"], []).append(entry)
+        return list(grouped.values())
+
+
+# Global index instance
+caregiver_geo_index = CaregiverGeoIndex()
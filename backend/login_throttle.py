@@ -0,0 +1,149 @@
+"""
+In-memory sliding-window limits on login attempts per client IP and per email, checked before bcrypt runs
+"""
+
+import os
+import math
+import time
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+from fastapi import HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+# Attempts allowed per window, 0 disables the limit: one client IP may try many accounts, one account is tried from anywhere
+LOGIN_THROTTLE_IP_ATTEMPTS = int(os.getenv("LOGIN_THROTTLE_IP_ATTEMPTS", 20))
+LOGIN_THROTTLE_IP_WINDOW = float(os.getenv("LOGIN_THROTTLE_IP_WINDOW", 60))
+LOGIN_THROTTLE_EMAIL_ATTEMPTS = int(os.getenv("LOGIN_THROTTLE_EMAIL_ATTEMPTS", 5))
+LOGIN_THROTTLE_EMAIL_WINDOW = float(os.getenv("LOGIN_THROTTLE_EMAIL_WINDOW", 300))
+
+# IPs and emails tracked at once, the least recently seen are forgotten first
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", 50_000))
+
+# Take the client IP from the last X-Forwarded-For entry, only when a trusted proxy sets it
+LOGIN_THROTTLE_TRUST_FORWARDED = os.getenv("LOGIN_THROTTLE_TRUST_FORWARDED", "false").lower() == "true"
+
+
+class LoginThrottled(HTTPException):
+    """Raised before the user is read or the password checked"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=429,
+            detail="Too many login attempts, please retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+def client_ip(request: Request) -> str:
+    if LOGIN_THROTTLE_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class SlidingWindow:
+    """Times of the latest attempts of each key, at most `limit` per key.
+
+    An attempt is allowed while fewer than `limit` attempts fall within the
+    last `window` seconds; refused attempts are not recorded, so a client that
+    backs off for Retry-After seconds gets in. Keys are evicted least recently
+    used first once `max_keys` are tracked, which bounds memory under a flood
+    of distinct IPs or emails.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = LOGIN_THROTTLE_MAX_KEYS):
+        self._limit = limit
+        self._window = window
+        self._max_keys = max_keys
+        self._attempts: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self.evictions = 0
+
+    def retry_after(self, key: str, now: float) -> float:
+        """Seconds until `key` may try again, 0 if it may now"""
+        attempts = self._attempts.get(key)
+        if self._limit <= 0 or attempts is None or len(attempts) < self._limit:
+            return 0.0
+        return max(attempts[0] + self._window - now, 0.0)
+
+    def record(self, key: str, now: float):
+        if self._limit <= 0:
+            return
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            attempts = self._attempts[key] = deque(maxlen=self._limit)
+            while len(self._attempts) > self._max_keys:
+                self._attempts.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._attempts.move_to_end(key)
+        attempts.append(now)
+
+    def forget(self, key: str):
+        self._attempts.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._attempts)
+
+
+class LoginThrottle:
+    """Per-IP and per-email attempt limits for /api/auth/login.
+
+    A credential-stuffing burst would otherwise queue a bcrypt check for every
+    attempt and take CPU from every other endpoint. A successful login clears
+    the email's attempts, so a user who mistypes a few times is not locked out
+    after getting in.
+    """
+
+    def __init__(
+        self,
+        ip_attempts: int = LOGIN_THROTTLE_IP_ATTEMPTS,
+        ip_window: float = LOGIN_THROTTLE_IP_WINDOW,
+        email_attempts: int = LOGIN_THROTTLE_EMAIL_ATTEMPTS,
+        email_window: float = LOGIN_THROTTLE_EMAIL_WINDOW,
+        max_keys: int = LOGIN_THROTTLE_MAX_KEYS
+    ):
+        self._by_ip = SlidingWindow(ip_attempts, ip_window, max_keys)
+        self._by_email = SlidingWindow(email_attempts, email_window, max_keys)
+        self.allowed = 0
+        self.throttled_ip = 0
+        self.throttled_email = 0
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return email.strip().lower()
+
+    def check(self, ip: str, email: str, now: Optional[float] = None):
+        """Record an attempt, or raise LoginThrottled without recording it if either limit is reached"""
+        now = time.monotonic() if now is None else now
+        email = self._email_key(email)
+        waits = (self._by_ip.retry_after(ip, now), self._by_email.retry_after(email, now))
+        if any(waits):
+            if waits[0]:
+                self.throttled_ip += 1
+            else:
+                self.throttled_email += 1
+            raise LoginThrottled(max(math.ceil(max(waits)), 1))
+
+        self._by_ip.record(ip, now)
+        self._by_email.record(email, now)
+        self.allowed += 1
+
+    def succeeded(self, email: str):
+        self._by_email.forget(self._email_key(email))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_ips": len(self._by_ip),
+            "tracked_emails": len(self._by_email),
+            "evictions": self._by_ip.evictions + self._by_email.evictions,
+            "allowed": self.allowed,
+            "throttled_ip": self.throttled_ip,
+            "throttled_email": self.throttled_email
+        }
+
+
+# Global login throttle instance
+login_throttle = LoginThrottle()
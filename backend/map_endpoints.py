@@ -0,0 +1,103 @@
+# backend/map_endpoints.py
+"""
+Map viewport API endpoints with server-side caregiver clustering
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, List, Tuple
+import math
+import os
+import logging
+from database import get_read_db_client
+from db_resilience import hedged_reads
+from geo_index import caregiver_geo_index
+
+logger = logging.getLogger(__name__)
+
+# Roughly this many cluster cells across one 256px map tile
+MAP_CLUSTER_CELLS_PER_TILE = int(os.getenv("MAP_CLUSTER_CELLS_PER_TILE", 4))
+# From this zoom on the viewport lists individual caregivers instead of clusters
+MAP_INDIVIDUAL_MIN_ZOOM = int(os.getenv("MAP_INDIVIDUAL_MIN_ZOOM", 14))
+MAP_MAX_INDIVIDUAL_MARKERS = int(os.getenv("MAP_MAX_INDIVIDUAL_MARKERS", 500))
+
+COORDINATE_DECIMALS = 5
+
+map_router = APIRouter(prefix="/api/map", tags=["map"])
+
+
+def cluster_cell_degrees(zoom: int) -> float:
+    """Cluster cell size for a zoom level, never finer than the index grid"""
+    tile_degrees = 360.0 / (2 ** zoom)
+    return max(tile_degrees / MAP_CLUSTER_CELLS_PER_TILE, caregiver_geo_index.cell_degrees)
+
+
+def build_clusters(aggregates: List[Tuple[int, float, float]], cell_degrees: float) -> List[Dict]:
+    """Merge precomputed grid cell aggregates into cluster cells of the given size"""
+    merged: Dict[Tuple[int, int], List[float]] = {}
+    for count, latitude, longitude in aggregates:
+        cell = (math.floor(latitude / cell_degrees), math.floor(longitude / cell_degrees))
+        totals = merged.setdefault(cell, [0, 0.0, 0.0])
+        totals[0] += count
+        totals[1] += latitude * count
+        totals[2] += longitude * count
+
+    return [
+        {
+            "lat": round(sum_lat / count, COORDINATE_DECIMALS),
+            "lng": round(sum_lng / count, COORDINATE_DECIMALS),
+            "count": int(count)
+        }
+        for count, sum_lat, sum_lng in merged.values()
+    ]
+
+
+def build_markers(grouped_entries: List[List[Dict]]) -> List[Dict]:
+    """One minimal marker per caregiver, with the cheapest of its services"""
+    markers = []
+    for entries in grouped_entries:
+        first = entries[0]
+        markers.append({
+            "id": first["service"]["caregiver_id"],
+            "lat": round(first["latitude"], COORDINATE_DECIMALS),
+            "lng": round(first["longitude"], COORDINATE_DECIMALS),
+            "min_price": min(float(entry["service"]["base_price"]) for entry in entries),
+            "rating": float(first["profile"].get("rating") or 0)
+        })
+    return markers
+
+
+@map_router.get("/caregivers", dependencies=[Depends(hedged_reads)])
+async def get_map_caregivers(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22),
+    db = Depends(get_read_db_client)
+):
+    """Get clustered caregiver markers for a map viewport"""
+    try:
+        if min_lat >= max_lat or min_lng >= max_lng:
+            raise HTTPException(status_code=400, detail="Invalid bounding box")
+
+        await caregiver_geo_index.ensure_loaded(db)
+
+        if zoom >= MAP_INDIVIDUAL_MIN_ZOOM:
+            grouped = caregiver_geo_index.caregivers_in_box(min_lat, min_lng, max_lat, max_lng)
+            if len(grouped) <= MAP_MAX_INDIVIDUAL_MARKERS:
+                return {"zoom": zoom, "clusters": [], "caregivers": build_markers(grouped)}
+
+        aggregates = caregiver_geo_index.cell_aggregates_in_box(min_lat, min_lng, max_lat, max_lng)
+        # Index cells on the viewport edge may have their centroid just outside it
+        aggregates = [
+            aggregate for aggregate in aggregates
+            if min_lat <= aggregate[1] <= max_lat and min_lng <= aggregate[2] <= max_lng
+        ]
+        clusters = build_clusters(aggregates, cluster_cell_degrees(zoom))
+        return {"zoom": zoom, "clusters": clusters, "caregivers": []}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Map caregivers error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load map caregivers")
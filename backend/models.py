@@ -40,6 +40,10 @@ class ServiceType(str, Enum):
     VET_TRANSPORT = "vet_transport"
     CUSTOM = "custom"
 
+class SearchSort(str, Enum):
+    RELEVANCE = "relevance"
+    DISTANCE = "distance"
+
 # Base models
 class BaseModelWithTimestamps(BaseModel):
     id: Optional[uuid.UUID] = None
@@ -313,6 +317,31 @@ class LocationSearch(BaseModel):
     service_type: Optional[ServiceType] = None
     min_rating: Optional[float] = None
     max_price: Optional[float] = None
+    limit: int = Field(default=50, ge=1, le=100)
+    cursor: Optional[str] = None  # X-Next-Cursor header from the previous page
+    sort: SearchSort = SearchSort.DISTANCE  # relevance ranking is opt-in
+    start_datetime: Optional[datetime] = None  # only caregivers free for the whole window
+    end_datetime: Optional[datetime] = None
+
+    @validator('end_datetime', always=True)
+    def validate_availability_window(cls, v, values):
+        start = values.get('start_datetime')
+        if (start is None) != (v is None):
+            raise ValueError('start_datetime and end_datetime must be given together')
+        if v is not None and v <= start:
+            raise ValueError('End datetime must be after start datetime')
+        return v
+
+class KeywordSearch(BaseModel):
+    query: str = Field(..., min_length=2, max_length=200)  # websearch syntax, e.g. "large dogs" medication
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    radius: Optional[float] = None  # kilometers, needs latitude and longitude
+    service_type: Optional[ServiceType] = None
+    min_rating: Optional[float] = None
+    max_price: Optional[float] = None
+    limit: int = Field(default=20, ge=1, le=100)
+    cursor: Optional[str] = None  # X-Next-Cursor header from the previous page
 
 # Pagination models
 class PaginationParams(BaseModel):
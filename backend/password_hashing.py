@@ -0,0 +1,94 @@
+"""
+Bounded worker pool running bcrypt off the event loop, refusing work when its queue is full
+"""
+
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from fastapi import HTTPException
+from auth import AuthService
+
+logger = logging.getLogger(__name__)
+
+# Threads hashing and verifying passwords; bcrypt releases the GIL, so they use one core each
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(os.cpu_count() or 1, 4)))
+# Calls allowed to wait for a free worker, any more are refused with 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 1))
+
+
+class PasswordHashingOverloaded(HTTPException):
+    """Raised without hashing when every worker is busy and the queue is full"""
+
+    def __init__(self, retry_after: int = PASSWORD_HASH_RETRY_AFTER):
+        super().__init__(
+            status_code=503,
+            detail="Too many sign-ins in progress, please retry shortly",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class PasswordHasher:
+    """bcrypt on a fixed number of threads with a bounded queue in front of them.
+
+    Each hash or check takes a few hundred milliseconds of CPU; run on the event
+    loop it would stall every other request of the worker. A call holds its slot
+    until its thread finishes, even if the request awaiting it was cancelled, so
+    the queue depth counts the work the pool really has.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self._workers = workers
+        self._max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self.calls = 0
+        self.rejected = 0
+        self.peak_pending = 0
+
+    @property
+    def queued(self) -> int:
+        return max(self._pending - self._workers, 0)
+
+    def _release(self):
+        self._pending -= 1
+
+    async def _run(self, function: Callable[..., Any], *args) -> Any:
+        if self._pending >= self._workers + self._max_queue:
+            self.rejected += 1
+            logger.warning(f"Password hashing overloaded: {self._pending} calls pending, refusing")
+            raise PasswordHashingOverloaded()
+
+        loop = asyncio.get_running_loop()
+        self.calls += 1
+        self._pending += 1
+        self.peak_pending = max(self.peak_pending, self._pending)
+        future = self._executor.submit(function, *args)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(AuthService.verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(AuthService.get_password_hash, password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self._workers,
+            "max_queue": self._max_queue,
+            "pending": self._pending,
+            "queued": self.queued,
+            "peak_pending": self.peak_pending,
+            "calls": self.calls,
+            "rejected": self.rejected
+        }
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher()
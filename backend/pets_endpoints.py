@@ -7,9 +7,10 @@ from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
 from typing import List, Optional
 import uuid
 import logging
-from database import get_db_client
+from database import get_db_client, get_read_db_client, get_request_loaders, get_read_request_loaders, RequestLoaders
 from auth import get_current_user
 from models import PetCreate, PetUpdate, PetResponse
+from projections import BOOKING_FOR_PET, BOOKING_PET_SERVICE, BOOKING_SERVICE_NOTES, BOOKING_STATUS, ID, PET, PET_IMAGES, PET_NAME_ONLY
 import json
 from datetime import datetime
 import cloudinary.uploader
@@ -18,6 +19,13 @@ logger = logging.getLogger(__name__)
 
 pets_router = APIRouter(prefix="/api/pets", tags=["pets"])
 
+async def load_owned_pet(loaders: RequestLoaders, pet_id: uuid.UUID, user_id: str) -> dict:
+    """Get a pet row, 404 unless it belongs to the user"""
+    pet_data = await loaders.load("pets", pet_id)
+    if not pet_data or pet_data["owner_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Pet not found")
+    return pet_data
+
 @pets_router.get("/", response_model=List[PetResponse])
 async def get_user_pets(
     current_user: dict = Depends(get_current_user),
@@ -28,7 +36,7 @@ async def get_user_pets(
     try:
         user_id = current_user["user_id"]
         
-        query = db.table("pets").select("*").eq("owner_id", user_id)
+        query = db.table("pets").select(PET).eq("owner_id", user_id)
         
         if active_only:
             query = query.eq("is_active", True)
@@ -82,18 +90,13 @@ async def get_user_pets(
 async def get_pet_by_id(
     pet_id: uuid.UUID,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_db_client)
+    loaders: RequestLoaders = Depends(get_request_loaders)
 ):
     """Get a specific pet by ID"""
     try:
         user_id = current_user["user_id"]
         
-        result = await db.table("pets").select("*").eq("id", str(pet_id)).eq("owner_id", user_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Pet not found")
-        
-        pet_data = result.data[0]
+        pet_data = await load_owned_pet(loaders, pet_id, user_id)
         
         # Parse JSON fields
         try:
@@ -257,7 +260,7 @@ async def update_pet(
         user_id = current_user["user_id"]
         
         # Check if pet exists and belongs to user
-        existing_result = await db.table("pets").select("*").eq("id", str(pet_id)).eq("owner_id", user_id).execute()
+        existing_result = await db.table("pets").select(ID).eq("id", str(pet_id)).eq("owner_id", user_id).execute()
         
         if not existing_result.data:
             raise HTTPException(status_code=404, detail="Pet not found")
@@ -338,7 +341,7 @@ async def delete_pet(
         user_id = current_user["user_id"]
         
         # Check if pet exists and belongs to user
-        existing_result = await db.table("pets").select("id, name").eq("id", str(pet_id)).eq("owner_id", user_id).execute()
+        existing_result = await db.table("pets").select(PET_NAME_ONLY).eq("id", str(pet_id)).eq("owner_id", user_id).execute()
         
         if not existing_result.data:
             raise HTTPException(status_code=404, detail="Pet not found")
@@ -346,7 +349,7 @@ async def delete_pet(
         pet_name = existing_result.data[0]["name"]
         
         # Check for active bookings
-        active_bookings = await db.table("bookings").select("id").contains("pet_ids", [str(pet_id)]).in_("booking_status", ["pending", "confirmed", "in_progress"]).execute()
+        active_bookings = await db.table("bookings").select(ID).contains("pet_ids", [str(pet_id)]).in_("booking_status", ["pending", "confirmed", "in_progress"]).execute()
         
         if active_bookings.data:
             raise HTTPException(
@@ -384,7 +387,7 @@ async def upload_pet_image(
         user_id = current_user["user_id"]
         
         # Check if pet exists and belongs to user
-        existing_result = await db.table("pets").select("id, images").eq("id", str(pet_id)).eq("owner_id", user_id).execute()
+        existing_result = await db.table("pets").select(PET_IMAGES).eq("id", str(pet_id)).eq("owner_id", user_id).execute()
         
         if not existing_result.data:
             raise HTTPException(status_code=404, detail="Pet not found")
@@ -441,7 +444,7 @@ async def delete_pet_image(
         user_id = current_user["user_id"]
         
         # Get current pet data
-        existing_result = await db.table("pets").select("id, images").eq("id", str(pet_id)).eq("owner_id", user_id).execute()
+        existing_result = await db.table("pets").select(PET_IMAGES).eq("id", str(pet_id)).eq("owner_id", user_id).execute()
         
         if not existing_result.data:
             raise HTTPException(status_code=404, detail="Pet not found")
@@ -480,7 +483,8 @@ async def delete_pet_image(
 async def get_pet_bookings(
     pet_id: uuid.UUID,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_db_client),
+    db = Depends(get_read_db_client),
+    loaders: RequestLoaders = Depends(get_read_request_loaders),
     status_filter: Optional[str] = None
 ):
     """Get all bookings for a specific pet"""
@@ -488,17 +492,10 @@ async def get_pet_bookings(
         user_id = current_user["user_id"]
         
         # Verify pet ownership
-        pet_result = await db.table("pets").select("id, name").eq("id", str(pet_id)).eq("owner_id", user_id).execute()
-        
-        if not pet_result.data:
-            raise HTTPException(status_code=404, detail="Pet not found")
+        await load_owned_pet(loaders, pet_id, user_id)
         
         # Build query
-        query = db.table("bookings").select("""
-            *,
-            caregiver_profiles!inner(*, users!caregiver_profiles_user_id_fkey(first_name, last_name, profile_image_url)),
-            caregiver_services(service_name, title, service_type)
-        """).contains("pet_ids", [str(pet_id)])
+        query = db.table("bookings").select(BOOKING_FOR_PET).contains("pet_ids", [str(pet_id)])
         
         if status_filter:
             query = query.eq("booking_status", status_filter)
@@ -520,19 +517,15 @@ async def get_pet_bookings(
 async def get_pet_medical_history(
     pet_id: uuid.UUID,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_db_client)
+    db = Depends(get_read_db_client),
+    loaders: RequestLoaders = Depends(get_read_request_loaders)
 ):
     """Get medical history for a pet"""
     try:
         user_id = current_user["user_id"]
         
         # Get pet with medical info
-        result = await db.table("pets").select("id, name, medical_info, vaccination_records").eq("id", str(pet_id)).eq("owner_id", user_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Pet not found")
-        
-        pet_data = result.data[0]
+        pet_data = await load_owned_pet(loaders, pet_id, user_id)
         
         # Parse medical information
         try:
@@ -544,7 +537,7 @@ async def get_pet_medical_history(
         
         # Get any medical-related booking notes
         medical_bookings = await db.table("bookings").select(
-            "id, start_datetime, special_requirements, service_notes"
+            BOOKING_SERVICE_NOTES
         ).contains("pet_ids", [str(pet_id)]).eq("booking_status", "completed").execute()
         
         medical_notes = []
@@ -574,22 +567,18 @@ async def get_pet_medical_history(
 async def get_pet_statistics(
     pet_id: uuid.UUID,
     current_user: dict = Depends(get_current_user),
-    db = Depends(get_db_client)
+    db = Depends(get_read_db_client),
+    loaders: RequestLoaders = Depends(get_read_request_loaders)
 ):
     """Get statistics for a specific pet"""
     try:
         user_id = current_user["user_id"]
         
         # Verify pet ownership
-        pet_result = await db.table("pets").select("id, name, created_at").eq("id", str(pet_id)).eq("owner_id", user_id).execute()
-        
-        if not pet_result.data:
-            raise HTTPException(status_code=404, detail="Pet not found")
-        
-        pet_data = pet_result.data[0]
+        pet_data = await load_owned_pet(loaders, pet_id, user_id)
         
         # Get booking statistics
-        bookings_result = await db.table("bookings").select("id, booking_status, total_amount").contains("pet_ids", [str(pet_id)]).execute()
+        bookings_result = await db.table("bookings").select(BOOKING_STATUS).contains("pet_ids", [str(pet_id)]).execute()
         bookings = bookings_result.data or []
         
         # Calculate stats
@@ -599,11 +588,11 @@ async def get_pet_statistics(
         
         # Get upcoming bookings
         current_time = datetime.utcnow().isoformat()
-        upcoming_result = await db.table("bookings").select("id").contains("pet_ids", [str(pet_id)]).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed"]).execute()
+        upcoming_result = await db.table("bookings").select(ID).contains("pet_ids", [str(pet_id)]).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed"]).execute()
         upcoming_bookings = len(upcoming_result.data or [])
         
         # Get favorite caregivers (most frequent)
-        completed_bookings_result = await db.table("bookings").select("caregiver_service_id").contains("pet_ids", [str(pet_id)]).eq("booking_status", "completed").execute()
+        completed_bookings_result = await db.table("bookings").select(BOOKING_PET_SERVICE).contains("pet_ids", [str(pet_id)]).eq("booking_status", "completed").execute()
         caregiver_frequency = {}
         for booking in (completed_bookings_result.data or []):
             service_id = booking.get("caregiver_service_id")
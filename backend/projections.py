@@ -0,0 +1,212 @@
+"""
+Column projections of every PostgREST query, one per use case.
+
+Handlers select one of these instead of "*", so each query only transfers
+and decodes the columns its response or logic needs. Every column must be
+a field of the projection's response model or be read by a module that
+selects it; tests/test_projections.py checks this against the handlers.
+"""
+
+from typing import Iterable, Optional, Type
+from pydantic import BaseModel
+from models import (
+    UserResponse, PetResponse, CaregiverProfileResponse, CaregiverServiceResponse,
+    BookingResponse, MessageResponse
+)
+
+
+class Projection(str):
+    """Select string of one use case, usable wherever .select() takes a column list"""
+
+    def __new__(
+        cls,
+        *columns: str,
+        embeds: Iterable[str] = (),
+        response: Optional[Type[BaseModel]] = None
+    ):
+        embeds = tuple(embeds)
+        projection = super().__new__(cls, ", ".join((*columns, *embeds)))
+        projection.columns = columns
+        projection.embeds = embeds
+        projection.response = response
+        projection.parts = ()
+        return projection
+
+    def __add__(self, other: "Projection") -> "Projection":
+        combined = Projection(
+            *dict.fromkeys((*self.columns, *other.columns)),
+            embeds=(*self.embeds, *other.embeds),
+            response=self.response or other.response
+        )
+        combined.parts = (self, other)
+        return combined
+
+
+class Embed(str):
+    """Embedded resource of a select, remembering the projection it selects"""
+
+    def __new__(cls, relation: str, projection: Projection):
+        embedded = super().__new__(cls, f"{relation}({projection})")
+        embedded.projection = projection
+        return embedded
+
+
+def embed(relation: str, projection: Projection) -> Embed:
+    """Embedded resource, e.g. embed("pets", PET_SUMMARY) -> "pets(name, species, breed)" """
+    return Embed(relation, projection)
+
+
+def model_columns(model: Type[BaseModel], exclude: Iterable[str] = ()) -> tuple:
+    excluded = set(exclude)
+    return tuple(name for name in model.model_fields if name not in excluded)
+
+
+# Users: password_hash is only ever read by login
+USER = Projection(*model_columns(UserResponse, exclude=("password_hash",)), response=UserResponse)
+USER_LOGIN = Projection("id", "user_type", "password_hash", "email_verified")
+USER_NAME_EMAIL = Projection("first_name", "email")
+USER_CONTACT = Projection("first_name", "last_name", "email", "phone")
+USER_CARD = Projection("first_name", "last_name", "profile_image_url")
+USER_FULL_NAME = Projection("first_name", "last_name")
+USER_FIRST_NAME = Projection("first_name")
+# Caregiver users shown in search results and on the map
+CAREGIVER_USER = Projection(
+    "id", "first_name", "last_name", "profile_image_url", "latitude", "longitude", "address",
+    response=UserResponse
+)
+
+# Existence, ownership and count checks
+ID = Projection("id")
+
+VERIFICATION_TOKEN = Projection("user_id", "expires_at")
+REFRESH_TOKEN = Projection("id", "user_id", "family_id", "expires_at", "revoked_at")
+ID_VERIFICATION_STATUS = Projection(
+    "verification_status", "document_type", "submitted_at", "verified_at", "admin_notes"
+)
+
+# Pets
+PET = Projection(*model_columns(PetResponse), response=PetResponse)
+PET_IMAGES = Projection("images")
+PET_SUMMARY = Projection("name", "species", "breed")
+PET_CARD = Projection("name", "species", "breed", "images")
+PET_NAME_BREED = Projection("name", "breed")
+PET_NAME_ONLY = Projection("name")
+
+# Caregiver profiles; id_verification_status is added by add_verification_tables.sql
+CAREGIVER_PROFILE = Projection(
+    *model_columns(CaregiverProfileResponse), "id_verification_status",
+    response=CaregiverProfileResponse
+)
+CAREGIVER_PROFILE_CARD = Projection(
+    "id", "user_id", "bio", "experience_years", "hourly_rate", "rating", "total_reviews",
+    "is_available", "background_check_verified",
+    response=CaregiverProfileResponse
+)
+CAREGIVER_PROFILE_OWNER = Projection("user_id")
+CAREGIVER_PROFILE_RATING = Projection("id", "rating", "total_reviews")
+CAREGIVER_SCHEDULE = Projection("id", "availability_schedule")
+
+# Caregiver services
+SERVICE = Projection(*model_columns(CaregiverServiceResponse), response=CaregiverServiceResponse)
+SERVICE_TITLE = Projection("title")
+SERVICE_SUMMARY = Projection("service_name", "title")
+SERVICE_CARD = Projection("service_name", "title", "service_type")
+
+# Bookings
+BOOKING = Projection(*model_columns(BookingResponse), response=BookingResponse)
+BOOKING_PARTIES = Projection("id", "pet_owner_id", "caregiver_id", "booking_status")
+BOOKING_AMOUNT = Projection("total_amount")
+BOOKING_CAREGIVER = Projection("caregiver_id")
+BOOKING_STATE = Projection("booking_status")
+BOOKING_STATUS = Projection("id", "booking_status", "total_amount")
+BOOKING_STATUS_START = Projection("booking_status", "start_datetime")
+BOOKING_EARNINGS = Projection("total_amount", "start_datetime")
+BOOKING_INTERVAL = Projection("id", "caregiver_id", "start_datetime", "end_datetime")
+# Columns of the live bookings table used by the pet endpoints
+BOOKING_PET_SERVICE = Projection("caregiver_service_id")
+BOOKING_SERVICE_NOTES = Projection("id", "start_datetime", "service_notes")
+
+# Booking lists as seen by the pet owner (with the caregiver) and by the caregiver (with the owner)
+BOOKING_FOR_OWNER = BOOKING + Projection(embeds=(
+    embed("caregiver_profiles!inner", CAREGIVER_PROFILE_CARD + Projection(
+        embeds=(embed("users!caregiver_profiles_user_id_fkey", USER_CARD),)
+    )),
+    embed("pets", PET_SUMMARY),
+    embed("caregiver_services", SERVICE_SUMMARY)
+))
+BOOKING_FOR_CAREGIVER = BOOKING + Projection(embeds=(
+    embed("users!bookings_pet_owner_id_fkey", USER_CARD),
+    embed("pets", PET_SUMMARY),
+    embed("caregiver_services", SERVICE_SUMMARY)
+))
+BOOKING_FILTERED_FOR_OWNER = BOOKING + Projection(embeds=(
+    embed("caregiver_profiles!inner", CAREGIVER_PROFILE_CARD + Projection(
+        embeds=(embed("users!caregiver_profiles_user_id_fkey", USER_CARD),)
+    )),
+    embed("pets", PET_CARD),
+    embed("caregiver_services", SERVICE_CARD)
+))
+BOOKING_FILTERED_FOR_CAREGIVER = BOOKING + Projection(embeds=(
+    embed("users!bookings_pet_owner_id_fkey", USER_CARD),
+    embed("pets", PET_CARD),
+    embed("caregiver_services", SERVICE_CARD)
+))
+BOOKING_FOR_PET = BOOKING + Projection(embeds=(
+    embed("caregiver_profiles!inner", CAREGIVER_PROFILE_CARD + Projection(
+        embeds=(embed("users!caregiver_profiles_user_id_fkey", USER_CARD),)
+    )),
+    embed("caregiver_services", SERVICE_CARD)
+))
+BOOKING_DETAILS = BOOKING + Projection(embeds=(
+    embed("users!bookings_pet_owner_id_fkey", USER_CONTACT),
+    embed("caregiver_profiles!inner", CAREGIVER_PROFILE_CARD + Projection(
+        embeds=(embed("users!caregiver_profiles_user_id_fkey", USER_CONTACT),)
+    )),
+    embed("pets", PET),
+    embed("caregiver_services", SERVICE)
+))
+
+# Bookings read by status changes: the caregiver's user id decides who may act
+BOOKING_WITH_CAREGIVER_USER = BOOKING + Projection(embeds=(
+    embed("caregiver_profiles!inner", CAREGIVER_PROFILE_OWNER),
+))
+BOOKING_STATUS_CHANGE = BOOKING_WITH_CAREGIVER_USER + Projection(embeds=(
+    embed("users!bookings_pet_owner_id_fkey", USER_FULL_NAME + Projection("email")),
+))
+BOOKING_CONFIRMATION = BOOKING + Projection(embeds=(
+    embed("users!bookings_pet_owner_id_fkey", USER_FULL_NAME + Projection("email")),
+    embed("caregiver_profiles!inner", CAREGIVER_PROFILE_OWNER + Projection(
+        embeds=(embed("users!caregiver_profiles_user_id_fkey", USER_FULL_NAME),)
+    )),
+    embed("caregiver_services", SERVICE_SUMMARY),
+    embed("pets", PET_NAME_BREED)
+))
+BOOKING_COMPLETION = BOOKING + Projection(embeds=(
+    embed("users!bookings_pet_owner_id_fkey", USER_NAME_EMAIL),
+    embed("caregiver_profiles!inner", CAREGIVER_PROFILE_OWNER + Projection(
+        embeds=(embed("users!caregiver_profiles_user_id_fkey", USER_FIRST_NAME),)
+    )),
+    embed("caregiver_services", SERVICE_TITLE),
+    embed("pets", PET_NAME_ONLY)
+))
+
+# Messages have no updated_at column
+MESSAGE = Projection(*model_columns(MessageResponse, exclude=("updated_at",)), response=MessageResponse)
+
+REVIEW_RATING = Projection("rating")
+
+# Location search candidates: a service with its caregiver's profile and public user fields
+SEARCH_CANDIDATE = SERVICE + Projection(embeds=(
+    embed("caregiver_profiles!inner", CAREGIVER_PROFILE_CARD + Projection(
+        embeds=(embed("users!caregiver_profiles_user_id_fkey!inner", CAREGIVER_USER),)
+    )),
+))
+
+# Rows kept by the DataLoaders and the row cache, shared by every handler reading them
+ROW_PROJECTIONS = {
+    "users": USER,
+    "pets": PET,
+    "caregiver_profiles": CAREGIVER_PROFILE,
+    "caregiver_services": SERVICE,
+    "bookings": BOOKING,
+}
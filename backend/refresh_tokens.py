@@ -0,0 +1,158 @@
+"""
+Rotating refresh tokens, exchanged for access tokens without a password check
+"""
+
+import os
+import time
+import uuid
+import secrets
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from projections import REFRESH_TOKEN
+
+logger = logging.getLogger(__name__)
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+
+# Cleanup of expired tokens: rows deleted per RPC call, calls per cleanup, and seconds between cleanups
+REFRESH_TOKEN_PURGE_BATCH = int(os.getenv("REFRESH_TOKEN_PURGE_BATCH", 500))
+REFRESH_TOKEN_PURGE_MAX_BATCHES = int(os.getenv("REFRESH_TOKEN_PURGE_MAX_BATCHES", 20))
+REFRESH_TOKEN_PURGE_SECONDS = float(os.getenv("REFRESH_TOKEN_PURGE_SECONDS", 3600))
+
+# Defined in add_refresh_tokens.sql
+PURGE_RPC = "delete_expired_refresh_tokens"
+
+
+def _invalid(detail: str = "Invalid refresh token") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+class RefreshTokenService:
+    """Issues refresh tokens and rotates them on every use.
+
+    Tokens are 256 random bits, so a SHA-256 digest is all the database keeps
+    and checking one costs microseconds instead of a bcrypt round. A refresh
+    consumes its token and issues the next one of the same family; a consumed
+    token presented again means it was copied, and the whole family is revoked.
+    """
+
+    def __init__(
+        self,
+        expire_days: int = REFRESH_TOKEN_EXPIRE_DAYS,
+        purge_batch: int = REFRESH_TOKEN_PURGE_BATCH,
+        purge_max_batches: int = REFRESH_TOKEN_PURGE_MAX_BATCHES,
+        purge_seconds: float = REFRESH_TOKEN_PURGE_SECONDS
+    ):
+        self._expire_days = expire_days
+        self._purge_batch = purge_batch
+        self._purge_max_batches = purge_max_batches
+        self._purge_seconds = purge_seconds
+        self._purged_at: Optional[float] = None
+        self.issued = 0
+        self.rotated = 0
+        self.reused = 0
+        self.purged = 0
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    async def issue(self, db, user_id: str, family_id: Optional[str] = None) -> str:
+        """New refresh token of the user, starting a family unless one is given"""
+        token = secrets.token_urlsafe(32)
+        await db.table("refresh_tokens").insert({
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "token_hash": self._digest(token),
+            "family_id": family_id or str(uuid.uuid4()),
+            "expires_at": (datetime.utcnow() + timedelta(days=self._expire_days)).isoformat(),
+            "created_at": datetime.utcnow().isoformat()
+        }).execute()
+        self.issued += 1
+        return token
+
+    async def issue_at_login(self, db, user_id: str) -> Optional[str]:
+        """Refresh token handed out with a login; None if it could not be stored, the login still succeeds"""
+        try:
+            return await self.issue(db, user_id)
+        except Exception as e:
+            logger.warning(f"Failed to issue refresh token for user {user_id}: {e}")
+            return None
+
+    async def rotate(self, db, refresh_token: str) -> Tuple[str, str]:
+        """Consume a refresh token, returning its user id and the next token of its family"""
+        result = await db.table("refresh_tokens").select(REFRESH_TOKEN).eq("token_hash", self._digest(refresh_token)).execute()
+        if not result.data:
+            raise _invalid()
+
+        stored = result.data[0]
+        if stored.get("revoked_at"):
+            self.reused += 1
+            logger.warning(f"Consumed refresh token presented again for user {stored['user_id']}, revoking its family")
+            await self.revoke_family(db, stored["family_id"])
+            raise _invalid()
+
+        expires_at = datetime.fromisoformat(stored["expires_at"].replace('Z', '+00:00'))
+        if datetime.utcnow().replace(tzinfo=expires_at.tzinfo) > expires_at:
+            raise _invalid("Refresh token has expired")
+
+        # Only the first of two concurrent refreshes with the same token consumes it
+        consumed = await db.table("refresh_tokens").update({
+            "revoked_at": datetime.utcnow().isoformat()
+        }).eq("id", stored["id"]).is_("revoked_at", "null").execute()
+        if not consumed.data:
+            raise _invalid()
+
+        token = await self.issue(db, stored["user_id"], stored["family_id"])
+        self.rotated += 1
+        return stored["user_id"], token
+
+    async def revoke_family(self, db, family_id: str):
+        await db.table("refresh_tokens").update({
+            "revoked_at": datetime.utcnow().isoformat()
+        }).eq("family_id", family_id).is_("revoked_at", "null").execute()
+
+    def purge_due(self) -> bool:
+        """Whether a cleanup should start now; the caller then runs purge_expired in the background"""
+        now = time.monotonic()
+        if self._purged_at is not None and now - self._purged_at < self._purge_seconds:
+            return False
+        self._purged_at = now
+        return True
+
+    async def purge_expired(self, db) -> int:
+        """Delete expired tokens in batches, stopping at the first partial batch"""
+        deleted = 0
+        try:
+            for _ in range(self._purge_max_batches):
+                result = await db.rpc(PURGE_RPC, {"batch_size": self._purge_batch}).execute()
+                batch = int(result.data or 0)
+                deleted += batch
+                if batch < self._purge_batch:
+                    break
+        except Exception as e:
+            logger.warning(f"Failed to purge expired refresh tokens: {e}")
+
+        self.purged += deleted
+        if deleted:
+            logger.info(f"Purged {deleted} expired refresh tokens")
+        return deleted
+
+    def stats(self):
+        return {
+            "issued": self.issued,
+            "rotated": self.rotated,
+            "reused": self.reused,
+            "purged": self.purged
+        }
+
+
+# Global refresh token service instance
+refresh_token_service = RefreshTokenService()
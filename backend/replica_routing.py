@@ -0,0 +1,91 @@
+"""
+Routing of read-only endpoints to the read replica, with read-your-writes stickiness
+"""
+
+import os
+import time
+from typing import Dict, Optional
+from fastapi import HTTPException, Request
+from auth import AuthService
+
+# After a session writes, its reads stay on the primary this long so it sees its own writes; 0 disables
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+DB_REPLICA_MAX_SESSIONS = int(os.getenv("DB_REPLICA_MAX_SESSIONS", 100_000))
+
+# Request header asking for a read from the primary regardless of the session's writes
+READ_PRIMARY_HEADER = "x-read-primary"
+
+
+def session_key(request: Request) -> Optional[str]:
+    """Identity of the caller's session, the user id of its verified bearer token; None when anonymous.
+
+    Keyed on the user rather than the token, which is reissued and refreshed
+    while the session goes on.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        user_id = AuthService.verify_token(token).get("user_id")
+    except HTTPException:
+        return None
+    return str(user_id) if user_id else None
+
+
+class ReadYourWrites:
+    """Time of the last write of every session, kept for the sticky window.
+
+    The replica may lag the primary, so a session that has just written is
+    served from the primary until the window has passed; sessions that have
+    not written recently, and anonymous ones, read from the replica.
+    """
+
+    def __init__(self, sticky_seconds: float = DB_REPLICA_STICKY_SECONDS, max_sessions: int = DB_REPLICA_MAX_SESSIONS):
+        self._sticky_seconds = sticky_seconds
+        self._max_sessions = max_sessions
+        self._last_write: Dict[str, float] = {}
+        self.primary_reads = 0
+        self.replica_reads = 0
+
+    def note_write(self, session: Optional[str]):
+        if session is None or self._sticky_seconds <= 0:
+            return
+        now = time.monotonic()
+        # Re-insert so the dict stays ordered by last write
+        self._last_write.pop(session, None)
+        self._last_write[session] = now
+        self._prune(now)
+
+    def recently_wrote(self, session: Optional[str]) -> bool:
+        if session is None:
+            return False
+        written_at = self._last_write.get(session)
+        return written_at is not None and time.monotonic() - written_at < self._sticky_seconds
+
+    def use_replica(self, session: Optional[str], force_primary: bool = False) -> bool:
+        """Whether a read of this session may go to the replica, counted for /health"""
+        replica = not force_primary and not self.recently_wrote(session)
+        if replica:
+            self.replica_reads += 1
+        else:
+            self.primary_reads += 1
+        return replica
+
+    def _prune(self, now: float):
+        while self._last_write:
+            session, written_at = next(iter(self._last_write.items()))
+            if now - written_at < self._sticky_seconds and len(self._last_write) <= self._max_sessions:
+                break
+            del self._last_write[session]
+
+    def stats(self):
+        return {
+            "sticky_seconds": self._sticky_seconds,
+            "sticky_sessions": len(self._last_write),
+            "primary_reads": self.primary_reads,
+            "replica_reads": self.replica_reads
+        }
+
+
+# Global read-your-writes tracker
+read_your_writes = ReadYourWrites()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Offline check of read replica routing against two local stand-in PostgREST endpoints
+"""
+
+import os
+import json
+import asyncio
+import logging
+
+# Short sticky window so the check does not wait long for reads to return to the replica
+os.environ.setdefault("DB_REPLICA_STICKY_SECONDS", "0.5")
+
+from database import DatabaseManager
+from replica_routing import read_your_writes, DB_REPLICA_STICKY_SECONDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Any JWT-shaped value passes the client's key check; the stand-ins do not verify it
+STANDIN_KEY = "standin.standin.standin"
+
+
+def standin_handler(name: str):
+    """Minimal keep-alive HTTP/1.1 server answering every request with the name of the endpoint"""
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = dict(
+                    line.split(": ", 1) for line in head.decode().split("\r\n")[1:] if ": " in line
+                )
+                length = int(headers.get("Content-Length", headers.get("content-length", 0)))
+                if length:
+                    await reader.readexactly(length)
+
+                body = json.dumps([{"served_by": name}]).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n".encode()
+                    + b"Connection: keep-alive\r\n\r\n"
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+    return handle_connection
+
+
+async def start_standin(name: str):
+    server = await asyncio.start_server(standin_handler(name), "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    return server, f"http://{host}:{port}"
+
+
+async def served_by(client) -> str:
+    result = await client.table("bookings").select("id").execute()
+    return result.data[0]["served_by"]
+
+
+async def check_routing():
+    primary, primary_url = await start_standin("primary")
+    replica, replica_url = await start_standin("replica")
+    manager = DatabaseManager(primary_url, STANDIN_KEY, replica_url, STANDIN_KEY)
+
+    checks = []
+
+    def check(description: str, actual: str, expected: str):
+        checks.append(actual == expected)
+        logger.info(f"   {'✅' if actual == expected else '❌'} {description}: {actual}")
+
+    try:
+        async with primary, replica:
+            check("writes go to", await served_by(await manager.get_client()), "primary")
+            check("anonymous reads go to", await served_by(await manager.get_read_client(None)), "replica")
+            check("reads of a quiet session go to", await served_by(await manager.get_read_client("alice")), "replica")
+
+            read_your_writes.note_write("alice")
+            check("reads right after the session wrote go to", await served_by(await manager.get_read_client("alice")), "primary")
+            check("reads of another session go to", await served_by(await manager.get_read_client("bob")), "replica")
+            check("reads forced to the primary go to", await served_by(await manager.get_read_client("bob", force_primary=True)), "primary")
+
+            await asyncio.sleep(DB_REPLICA_STICKY_SECONDS)
+            check("reads after the sticky window go to", await served_by(await manager.get_read_client("alice")), "replica")
+
+            without_replica = DatabaseManager(primary_url, STANDIN_KEY, None)
+            check("reads without a replica go to", await served_by(await without_replica.get_read_client(None)), "primary")
+            await without_replica.close_client()
+    finally:
+        await manager.close_client()
+
+    logger.info(f"   routing: {read_your_writes.stats()}")
+    return all(checks)
+
+
+async def main():
+    logger.info("🚀 Starting read replica routing check...")
+    if not await check_routing():
+        raise SystemExit("💥 Read replica routing check failed")
+    logger.info("✅ Read replica routing check passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
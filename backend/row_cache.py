@@ -0,0 +1,157 @@
+"""
+Process-wide read-through LRU/TTL cache of hot users and caregiver_profiles rows
+"""
+
+import asyncio
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+ROW_CACHE_MAX_ENTRIES = int(os.getenv("ROW_CACHE_MAX_ENTRIES", 10000))
+ROW_CACHE_TTL_SECONDS = float(os.getenv("ROW_CACHE_TTL_SECONDS", 60))
+
+# Tables whose rows are cached; every write to them must call invalidate()
+ROW_CACHE_TABLES = {"users", "caregiver_profiles"}
+
+CacheKey = Tuple[str, str, str]
+
+
+class RowCache:
+    """LRU/TTL cache of single rows keyed by (table, column, value).
+
+    Concurrent misses for the same key share one in-flight load, and a
+    load that started before an invalidation of its table never writes
+    its (possibly stale) row back.
+    """
+
+    def __init__(self, max_entries: int = ROW_CACHE_MAX_ENTRIES, ttl_seconds: float = ROW_CACHE_TTL_SECONDS):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(table: str, column: str, value: Hashable) -> CacheKey:
+        return (table, column, str(value))
+
+    def generation(self, table: str) -> int:
+        return self._generations.get(table, 0)
+
+    def peek(self, table: str, value: Hashable, column: str = "id") -> Optional[Dict[str, Any]]:
+        """Cached copy of the row, or None on a miss"""
+        key = self._key(table, column, value)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, row = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Copies keep one request's edits out of the next request's row
+        return dict(row)
+
+    def set(self, table: str, row: Dict[str, Any], column: str = "id", generation: Optional[int] = None):
+        """Store a row under the given column, skipped if the table was invalidated since `generation`"""
+        if generation is not None and generation != self.generation(table):
+            return
+
+        key = self._key(table, column, row[column])
+        self._entries[key] = (time.monotonic() + self._ttl_seconds, dict(row))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def inflight(self, table: str, value: Hashable, column: str = "id") -> Optional[asyncio.Future]:
+        return self._inflight.get(self._key(table, column, value))
+
+    def begin_load(self, table: str, value: Hashable, future: asyncio.Future, column: str = "id"):
+        """Register a pending load so concurrent misses wait for it instead of querying"""
+        key = self._key(table, column, value)
+        self._inflight[key] = future
+        self.misses += 1
+        future.add_done_callback(lambda _: self._inflight.pop(key, None) if self._inflight.get(key) is future else None)
+
+    def join(self, table: str, value: Hashable, column: str = "id") -> Optional[asyncio.Future]:
+        """Future of a load already in flight for the key, if any"""
+        future = self.inflight(table, value, column)
+        if future is not None:
+            self.coalesced += 1
+        return future
+
+    async def get(
+        self,
+        table: str,
+        value: Hashable,
+        fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        column: str = "id"
+    ) -> Optional[Dict[str, Any]]:
+        """Read-through lookup of one row, `fetch` runs at most once per key at a time"""
+        row = self.peek(table, value, column)
+        if row is not None:
+            return row
+
+        pending = self.join(table, value, column)
+        if pending is not None:
+            row = await asyncio.shield(pending)
+            return dict(row) if row else row
+
+        future = asyncio.get_running_loop().create_future()
+        self.begin_load(table, value, future, column)
+        generation = self.generation(table)
+        try:
+            row = await fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters get the error, nobody else needs to retrieve it
+            future.exception()
+            raise
+
+        if row:
+            self.set(table, row, column, generation)
+        future.set_result(row)
+        return row
+
+    def invalidate(self, table: str, value: Hashable, column: str = "id"):
+        """Drop every cached copy of the rows matching column = value after a write"""
+        self._generations[table] = self.generation(table) + 1
+
+        # Writes are rare next to reads, a scan finds copies cached under other columns too
+        value = str(value)
+        stale = [
+            key for key, (_, row) in self._entries.items()
+            if key[0] == table and str(row.get(column)) == value
+        ]
+        for key in stale:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+
+# Global cache instance
+row_cache = RowCache()
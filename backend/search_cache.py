@@ -0,0 +1,143 @@
+"""
+LRU/TTL cache for location search results keyed by quantized search location
+"""
+
+import math
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+from geo_distance import lambert_km
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration (0.002 degrees is roughly 220 m)
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 2048))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", 60))
+SEARCH_CACHE_CELL_DEGREES = float(os.getenv("SEARCH_CACHE_CELL_DEGREES", 0.002))
+
+
+class SearchResultCache:
+    """Cache of search pages shared by every search made from the same grid cell.
+
+    Only results that fit on one page are shared across the cell; the caller
+    recomputes their distances for its own point. A paginated result is served
+    only to searches from the exact point it was computed for, since its
+    cursor keysets on distances from that point and would skip or repeat
+    results when continued from another one.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS,
+        cell_degrees: float = SEARCH_CACHE_CELL_DEGREES
+    ):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._cell_degrees = cell_degrees
+        # key -> (expires at, radius, origin, shared across the cell, value)
+        self._entries: "OrderedDict[Tuple, Tuple[float, float, Tuple[float, float], bool, Any]]" = OrderedDict()
+        # Half the cell diagonal, added to each entry's radius when invalidating
+        self._cell_slack_km = cell_degrees * 111.32 * math.sqrt(2) / 2
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def make_key(self, search_params, variant: Tuple = ()) -> Tuple:
+        """Key on the grid cell of the search point plus every other LocationSearch field.
+
+        `variant` separates results that also depend on who is searching.
+        """
+        params = search_params.dict(exclude={"latitude", "longitude"})
+        return (
+            math.floor(search_params.latitude / self._cell_degrees),
+            math.floor(search_params.longitude / self._cell_degrees),
+            tuple(sorted((name, str(value)) for name, value in params.items())),
+            variant
+        )
+
+    def _cell_center(self, key: Tuple) -> Tuple[float, float]:
+        return (
+            (key[0] + 0.5) * self._cell_degrees,
+            (key[1] + 0.5) * self._cell_degrees
+        )
+
+    def get(self, key: Tuple, origin: Tuple[float, float]) -> Optional[Any]:
+        """Cached value for a search from `origin`, None on a miss or if the entry is not shared with it"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, entry_origin, shared, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        if not shared and entry_origin != origin:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Tuple, value: Any, radius: float, origin: Tuple[float, float], shared: bool):
+        """Store a result computed for a search from `origin`, `shared` with the whole cell or not"""
+        self._entries[key] = (time.monotonic() + self._ttl_seconds, radius, origin, shared, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_locations(self, locations: Optional[Iterable[Tuple[float, float]]]):
+        """Drop cached searches whose circle could contain any of the given caregiver locations.
+
+        None means the affected locations are unknown, so everything is dropped.
+        """
+        if locations is None:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            return
+
+        locations = list(locations)
+        if not locations or not self._entries:
+            return
+
+        latitudes = np.array([location[0] for location in locations], dtype=np.float64)
+        longitudes = np.array([location[1] for location in locations], dtype=np.float64)
+
+        stale = []
+        for key, (_, radius, _, _, _) in self._entries.items():
+            center_lat, center_lng = self._cell_center(key)
+            distances = lambert_km(center_lat, center_lng, latitudes, longitudes)
+            if (distances <= radius + self._cell_slack_km).any():
+                stale.append(key)
+
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+# Global cache instance
+search_cache = SearchResultCache()
@@ -0,0 +1,66 @@
+"""
+Bounded top-k selection and keyset cursors for search results
+"""
+
+import base64
+import json
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from fastapi import HTTPException
+
+Cursor = Tuple[float, str]
+
+
+def encode_cursor(sort_key: float, item_id: str) -> str:
+    """Opaque cursor for the last item of a page"""
+    raw = json.dumps({"k": float(sort_key), "id": str(item_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(data["k"]), str(data["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def top_k_after(
+    sort_keys: Sequence[float],
+    ids: Sequence[str],
+    limit: int,
+    cursor: Optional[Cursor] = None
+) -> Tuple[List[int], Optional[str]]:
+    """Positions of the `limit` smallest (sort_key, id) pairs strictly after the cursor.
+
+    Items before the cursor are masked out and the page is picked with a
+    linear-time partition, so only the returned page is ever sorted.
+    Returns the positions in order and the cursor for the next page, if any.
+    """
+    keys = np.asarray(sort_keys, dtype=np.float64)
+    item_ids = np.asarray(ids, dtype=object)
+    positions = np.arange(len(keys))
+
+    if cursor is not None:
+        last_key, last_id = cursor
+        after = (keys > last_key) | ((keys == last_key) & (item_ids > last_id))
+        positions = positions[after]
+
+    has_more = len(positions) > limit
+    if has_more:
+        candidate_keys = keys[positions]
+        partitioned = np.argpartition(candidate_keys, limit - 1)[:limit]
+        # Keep every item tied with the k-th key so the id tie-break stays exact
+        threshold = candidate_keys[partitioned].max()
+        positions = positions[candidate_keys <= threshold]
+
+    page = sorted(positions.tolist(), key=lambda position: (keys[position], item_ids[position]))[:limit]
+
+    next_cursor = None
+    if has_more and page:
+        last = page[-1]
+        next_cursor = encode_cursor(keys[last], item_ids[last])
+    return page, next_cursor
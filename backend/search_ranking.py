@@ -0,0 +1,126 @@
+"""
+Multi-factor ranking of location search candidates over a precomputed feature store
+"""
+
+import os
+import logging
+from typing import Dict, Iterable, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ranking weights, each factor is scaled to [0, 1] before weighting
+RANK_WEIGHT_DISTANCE = float(os.getenv("RANK_WEIGHT_DISTANCE", 0.35))
+RANK_WEIGHT_RATING = float(os.getenv("RANK_WEIGHT_RATING", 0.25))
+RANK_WEIGHT_REVIEWS = float(os.getenv("RANK_WEIGHT_REVIEWS", 0.15))
+RANK_WEIGHT_PRICE = float(os.getenv("RANK_WEIGHT_PRICE", 0.15))
+RANK_WEIGHT_REPEAT = float(os.getenv("RANK_WEIGHT_REPEAT", 0.10))
+
+# Review count at which the reviews factor saturates
+RANK_REVIEWS_SATURATION = int(os.getenv("RANK_REVIEWS_SATURATION", 100))
+
+DEFAULT_WEIGHTS = {
+    "distance": RANK_WEIGHT_DISTANCE,
+    "rating": RANK_WEIGHT_RATING,
+    "reviews": RANK_WEIGHT_REVIEWS,
+    "price": RANK_WEIGHT_PRICE,
+    "repeat": RANK_WEIGHT_REPEAT
+}
+
+
+class CaregiverFeatureStore:
+    """Columnar arrays of the ranking and filter features of every indexed service.
+
+    Rows are addressed by a stable position handed out on upsert, freed
+    positions are reused, so a search gathers all its candidates' features
+    with a single fancy-index per column.
+    """
+
+    COLUMNS = ("latitude", "longitude", "price", "rating", "reviews")
+
+    def __init__(self, capacity: int = 1024):
+        self._columns = {name: np.zeros(capacity, dtype=np.float64) for name in self.COLUMNS}
+        self._rows: Dict[str, int] = {}
+        self._free = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _grow(self):
+        for name, column in self._columns.items():
+            grown = np.zeros(len(column) * 2, dtype=np.float64)
+            grown[:len(column)] = column
+            self._columns[name] = grown
+
+    def upsert(self, service_id: str, latitude: float, longitude: float, price: float, rating: float, total_reviews: int) -> int:
+        row = self._rows.get(service_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self._size == len(self._columns["price"]):
+                    self._grow()
+                row = self._size
+                self._size += 1
+            self._rows[service_id] = row
+
+        self._columns["latitude"][row] = latitude
+        self._columns["longitude"][row] = longitude
+        self._columns["price"][row] = price
+        self._columns["rating"][row] = rating
+        # Stored already scaled so ranking does no per-request log
+        self._columns["reviews"][row] = min(np.log1p(total_reviews) / np.log1p(RANK_REVIEWS_SATURATION), 1.0)
+        return row
+
+    def remove(self, service_id: str):
+        row = self._rows.pop(service_id, None)
+        if row is not None:
+            self._free.append(row)
+
+    def clear(self):
+        self._rows = {}
+        self._free = []
+        self._size = 0
+
+    def column(self, name: str, rows: np.ndarray) -> np.ndarray:
+        return self._columns[name][rows]
+
+
+def score_candidates(
+    distances: np.ndarray,
+    radius: float,
+    ratings: np.ndarray,
+    reviews: np.ndarray,
+    prices: np.ndarray,
+    repeat: Optional[np.ndarray] = None,
+    weights: Optional[Dict[str, float]] = None
+) -> np.ndarray:
+    """Weighted relevance score per candidate, higher is better.
+
+    Price is scored against the median price of the candidates, so a
+    caregiver half the local median gets 0.75 and one at twice it gets 0.
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    if len(distances) == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    scores = weights["distance"] * np.clip(1.0 - distances / max(radius, 1e-9), 0.0, 1.0)
+    scores += weights["rating"] * np.clip(ratings / 5.0, 0.0, 1.0)
+    scores += weights["reviews"] * reviews
+
+    median_price = float(np.median(prices))
+    if median_price > 0:
+        relative = (median_price - prices) / median_price
+        scores += weights["price"] * (0.5 + 0.5 * np.clip(relative, -1.0, 1.0))
+
+    if repeat is not None:
+        scores += weights["repeat"] * repeat
+    return scores
+
+
+def repeat_mask(caregiver_ids: Iterable[str], previous_caregivers: Optional[set]) -> Optional[np.ndarray]:
+    """1.0 where the owner already completed a booking with the caregiver"""
+    if not previous_caregivers:
+        return None
+    return np.fromiter((caregiver_id in previous_caregivers for caregiver_id in caregiver_ids), dtype=np.float64)
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, BackgroundTasks, Response, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, EmailStr, validator
@@ -14,7 +14,6 @@ from dotenv import load_dotenv
 import stripe
 import cloudinary
 import cloudinary.uploader
-from geopy.distance import geodesic
 import googlemaps
 import smtplib
 try:
@@ -26,24 +25,54 @@ except ImportError:
     from email.mime.multipart import MIMEMultipart as MimeMultipart
 import asyncio
 import httpx
+import numpy as np
+import time
 from enum import Enum
 import logging
 from fastapi.responses import HTMLResponse
 from booking_management import booking_router
 # Import new Supabase modules
-from database import get_db_client, startup_event, shutdown_event
+from database import db_manager, get_db_client, get_read_db_client, get_request_loaders, RequestLoaders, startup_event, shutdown_event
+from projections import (
+    BOOKING, BOOKING_AMOUNT, BOOKING_CAREGIVER, BOOKING_DETAILS, BOOKING_EARNINGS,
+    BOOKING_FOR_CAREGIVER, BOOKING_FOR_OWNER, BOOKING_PARTIES, BOOKING_STATE, BOOKING_STATUS,
+    BOOKING_STATUS_CHANGE, BOOKING_WITH_CAREGIVER_USER,
+    CAREGIVER_PROFILE_RATING, ID, ID_VERIFICATION_STATUS, MESSAGE, PET, REVIEW_RATING,
+    SERVICE, USER_FIRST_NAME, USER_LOGIN, VERIFICATION_TOKEN
+)
 from models import (
-    UserCreate, UserUpdate, UserResponse, UserLogin, LoginResponse,
+    UserCreate, UserUpdate, UserResponse, UserLogin, LoginResponse, RefreshTokenRequest,
     PetCreate, PetUpdate, PetResponse,
     CaregiverServiceCreate, CaregiverServiceResponse, CaregiverProfileResponse,
     BookingCreate, BookingResponse, BookingStatus, PaymentStatus,
     ReviewCreate, ReviewResponse,
     MessageCreate, MessageResponse,
-    LocationSearch, ServiceType
+    LocationSearch, KeywordSearch, SearchSort, ServiceType
 )
-from auth import AuthService, get_current_user
+from auth import AuthService, get_current_user, get_optional_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
 from verification import verification_service, oauth_service
 from pets_endpoints import pets_router
+from map_endpoints import map_router
+from geo_index import caregiver_geo_index
+from geo_distance import filter_candidates, lambert_km
+from search_pagination import top_k_after, decode_cursor, encode_cursor
+from search_cache import search_cache
+from row_cache import row_cache
+from caregiver_resolver import caregiver_id_resolver
+from db_resilience import db_resilience, replica_resilience, hedged_reads, is_read
+from replica_routing import read_your_writes, session_key
+from availability_index import caregiver_availability_index, refresh_caregiver_availability
+from search_ranking import score_candidates, repeat_mask
+from db_metrics import RequestQueryMetrics, current_request_metrics, route_histograms
+from slow_query_log import slow_query_log
+from password_hashing import password_hasher
+from token_cache import token_cache
+from refresh_tokens import refresh_token_service
+from login_throttle import login_throttle, client_ip
+from token_claims import (
+    CLAIMS_VERSION, REISSUED_TOKEN_HEADER, claim_changes, current_claims, issue_access_token,
+    load_claims, make_claims, reissue, reissued_token
+)
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -56,7 +85,9 @@ logger = logging.getLogger(__name__)
 # Configuration
 JWT_SECRET_KEY = os.environ['JWT_SECRET_KEY']
 JWT_ALGORITHM = os.environ['JWT_ALGORITHM']
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ['ACCESS_TOKEN_EXPIRE_MINUTES'])
+
+# Location search backend: "memory" (in-process geo index) or "postgis" (search_caregivers_within_radius RPC)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "memory").lower()
 
 # External service configurations
 stripe.api_key = os.environ['STRIPE_SECRET_KEY']
@@ -82,24 +113,57 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", REISSUED_TOKEN_HEADER],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Report the request's database round trips in Server-Timing and the per-route histograms"""
+    metrics = RequestQueryMetrics()
+    token = current_request_metrics.set(metrics)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_metrics.reset(token)
+    app_ms = (time.perf_counter() - start) * 1000
+
+    response.headers["Server-Timing"] = metrics.server_timing(app_ms)
+    if any(not is_read(query["table"], query["operation"]) for query in metrics.queries):
+        # Keep this session's next reads on the primary until the replica has caught up
+        read_your_writes.note_write(session_key(request))
+    route = request.scope.get("route")
+    route_histograms.observe(f"{request.method} {route.path if route else 'unmatched'}", app_ms, metrics)
+    return response
+
+@app.middleware("http")
+async def reissue_access_tokens(request: Request, call_next):
+    """Hand the caller a new access token when a handler refreshed its claims"""
+    reissued = {}
+    token = reissued_token.set(reissued)
+    try:
+        response = await call_next(request)
+    finally:
+        reissued_token.reset(token)
+
+    if "access_token" in reissued:
+        response.headers[REISSUED_TOKEN_HEADER] = reissued["access_token"]
+    return response
+
 # Add startup and shutdown events
 app.add_event_handler("startup", startup_event)
 app.add_event_handler("shutdown", shutdown_event)
+app.add_event_handler("shutdown", password_hasher.shutdown)
 
 # Utility functions (using AuthService for consistency)
 def create_access_token(data: dict):
     return AuthService.create_access_token(data)
 
-def verify_password(plain_password, hashed_password):
-    return AuthService.verify_password(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return AuthService.get_password_hash(password)
+async def verify_password(plain_password, hashed_password):
+    return await password_hasher.verify(plain_password, hashed_password)
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    return geodesic((lat1, lon1), (lat2, lon2)).kilometers
+async def get_password_hash(password):
+    return await password_hasher.hash(password)
 
 async def send_email(to_email: str, subject: str, body: str):
     """Generic email sending function"""
@@ -269,12 +333,12 @@ async def send_verification_email(user_id: str, email: str, first_name: str, db)
 async def register(user_data: UserCreate, background_tasks: BackgroundTasks, db=Depends(get_db_client)):
     try:
         # Check if user already exists
-        existing_user = await db.table("users").select("*").eq("email", user_data.email).execute()
+        existing_user = await db.table("users").select(ID).eq("email", user_data.email).execute()
         if existing_user.data:
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Create user
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash(user_data.password)
         user_dict = user_data.dict()
         user_dict.pop('password')
         user_dict['password_hash'] = hashed_password
@@ -286,6 +350,7 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks, db=
             raise HTTPException(status_code=500, detail="Failed to create user")
         
         created_user = result.data[0]
+        claims = make_claims(email_verified=False)
         
         # Create caregiver profile if role is caregiver
         if user_data.user_type == "caregiver":
@@ -304,6 +369,8 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks, db=
                 "created_at": datetime.utcnow().isoformat()
             }
             await db.table("caregiver_profiles").insert(caregiver_profile).execute()
+            caregiver_id_resolver.prime(created_user["id"], caregiver_profile["id"])
+            claims = make_claims(False, caregiver_profile["id"], "not_submitted")
         
         # Send verification email for new users
         background_tasks.add_task(
@@ -432,13 +499,15 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks, db=
             """
         )
         
-        access_token = create_access_token(data={
-            "sub": user_data.email, 
-            "user_id": created_user['id'], 
-            "user_type": user_data.user_type,
-            "email": user_data.email
-        })
-        return {"access_token": access_token, "token_type": "bearer", "user_id": created_user['id']}
+        access_token = issue_access_token(created_user['id'], user_data.email, user_data.user_type, claims)
+        refresh_token = await refresh_token_service.issue_at_login(db, created_user['id'])
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            "user_id": created_user['id']
+        }
         
     except HTTPException:
         raise
@@ -447,23 +516,29 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks, db=
         raise HTTPException(status_code=500, detail="Registration failed")
 
 @api_router.post("/auth/login", response_model=dict)
-async def login(user_credentials: UserLogin, db=Depends(get_db_client)):
+async def login(user_credentials: UserLogin, request: Request, db=Depends(get_db_client)):
+    # Refuse excess attempts before the user is read or bcrypt runs
+    login_throttle.check(client_ip(request), user_credentials.email)
     try:
-        result = await db.table("users").select("*").eq("email", user_credentials.email).execute()
+        result = await db.table("users").select(USER_LOGIN).eq("email", user_credentials.email).execute()
         if not result.data:
             raise HTTPException(status_code=401, detail="Incorrect email or password")
         
         user = result.data[0]
-        if not verify_password(user_credentials.password, user["password_hash"]):
+        if not await verify_password(user_credentials.password, user["password_hash"]):
             raise HTTPException(status_code=401, detail="Incorrect email or password")
+        login_throttle.succeeded(user_credentials.email)
         
-        access_token = create_access_token(data={
-            "sub": user_credentials.email, 
-            "user_id": user["id"], 
-            "user_type": user["user_type"],
-            "email": user_credentials.email
-        })
-        return {"access_token": access_token, "token_type": "bearer", "user_id": user["id"]}
+        claims = await load_claims(db, user)
+        access_token = issue_access_token(user["id"], user_credentials.email, user["user_type"], claims)
+        refresh_token = await refresh_token_service.issue_at_login(db, user["id"])
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            "user_id": user["id"]
+        }
         
     except HTTPException:
         raise
@@ -471,14 +546,48 @@ async def login(user_credentials: UserLogin, db=Depends(get_db_client)):
         logger.error(f"Login error: {e}")
         raise HTTPException(status_code=500, detail="Login failed")
 
-@api_router.get("/auth/me", response_model=UserResponse)
-async def get_current_user_info(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+@api_router.post("/auth/refresh", response_model=dict)
+async def refresh_access_token(
+    refresh_data: RefreshTokenRequest,
+    background_tasks: BackgroundTasks,
+    db=Depends(get_db_client),
+    loaders: RequestLoaders = Depends(get_request_loaders)
+):
+    """Exchange a refresh token for a new access token and the next refresh token, without a password check"""
     try:
-        result = await db.table("users").select("*").eq("id", current_user["user_id"]).execute()
-        if not result.data:
+        user_id, refresh_token = await refresh_token_service.rotate(db, refresh_data.refresh_token)
+        
+        user = await loaders.load("users", user_id)
+        if not user or not user.get("is_active", True):
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        
+        claims = await load_claims(db, user)
+        access_token = issue_access_token(user["id"], user["email"], user["user_type"], claims)
+        
+        if refresh_token_service.purge_due():
+            background_tasks.add_task(refresh_token_service.purge_expired, db)
+        
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            "user_id": user["id"]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Token refresh error: {e}")
+        raise HTTPException(status_code=500, detail="Token refresh failed")
+
+@api_router.get("/auth/me", response_model=UserResponse, dependencies=[Depends(hedged_reads)])
+async def get_current_user_info(current_user: dict = Depends(get_current_user), loaders: RequestLoaders = Depends(get_request_loaders)):
+    try:
+        user_data = await loaders.load("users", current_user["user_id"])
+        if not user_data:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user_data = result.data[0]
         return UserResponse(**user_data)
         
     except HTTPException:
@@ -490,7 +599,7 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user),
 # Add to backend/server.py - Insert these endpoints after the existing auth endpoints
 
 @api_router.post("/auth/verify-email", response_model=dict)
-async def verify_email(verification_data: dict, db=Depends(get_db_client)):
+async def verify_email(verification_data: dict, db=Depends(get_db_client), current_user: Optional[dict] = Depends(get_optional_current_user)):
     """Verify email address using verification token"""
     try:
         verification_token = verification_data.get("token")
@@ -498,7 +607,7 @@ async def verify_email(verification_data: dict, db=Depends(get_db_client)):
             raise HTTPException(status_code=400, detail="Verification token required")
         
         # Get verification token from database
-        token_result = await db.table("verification_tokens").select("*").eq("verification_token", verification_token).eq("is_used", False).execute()
+        token_result = await db.table("verification_tokens").select(VERIFICATION_TOKEN).eq("verification_token", verification_token).eq("is_used", False).execute()
         
         if not token_result.data:
             raise HTTPException(status_code=400, detail="Invalid or expired verification token")
@@ -522,6 +631,12 @@ async def verify_email(verification_data: dict, db=Depends(get_db_client)):
             "email_verified": True,
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", token_data["user_id"]).execute()
+        row_cache.invalidate("users", token_data["user_id"])
+        claim_changes.note_change(token_data["user_id"])
+        
+        # The caller verifying their own email gets a token saying so; older claim sets are reloaded on use
+        if current_user and current_user.get("user_id") == token_data["user_id"] and current_user.get("claims_version") == CLAIMS_VERSION:
+            reissue(current_user, email_verified=True)
         
         return {"message": "Email verified successfully", "verified": True}
         
@@ -532,15 +647,14 @@ async def verify_email(verification_data: dict, db=Depends(get_db_client)):
         raise HTTPException(status_code=500, detail="Email verification failed")
 
 @api_router.post("/auth/resend-verification", response_model=dict)
-async def resend_verification_email(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+async def resend_verification_email(current_user: dict = Depends(get_current_user), db=Depends(get_db_client), loaders: RequestLoaders = Depends(get_request_loaders)):
     """Resend email verification"""
     try:
         # Get user info
-        user_result = await db.table("users").select("*").eq("id", current_user["user_id"]).execute()
-        if not user_result.data:
+        user = await loaders.load("users", current_user["user_id"])
+        if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user = user_result.data[0]
         
         if user.get("email_verified"):
             return {"message": "Email already verified", "already_verified": True}
@@ -670,15 +784,14 @@ async def resend_verification_email(current_user: dict = Depends(get_current_use
         raise HTTPException(status_code=500, detail="Failed to resend verification email")
 
 @api_router.get("/auth/verification-status", response_model=dict)
-async def get_verification_status(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+async def get_verification_status(current_user: dict = Depends(get_current_user), loaders: RequestLoaders = Depends(get_request_loaders)):
     """Get user's verification status"""
     try:
         # Get user info
-        user_result = await db.table("users").select("*").eq("id", current_user["user_id"]).execute()
-        if not user_result.data:
+        user = await loaders.load("users", current_user["user_id"])
+        if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user = user_result.data[0]
         
         verification_status = {
             "email_verified": user.get("email_verified", False),
@@ -690,9 +803,8 @@ async def get_verification_status(current_user: dict = Depends(get_current_user)
         
         # Check ID verification for caregivers
         if user.get("user_type") == "caregiver":
-            profile_result = await db.table("caregiver_profiles").select("*").eq("user_id", current_user["user_id"]).execute()
-            if profile_result.data:
-                profile = profile_result.data[0]
+            profile = await loaders.load("caregiver_profiles", current_user["user_id"], column="user_id")
+            if profile:
                 verification_status["id_verification_status"] = profile.get("id_verification_status", "not_submitted")
         
         # Determine permissions
@@ -758,15 +870,13 @@ async def oauth_emergent_login(session_data: dict, db=Depends(get_db_client)):
             )
         
         # Create JWT token for API access
-        access_token = create_access_token(data={
-            "sub": user["email"], 
-            "user_id": user["id"], 
-            "user_type": user["user_type"],
-            "email": user["email"]
-        })
+        claims = await load_claims(db, user)
+        access_token = issue_access_token(user["id"], user["email"], user["user_type"], claims)
+        refresh_token = await refresh_token_service.issue_at_login(db, user["id"])
         
         return {
             "access_token": access_token,
+            "refresh_token": refresh_token,
             "session_token": session_token,
             "token_type": "bearer",
             "user_id": user["id"],
@@ -784,7 +894,7 @@ async def verify_email_web(token: str, db=Depends(get_db_client)):
     """Web-based email verification endpoint"""
     try:
         # Get verification token from database
-        token_result = await db.table("verification_tokens").select("*").eq("verification_token", token).eq("is_used", False).execute()
+        token_result = await db.table("verification_tokens").select(VERIFICATION_TOKEN).eq("verification_token", token).eq("is_used", False).execute()
         
         if not token_result.data:
             return HTMLResponse("""
@@ -825,9 +935,11 @@ async def verify_email_web(token: str, db=Depends(get_db_client)):
             "email_verified": True,
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", token_data["user_id"]).execute()
+        row_cache.invalidate("users", token_data["user_id"])
+        claim_changes.note_change(token_data["user_id"])
         
         # Get user info for personalized message
-        user_info = await db.table("users").select("first_name, email").eq("id", token_data["user_id"]).execute()
+        user_info = await db.table("users").select(USER_FIRST_NAME).eq("id", token_data["user_id"]).execute()
         user_name = user_info.data[0]["first_name"] if user_info.data else "User"
         
         return HTMLResponse(f"""
@@ -863,38 +975,15 @@ async def verify_email_web(token: str, db=Depends(get_db_client)):
         </html>
         """, status_code=500)
         
-@api_router.post("/auth/verify-email", response_model=dict)
-async def verify_email(verification_data: dict, db=Depends(get_db_client)):
-    """Verify email address using verification token"""
-    try:
-        verification_token = verification_data.get("token")
-        if not verification_token:
-            raise HTTPException(status_code=400, detail="Verification token required")
-        
-        # Verify token
-        success = await verification_service.verify_email_token(db, verification_token)
-        
-        if success:
-            return {"message": "Email verified successfully", "verified": True}
-        else:
-            raise HTTPException(status_code=400, detail="Invalid or expired verification token")
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Email verification error: {e}")
-        raise HTTPException(status_code=500, detail="Email verification failed")
-
 @api_router.post("/auth/resend-verification", response_model=dict)
-async def resend_verification_email(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+async def resend_verification_email(current_user: dict = Depends(get_current_user), db=Depends(get_db_client), loaders: RequestLoaders = Depends(get_request_loaders)):
     """Resend email verification"""
     try:
         # Get user info
-        user_result = await db.table("users").select("*").eq("id", current_user["user_id"]).execute()
-        if not user_result.data:
+        user = await loaders.load("users", current_user["user_id"])
+        if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user = user_result.data[0]
         
         if user.get("email_verified"):
             return {"message": "Email already verified", "already_verified": True}
@@ -940,8 +1029,8 @@ async def submit_id_verification(
             raise HTTPException(status_code=403, detail="Only caregivers can submit ID verification")
         
         # Check if email is verified first
-        user_result = await db.table("users").select("email_verified").eq("id", current_user["user_id"]).execute()
-        if not user_result.data or not user_result.data[0].get("email_verified"):
+        claims = await current_claims(db, current_user, confirm=lambda claims: claims.get("email_verified"))
+        if not claims.get("email_verified"):
             raise HTTPException(status_code=400, detail="Email must be verified before ID verification")
         
         document_type = verification_data.get("document_type")  # "nric" or "passport"
@@ -958,6 +1047,7 @@ async def submit_id_verification(
         verification_id = await verification_service.create_id_verification_request(
             db, current_user["user_id"], id_document_url, selfie_url, document_type
         )
+        reissue(claims, id_verification_status="pending")
         
         return {
             "message": "ID verification submitted successfully",
@@ -979,7 +1069,7 @@ async def get_id_verification_status(current_user: dict = Depends(get_current_us
             raise HTTPException(status_code=403, detail="Only caregivers can check ID verification status")
         
         # Get verification status
-        verification_result = await db.table("id_verifications").select("*").eq("user_id", current_user["user_id"]).order("created_at", desc=True).limit(1).execute()
+        verification_result = await db.table("id_verifications").select(ID_VERIFICATION_STATUS).eq("user_id", current_user["user_id"]).order("created_at", desc=True).limit(1).execute()
         
         if verification_result.data:
             verification = verification_result.data[0]
@@ -1010,9 +1100,9 @@ async def create_pet(pet_data: PetCreate, current_user: dict = Depends(get_curre
         if current_user.get("user_type") != "pet_owner":
             raise HTTPException(status_code=403, detail="Only pet owners can create pets")
         
-        # Check email verification
-        user_result = await db.table("users").select("email_verified").eq("id", current_user["user_id"]).execute()
-        if not user_result.data or not user_result.data[0].get("email_verified"):
+        # Check email verification from the token's claims
+        claims = await current_claims(db, current_user, confirm=lambda claims: claims.get("email_verified"))
+        if not claims.get("email_verified"):
             raise HTTPException(status_code=403, detail="Email verification required to create pets")
         
         pet_dict = pet_data.dict()
@@ -1035,7 +1125,7 @@ async def create_pet(pet_data: PetCreate, current_user: dict = Depends(get_curre
 @api_router.get("/pets", response_model=List[PetResponse])
 async def get_user_pets(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
     try:
-        result = await db.table("pets").select("*").eq("owner_id", current_user["user_id"]).eq("is_active", True).execute()
+        result = await db.table("pets").select(PET).eq("owner_id", current_user["user_id"]).eq("is_active", True).execute()
         pets = result.data or []
         return [PetResponse(**pet) for pet in pets]
         
@@ -1046,7 +1136,7 @@ async def get_user_pets(current_user: dict = Depends(get_current_user), db=Depen
 @api_router.get("/pets/{pet_id}", response_model=PetResponse)
 async def get_pet(pet_id: str, current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
     try:
-        result = await db.table("pets").select("*").eq("id", pet_id).eq("owner_id", current_user["user_id"]).execute()
+        result = await db.table("pets").select(PET).eq("id", pet_id).eq("owner_id", current_user["user_id"]).execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Pet not found")
         
@@ -1065,8 +1155,11 @@ async def create_service(service_data: CaregiverServiceCreate, current_user: dic
         if current_user.get("user_type") != "caregiver":
             raise HTTPException(status_code=403, detail="Only caregivers can create services")
         
-        # Check verification status
-        verification_status = await verification_service.check_user_verification_status(db, current_user["user_id"])
+        # Check verification status from the token's claims
+        verification_status = await current_claims(
+            db, current_user,
+            confirm=lambda claims: claims.get("email_verified") and claims.get("id_verification_status") == "approved"
+        )
         
         if not verification_status.get("email_verified"):
             raise HTTPException(status_code=403, detail="Email verification required to create services")
@@ -1083,6 +1176,8 @@ async def create_service(service_data: CaregiverServiceCreate, current_user: dic
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create service")
         
+        await refresh_caregiver_search(db, caregiver_id=service_dict['caregiver_id'])
+        
         return CaregiverServiceResponse(**result.data[0])
         
     except HTTPException:
@@ -1095,12 +1190,11 @@ async def create_service(service_data: CaregiverServiceCreate, current_user: dic
 async def get_caregiver_services(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
     try:
         # Get caregiver profile first
-        profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", current_user["user_id"]).execute()
-        if not profile_result.data:
+        caregiver_id = await caregiver_id_resolver.resolve(db, current_user["user_id"])
+        if not caregiver_id:
             return []
         
-        caregiver_id = profile_result.data[0]["id"]
-        result = await db.table("caregiver_services").select("*").eq("caregiver_id", caregiver_id).execute()
+        result = await db.table("caregiver_services").select(SERVICE).eq("caregiver_id", caregiver_id).execute()
         services = result.data or []
         return [CaregiverServiceResponse(**service) for service in services]
         
@@ -1108,80 +1202,275 @@ async def get_caregiver_services(current_user: dict = Depends(get_current_user),
         logger.error(f"Get caregiver services error: {e}")
         raise HTTPException(status_code=500, detail="Failed to get services")
 
-@api_router.post("/search/location", response_model=List[dict])
-async def search_caregivers_by_location(search_params: LocationSearch, db=Depends(get_db_client)):
-    try:
-        # Get all active caregiver services
-        services_result = await db.table("caregiver_services").select("*").eq("is_active", True).execute()
-        services = services_result.data or []
-        
-        caregivers = []
-        
-        for service in services:
-            # Get caregiver profile
-            profile_result = await db.table("caregiver_profiles").select("*").eq("id", service["caregiver_id"]).execute()
-            if not profile_result.data:
-                continue
-            profile = profile_result.data[0]
-            
-            # Get caregiver user info
-            user_result = await db.table("users").select("*").eq("id", profile["user_id"]).execute()
-            if not user_result.data:
-                continue
-            caregiver = user_result.data[0]
-            
-            if not caregiver.get("latitude") or not caregiver.get("longitude"):
-                continue
-            
-            # Calculate distance
-            distance = calculate_distance(
-                search_params.latitude, search_params.longitude,
-                caregiver["latitude"], caregiver["longitude"]
+async def refresh_caregiver_search(db, caregiver_id: Optional[str] = None, user_id: Optional[str] = None):
+    """Sync the geo index after a caregiver write and drop cached searches around it"""
+    locations = await caregiver_geo_index.refresh_caregiver(db, caregiver_id=caregiver_id, user_id=user_id)
+    search_cache.invalidate_locations(locations)
+
+async def get_previous_caregivers(db, current_user: Optional[dict]) -> set:
+    """Caregivers the signed-in pet owner already completed bookings with"""
+    if not current_user or current_user.get("user_type") != "pet_owner":
+        return set()
+    result = await db.table("bookings").select(BOOKING_CAREGIVER).eq("pet_owner_id", current_user["user_id"]).eq("booking_status", "completed").execute()
+    return {booking["caregiver_id"] for booking in result.data or []}
+
+async def search_caregivers_in_memory(db, search_params: LocationSearch, cursor, previous_caregivers: set):
+    """Radius search over the in-process geo index"""
+    # Only the grid cells overlapping the search circle are visited
+    await caregiver_geo_index.ensure_loaded(db)
+    candidates = caregiver_geo_index.query_radius(
+        search_params.latitude, search_params.longitude, search_params.radius
+    )
+    features = caregiver_geo_index.features
+    rows = np.fromiter((candidate["row"] for candidate in candidates), dtype=np.intp, count=len(candidates))
+    # Every column is read now: the store may be cleared or its rows reused while availability loads below
+    prices = features.column("price", rows)
+    ratings = features.column("rating", rows)
+    reviews = features.column("reviews", rows)
+    latitudes = features.column("latitude", rows)
+    longitudes = features.column("longitude", rows)
+
+    # Distance and filters are evaluated for all candidates in one vectorized pass
+    indices, distances = filter_candidates(
+        search_params.latitude, search_params.longitude, search_params.radius,
+        latitudes,
+        longitudes,
+        prices=prices,
+        max_price=search_params.max_price,
+        ratings=ratings,
+        min_rating=search_params.min_rating,
+        service_types=[candidate["service"]["service_type"] for candidate in candidates],
+        service_type=search_params.service_type.value if search_params.service_type else None
+    )
+
+    if search_params.start_datetime:
+        # Schedules and busy intervals come from the availability index, not per-candidate queries
+        await caregiver_availability_index.ensure_loaded(db)
+        available = caregiver_availability_index.available_mask(
+            [candidates[index]["service"]["caregiver_id"] for index in indices],
+            search_params.start_datetime, search_params.end_datetime
+        )
+        indices, distances = indices[available], distances[available]
+
+    if search_params.sort == SearchSort.RELEVANCE:
+        # Higher score first, so the page is picked by the negated score
+        scores = score_candidates(
+            distances, search_params.radius,
+            ratings[indices], reviews[indices], prices[indices],
+            repeat=repeat_mask((candidates[index]["service"]["caregiver_id"] for index in indices), previous_caregivers)
+        )
+        sort_keys = -scores
+    else:
+        sort_keys = distances
+
+    # Pick the page after the cursor by (sort key, service id) without sorting every match
+    page, next_cursor = top_k_after(
+        sort_keys,
+        [candidates[index]["service"]["id"] for index in indices],
+        search_params.limit,
+        cursor
+    )
+
+    caregivers = []
+    for position in page:
+        candidate = candidates[indices[position]]
+        caregivers.append({
+            "caregiver": candidate["caregiver"],
+            "service": candidate["service"],
+            "profile": candidate["profile"],
+            "distance": round(float(distances[position]), 2)
+        })
+    return caregivers, next_cursor
+
+async def fetch_postgis_rows(db, search_params: LocationSearch, cursor, limit: int):
+    """One keyset page of the search_caregivers_within_radius RPC"""
+    result = await db.rpc("search_caregivers_within_radius", {
+        "search_lat": search_params.latitude,
+        "search_lng": search_params.longitude,
+        "radius_km": search_params.radius,
+        "filter_service_type": search_params.service_type.value if search_params.service_type else None,
+        "filter_min_rating": search_params.min_rating or None,
+        "filter_max_price": search_params.max_price or None,
+        "after_distance_km": cursor[0] if cursor else None,
+        "after_service_id": cursor[1] if cursor else None,
+        "result_limit": limit
+    }).execute()
+    return result.data or []
+
+async def search_caregivers_postgis(db, search_params: LocationSearch, cursor):
+    """Radius search evaluated in Postgres by the search_caregivers_within_radius RPC"""
+    # One extra row tells us whether there is a next page
+    wanted = search_params.limit + 1
+    if not search_params.start_datetime:
+        rows = await fetch_postgis_rows(db, search_params, cursor, wanted)
+    else:
+        await caregiver_availability_index.ensure_loaded(db)
+        rows = []
+        # Keep reading keyset pages until enough available caregivers are found
+        while len(rows) < wanted:
+            batch = await fetch_postgis_rows(db, search_params, cursor, wanted)
+            if not batch:
+                break
+            available = caregiver_availability_index.available_mask(
+                [row["service"]["caregiver_id"] for row in batch],
+                search_params.start_datetime, search_params.end_datetime
             )
-            
-            if distance <= search_params.radius:
-                # Apply filters
-                if search_params.service_type and service["service_type"] != search_params.service_type:
-                    continue
-                if search_params.max_price and service["base_price"] > search_params.max_price:
-                    continue
-                if search_params.min_rating and profile.get("rating", 0) < search_params.min_rating:
-                    continue
-                
-                caregivers.append({
-                    "caregiver": caregiver,
-                    "service": service,
-                    "profile": profile,
-                    "distance": round(distance, 2)
-                })
-        
-        # Sort by distance
-        caregivers.sort(key=lambda x: x["distance"])
-        return caregivers[:50]  # Limit to 50 results
+            rows.extend(row for row, is_available in zip(batch, available) if is_available)
+            if len(batch) < wanted:
+                break
+            cursor = (batch[-1]["distance_km"], batch[-1]["service"]["id"])
+        rows = rows[:wanted]
+
+    next_cursor = None
+    if len(rows) > search_params.limit:
+        rows = rows[:search_params.limit]
+        next_cursor = encode_cursor(rows[-1]["distance_km"], rows[-1]["service"]["id"])
+
+    caregivers = [
+        {
+            "caregiver": row["caregiver"],
+            "service": row["service"],
+            "profile": row["profile"],
+            "distance": round(row["distance_km"], 2)
+        }
+        for row in rows
+    ]
+    return caregivers, next_cursor
+
+def relocate_results(caregivers: List[dict], search_params: LocationSearch) -> List[dict]:
+    """A cached single page of results, with distances from this search point"""
+    distances = lambert_km(
+        search_params.latitude, search_params.longitude,
+        np.array([item["caregiver"]["latitude"] for item in caregivers], dtype=np.float64),
+        np.array([item["caregiver"]["longitude"] for item in caregivers], dtype=np.float64)
+    )
+    relocated = [
+        {**item, "distance": round(float(distance), 2)}
+        for item, distance in zip(caregivers, distances)
+    ]
+    if search_params.sort == SearchSort.DISTANCE:
+        relocated.sort(key=lambda item: (item["distance"], item["service"]["id"]))
+    return relocated
+
+@api_router.post("/search/location", response_model=List[dict], dependencies=[Depends(hedged_reads)])
+async def search_caregivers_by_location(
+    search_params: LocationSearch,
+    response: Response,
+    current_user: Optional[dict] = Depends(get_optional_current_user),
+    db=Depends(get_read_db_client)
+):
+    try:
+        cursor = decode_cursor(search_params.cursor)
+
+        # Owners with booking history get their own ranking, so their caregivers are part of the key
+        previous_caregivers = set()
+        if search_params.sort == SearchSort.RELEVANCE and SEARCH_BACKEND != "postgis":
+            previous_caregivers = await get_previous_caregivers(db, current_user)
+
+        cache_key = search_cache.make_key(search_params, variant=tuple(sorted(previous_caregivers)))
+        origin = (search_params.latitude, search_params.longitude)
+        cached = search_cache.get(cache_key, origin)
+        if cached is None:
+            if SEARCH_BACKEND == "postgis":
+                cached = await search_caregivers_postgis(db, search_params, cursor)
+            else:
+                cached = await search_caregivers_in_memory(db, search_params, cursor, previous_caregivers)
+            # A cursor keysets on distances from this exact point, so only unpaginated results are shared
+            search_cache.set(cache_key, cached, search_params.radius, origin, shared=cursor is None and cached[1] is None)
+        elif cursor is None and cached[1] is None:
+            # Possibly computed for another point of the cell
+            cached = (relocate_results(cached[0], search_params), None)
+
+        caregivers, next_cursor = cached
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return caregivers
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Location search error: {e}")
         raise HTTPException(status_code=500, detail="Search failed")
 
+@api_router.post("/search/keyword", response_model=List[dict], dependencies=[Depends(hedged_reads)])
+async def search_caregivers_by_keyword(search_params: KeywordSearch, response: Response, db=Depends(get_read_db_client)):
+    """Full-text search over caregiver bios and service titles, best match first"""
+    try:
+        has_location = search_params.latitude is not None and search_params.longitude is not None
+        if search_params.radius is not None and not has_location:
+            raise HTTPException(status_code=400, detail="Radius requires latitude and longitude")
+
+        cursor = decode_cursor(search_params.cursor)
+        # Matching and ts_rank ordering run in Postgres on the GIN full-text indexes
+        result = await db.rpc("search_caregivers_by_keyword", {
+            "search_query": search_params.query,
+            "search_lat": search_params.latitude,
+            "search_lng": search_params.longitude,
+            "radius_km": search_params.radius,
+            "filter_service_type": search_params.service_type.value if search_params.service_type else None,
+            "filter_min_rating": search_params.min_rating or None,
+            "filter_max_price": search_params.max_price or None,
+            "after_sort_key": cursor[0] if cursor else None,
+            "after_service_id": cursor[1] if cursor else None,
+            # One extra row tells us whether there is a next page
+            "result_limit": search_params.limit + 1
+        }).execute()
+        rows = result.data or []
+
+        if len(rows) > search_params.limit:
+            rows = rows[:search_params.limit]
+            response.headers["X-Next-Cursor"] = encode_cursor(rows[-1]["sort_key"], rows[-1]["service"]["id"])
+
+        return [
+            {
+                "caregiver": row["caregiver"],
+                "service": row["service"],
+                "profile": row["profile"],
+                "rank": round(row["rank"], 4),
+                "distance": round(row["distance_km"], 2) if row["distance_km"] is not None else None
+            }
+            for row in rows
+        ]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Keyword search error: {e}")
+        raise HTTPException(status_code=500, detail="Search failed")
+
+@api_router.get("/metrics/routes", response_model=dict)
+async def get_route_metrics():
+    """Per-route latency, database time and query count histograms"""
+    return route_histograms.snapshot()
+
+@api_router.get("/search/cache-stats", response_model=dict)
+async def get_search_cache_stats():
+    """Hit/miss counters of the location search cache"""
+    return {
+        "cache": search_cache.stats(),
+        "indexed_services": len(caregiver_geo_index),
+        "row_cache": row_cache.stats(),
+        "caregiver_ids": caregiver_id_resolver.stats()
+    }
+
 # Booking endpoints
 @api_router.post("/bookings", response_model=BookingResponse)
-async def create_booking(booking_data: BookingCreate, current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+async def create_booking(booking_data: BookingCreate, current_user: dict = Depends(get_current_user), db=Depends(get_db_client), loaders: RequestLoaders = Depends(get_request_loaders)):
     try:
         if current_user.get("user_type") != "pet_owner":
             raise HTTPException(status_code=403, detail="Only pet owners can create bookings")
         
-        # Check email verification
-        user_result = await db.table("users").select("email_verified").eq("id", current_user["user_id"]).execute()
-        if not user_result.data or not user_result.data[0].get("email_verified"):
+        # Email verification comes from the token's claims, only the service is read
+        claims, service = await asyncio.gather(
+            current_claims(db, current_user, confirm=lambda claims: claims.get("email_verified")),
+            loaders.load("caregiver_services", booking_data.service_id)
+        )
+        if not claims.get("email_verified"):
             raise HTTPException(status_code=403, detail="Email verification required to create bookings")
         
-        # Get service details
-        service_result = await db.table("caregiver_services").select("*").eq("id", str(booking_data.service_id)).execute()
-        if not service_result.data:
+        if not service:
             raise HTTPException(status_code=404, detail="Service not found")
         
-        service = service_result.data[0]
-        
         booking_dict = booking_data.dict()
         booking_dict['id'] = str(uuid.uuid4())
         booking_dict['pet_owner_id'] = str(booking_dict['pet_owner_id'])
@@ -1203,17 +1492,16 @@ async def create_booking(booking_data: BookingCreate, current_user: dict = Depen
         raise HTTPException(status_code=500, detail="Failed to create booking")
 
 @api_router.get("/bookings", response_model=List[BookingResponse])
-async def get_user_bookings(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+async def get_user_bookings(current_user: dict = Depends(get_current_user), db=Depends(get_read_db_client)):
     try:
         if current_user.get("user_type") == "pet_owner":
-            result = await db.table("bookings").select("*").eq("pet_owner_id", current_user["user_id"]).execute()
+            result = await db.table("bookings").select(BOOKING).eq("pet_owner_id", current_user["user_id"]).execute()
         elif current_user.get("user_type") == "caregiver":
             # Get caregiver profile first
-            profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", current_user["user_id"]).execute()
-            if not profile_result.data:
+            caregiver_id = await caregiver_id_resolver.resolve(db, current_user["user_id"])
+            if not caregiver_id:
                 return []
-            caregiver_id = profile_result.data[0]["id"]
-            result = await db.table("bookings").select("*").eq("caregiver_id", caregiver_id).execute()
+            result = await db.table("bookings").select(BOOKING).eq("caregiver_id", caregiver_id).execute()
         else:
             return []
         
@@ -1231,7 +1519,8 @@ async def update_booking_status(
     booking_id: str, 
     status_data: dict, 
     current_user: dict = Depends(get_current_user), 
-    db=Depends(get_db_client)
+    db=Depends(get_db_client),
+    loaders: RequestLoaders = Depends(get_request_loaders)
 ):
     """Update booking status (caregiver can confirm/reject, both can cancel)"""
     try:
@@ -1240,7 +1529,7 @@ async def update_booking_status(
             raise HTTPException(status_code=400, detail="Invalid status")
         
         # Get booking details
-        booking_result = await db.table("bookings").select("*, caregiver_profiles!inner(user_id)").eq("id", booking_id).execute()
+        booking_result = await db.table("bookings").select(BOOKING_WITH_CAREGIVER_USER).eq("id", booking_id).execute()
         if not booking_result.data:
             raise HTTPException(status_code=404, detail="Booking not found")
         
@@ -1280,19 +1569,19 @@ async def update_booking_status(
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to update booking")
         
+        await refresh_caregiver_availability(db, booking["caregiver_id"])
+        
         # Send notification emails based on status change
         booking_data = result.data[0]
         
-        # Get user details for notifications
-        pet_owner_result = await db.table("users").select("*").eq("id", booking["pet_owner_id"]).execute()
-        caregiver_result = await db.table("users").select("*").eq("id", booking["caregiver_profiles"]["user_id"]).execute()
-        service_result = await db.table("caregiver_services").select("*").eq("id", booking["service_id"]).execute()
+        # Get user details for notifications, both users are fetched in a single query
+        pet_owner, caregiver, service = await asyncio.gather(
+            loaders.load("users", booking["pet_owner_id"]),
+            loaders.load("users", booking["caregiver_profiles"]["user_id"]),
+            loaders.load("caregiver_services", booking["service_id"])
+        )
         
-        if pet_owner_result.data and caregiver_result.data and service_result.data:
-            pet_owner = pet_owner_result.data[0]
-            caregiver = caregiver_result.data[0]
-            service = service_result.data[0]
-            
+        if pet_owner and caregiver and service:
             # Send appropriate notification emails
             if new_status == "confirmed":
                 await send_booking_confirmation_email(pet_owner, caregiver, service, booking_data)
@@ -1317,18 +1606,12 @@ async def update_booking_status(
 async def get_booking_details(
     booking_id: str, 
     current_user: dict = Depends(get_current_user), 
-    db=Depends(get_db_client)
+    db=Depends(get_read_db_client)
 ):
     """Get detailed booking information with all related data"""
     try:
         # Get booking with related data
-        booking_result = await db.table("bookings").select("""
-            *,
-            users!bookings_pet_owner_id_fkey(first_name, last_name, email, phone),
-            caregiver_profiles!inner(*, users!caregiver_profiles_user_id_fkey(first_name, last_name, email, phone)),
-            pets(*),
-            caregiver_services(*)
-        """).eq("id", booking_id).execute()
+        booking_result = await db.table("bookings").select(BOOKING_DETAILS).eq("id", booking_id).execute()
         
         if not booking_result.data:
             raise HTTPException(status_code=404, detail="Booking not found")
@@ -1343,7 +1626,7 @@ async def get_booking_details(
             raise HTTPException(status_code=403, detail="Not authorized to view this booking")
         
         # Get messages for this booking
-        messages_result = await db.table("messages").select("*").eq("booking_id", booking_id).order("created_at").execute()
+        messages_result = await db.table("messages").select(MESSAGE).eq("booking_id", booking_id).order("created_at").execute()
         
         return {
             "booking": booking,
@@ -1358,31 +1641,20 @@ async def get_booking_details(
         raise HTTPException(status_code=500, detail="Failed to get booking details")
 
 @api_router.get("/bookings/upcoming", response_model=List[dict])
-async def get_upcoming_bookings(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+async def get_upcoming_bookings(current_user: dict = Depends(get_current_user), db=Depends(get_read_db_client)):
     """Get upcoming bookings for current user"""
     try:
         current_time = datetime.utcnow().isoformat()
         
         if current_user.get("user_type") == "pet_owner":
-            result = await db.table("bookings").select("""
-                *,
-                caregiver_profiles!inner(*, users!caregiver_profiles_user_id_fkey(first_name, last_name, profile_image_url)),
-                pets(name, species, breed),
-                caregiver_services(service_name, title)
-            """).eq("pet_owner_id", current_user["user_id"]).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed", "in_progress"]).order("start_datetime").execute()
+            result = await db.table("bookings").select(BOOKING_FOR_OWNER).eq("pet_owner_id", current_user["user_id"]).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed", "in_progress"]).order("start_datetime").execute()
         else:
             # Get caregiver profile first
-            profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", current_user["user_id"]).execute()
-            if not profile_result.data:
+            caregiver_id = await caregiver_id_resolver.resolve(db, current_user["user_id"])
+            if not caregiver_id:
                 return []
             
-            caregiver_id = profile_result.data[0]["id"]
-            result = await db.table("bookings").select("""
-                *,
-                users!bookings_pet_owner_id_fkey(first_name, last_name, profile_image_url),
-                pets(name, species, breed),
-                caregiver_services(service_name, title)
-            """).eq("caregiver_id", caregiver_id).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed", "in_progress"]).order("start_datetime").execute()
+            result = await db.table("bookings").select(BOOKING_FOR_CAREGIVER).eq("caregiver_id", caregiver_id).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed", "in_progress"]).order("start_datetime").execute()
         
         return result.data or []
         
@@ -1391,29 +1663,18 @@ async def get_upcoming_bookings(current_user: dict = Depends(get_current_user),
         raise HTTPException(status_code=500, detail="Failed to get upcoming bookings")
 
 @api_router.get("/bookings/history", response_model=List[dict])
-async def get_booking_history(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+async def get_booking_history(current_user: dict = Depends(get_current_user), db=Depends(get_read_db_client)):
     """Get booking history for current user"""
     try:
         if current_user.get("user_type") == "pet_owner":
-            result = await db.table("bookings").select("""
-                *,
-                caregiver_profiles!inner(*, users!caregiver_profiles_user_id_fkey(first_name, last_name, profile_image_url)),
-                pets(name, species, breed),
-                caregiver_services(service_name, title)
-            """).eq("pet_owner_id", current_user["user_id"]).in_("booking_status", ["completed", "cancelled", "rejected"]).order("created_at", desc=True).limit(50).execute()
+            result = await db.table("bookings").select(BOOKING_FOR_OWNER).eq("pet_owner_id", current_user["user_id"]).in_("booking_status", ["completed", "cancelled", "rejected"]).order("created_at", desc=True).limit(50).execute()
         else:
             # Get caregiver profile first
-            profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", current_user["user_id"]).execute()
-            if not profile_result.data:
+            caregiver_id = await caregiver_id_resolver.resolve(db, current_user["user_id"])
+            if not caregiver_id:
                 return []
             
-            caregiver_id = profile_result.data[0]["id"] 
-            result = await db.table("bookings").select("""
-                *,
-                users!bookings_pet_owner_id_fkey(first_name, last_name, profile_image_url),
-                pets(name, species, breed),
-                caregiver_services(service_name, title)
-            """).eq("caregiver_id", caregiver_id).in_("booking_status", ["completed", "cancelled", "rejected"]).order("created_at", desc=True).limit(50).execute()
+            result = await db.table("bookings").select(BOOKING_FOR_CAREGIVER).eq("caregiver_id", caregiver_id).in_("booking_status", ["completed", "cancelled", "rejected"]).order("created_at", desc=True).limit(50).execute()
         
         return result.data or []
         
@@ -1499,7 +1760,7 @@ async def send_booking_completion_email(pet_owner, caregiver, service, booking):
 @api_router.post("/payments/create-intent")
 async def create_payment_intent(booking_id: str, current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
     try:
-        result = await db.table("bookings").select("*").eq("id", booking_id).eq("pet_owner_id", current_user["user_id"]).execute()
+        result = await db.table("bookings").select(BOOKING_AMOUNT).eq("id", booking_id).eq("pet_owner_id", current_user["user_id"]).execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Booking not found")
         
@@ -1542,7 +1803,7 @@ async def upload_file(file: UploadFile = File(...), current_user: dict = Depends
 async def create_review(review_data: dict, current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
     try:
         # Verify booking exists and user is part of it
-        booking_result = await db.table("bookings").select("*").eq("id", review_data["booking_id"]).execute()
+        booking_result = await db.table("bookings").select(BOOKING_PARTIES).eq("id", review_data["booking_id"]).execute()
         if not booking_result.data:
             raise HTTPException(status_code=404, detail="Booking not found")
         
@@ -1583,7 +1844,7 @@ async def update_caregiver_rating(caregiver_id: str, db):
     """Calculate and update caregiver rating"""
     try:
         # Calculate new rating
-        reviews_result = await db.table("reviews").select("rating").eq("reviewee_id", caregiver_id).execute()
+        reviews_result = await db.table("reviews").select(REVIEW_RATING).eq("reviewee_id", caregiver_id).execute()
         reviews = reviews_result.data or []
         
         if reviews:
@@ -1592,6 +1853,8 @@ async def update_caregiver_rating(caregiver_id: str, db):
                 "rating": round(avg_rating, 1),
                 "total_reviews": len(reviews)
             }).eq("user_id", caregiver_id).execute()
+            row_cache.invalidate("caregiver_profiles", caregiver_id, column="user_id")
+            await refresh_caregiver_search(db, user_id=caregiver_id)
     except Exception as e:
         logger.error(f"Update rating error: {e}")
 
@@ -1601,7 +1864,7 @@ async def send_message(message_data: dict, current_user: dict = Depends(get_curr
     try:
         # Verify booking exists and user is part of it
         if message_data.get("booking_id"):
-            booking_result = await db.table("bookings").select("*").eq("id", message_data["booking_id"]).execute()
+            booking_result = await db.table("bookings").select(BOOKING_PARTIES).eq("id", message_data["booking_id"]).execute()
             if not booking_result.data:
                 raise HTTPException(status_code=404, detail="Booking not found")
             
@@ -1635,7 +1898,7 @@ async def send_message(message_data: dict, current_user: dict = Depends(get_curr
 async def get_booking_messages(booking_id: str, current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
     try:
         # Verify user is part of booking
-        booking_result = await db.table("bookings").select("*").eq("id", booking_id).execute()
+        booking_result = await db.table("bookings").select(BOOKING_PARTIES).eq("id", booking_id).execute()
         if not booking_result.data:
             raise HTTPException(status_code=404, detail="Booking not found")
         
@@ -1643,7 +1906,7 @@ async def get_booking_messages(booking_id: str, current_user: dict = Depends(get
         if booking["pet_owner_id"] != current_user["user_id"] and booking["caregiver_id"] != current_user["user_id"]:
             raise HTTPException(status_code=403, detail="Not authorized to view these messages")
         
-        result = await db.table("messages").select("*").eq("booking_id", booking_id).order("created_at").execute()
+        result = await db.table("messages").select(MESSAGE).eq("booking_id", booking_id).order("created_at").execute()
         messages = result.data or []
         return [MessageResponse(**message) for message in messages]
         
@@ -1654,7 +1917,7 @@ async def get_booking_messages(booking_id: str, current_user: dict = Depends(get
         raise HTTPException(status_code=500, detail="Failed to get messages")
 
 @api_router.get("/bookings/today")
-async def get_today_bookings(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+async def get_today_bookings(current_user: dict = Depends(get_current_user), db=Depends(get_read_db_client)):
     """Get today's bookings for current user"""
     try:
         today = datetime.utcnow().date()
@@ -1662,25 +1925,14 @@ async def get_today_bookings(current_user: dict = Depends(get_current_user), db=
         today_end = datetime.combine(today, datetime.max.time()).isoformat()
         
         if current_user.get("user_type") == "pet_owner":
-            result = await db.table("bookings").select("""
-                *,
-                caregiver_profiles!inner(*, users!caregiver_profiles_user_id_fkey(first_name, last_name, profile_image_url)),
-                pets(name, species, breed),
-                caregiver_services(service_name, title)
-            """).eq("pet_owner_id", current_user["user_id"]).gte("start_datetime", today_start).lte("start_datetime", today_end).order("start_datetime").execute()
+            result = await db.table("bookings").select(BOOKING_FOR_OWNER).eq("pet_owner_id", current_user["user_id"]).gte("start_datetime", today_start).lte("start_datetime", today_end).order("start_datetime").execute()
         else:
             # Get caregiver profile first
-            profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", current_user["user_id"]).execute()
-            if not profile_result.data:
+            caregiver_id = await caregiver_id_resolver.resolve(db, current_user["user_id"])
+            if not caregiver_id:
                 return []
             
-            caregiver_id = profile_result.data[0]["id"]
-            result = await db.table("bookings").select("""
-                *,
-                users!bookings_pet_owner_id_fkey(first_name, last_name, profile_image_url),
-                pets(name, species, breed),
-                caregiver_services(service_name, title)
-            """).eq("caregiver_id", caregiver_id).gte("start_datetime", today_start).lte("start_datetime", today_end).order("start_datetime").execute()
+            result = await db.table("bookings").select(BOOKING_FOR_CAREGIVER).eq("caregiver_id", caregiver_id).gte("start_datetime", today_start).lte("start_datetime", today_end).order("start_datetime").execute()
         
         return result.data or []
         
@@ -1709,11 +1961,7 @@ async def update_booking_status(
             raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
         
         # Get booking details
-        booking_result = await db.table("bookings").select("""
-            *,
-            caregiver_profiles!inner(user_id),
-            users!bookings_pet_owner_id_fkey(first_name, last_name, email)
-        """).eq("id", booking_id).execute()
+        booking_result = await db.table("bookings").select(BOOKING_STATUS_CHANGE).eq("id", booking_id).execute()
         
         if not booking_result.data:
             raise HTTPException(status_code=404, detail="Booking not found")
@@ -1759,6 +2007,8 @@ async def update_booking_status(
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to update booking status")
         
+        await refresh_caregiver_availability(db, booking["caregiver_id"])
+        
         # Send notifications (implement based on your notification system)
         # await send_status_update_notification(booking, new_status, current_user)
         
@@ -1770,7 +2020,7 @@ async def update_booking_status(
         logger.error(f"Update booking status error: {e}")
         raise HTTPException(status_code=500, detail="Failed to update booking status")
 @api_router.get("/stats/user")
-async def get_user_stats(current_user: dict = Depends(get_current_user), db = Depends(get_db_client)):
+async def get_user_stats(current_user: dict = Depends(get_current_user), db = Depends(get_read_db_client)):
     """Get statistics for pet owner users"""
     try:
         if current_user.get("user_type") != "pet_owner":
@@ -1784,7 +2034,7 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
         
         # Total bookings
         try:
-            bookings_result = await db.table("bookings").select("id, booking_status, total_amount").eq("pet_owner_id", user_id).execute()
+            bookings_result = await db.table("bookings").select(BOOKING_STATUS).eq("pet_owner_id", user_id).execute()
             bookings = bookings_result.data or []
             logger.info(f"Found {len(bookings)} bookings for user {user_id}")
             
@@ -1800,7 +2050,7 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
         # Upcoming services
         try:
             current_time = datetime.utcnow().isoformat()
-            upcoming_result = await db.table("bookings").select("id").eq("pet_owner_id", user_id).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed"]).execute()
+            upcoming_result = await db.table("bookings").select(ID).eq("pet_owner_id", user_id).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed"]).execute()
             stats["upcoming_services"] = len(upcoming_result.data or [])
         except Exception as e:
             logger.error(f"Error getting upcoming services: {e}")
@@ -1808,7 +2058,7 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
         
         # Active pets
         try:
-            pets_result = await db.table("pets").select("id").eq("owner_id", user_id).eq("is_active", True).execute()
+            pets_result = await db.table("pets").select(ID).eq("owner_id", user_id).eq("is_active", True).execute()
             stats["active_pets"] = len(pets_result.data or [])
             logger.info(f"Found {stats['active_pets']} active pets for user {user_id}")
         except Exception as e:
@@ -1817,7 +2067,7 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
         
         # Average rating (from reviews given by this pet owner)
         try:
-            reviews_result = await db.table("reviews").select("rating").eq("pet_owner_id", user_id).execute()
+            reviews_result = await db.table("reviews").select(REVIEW_RATING).eq("pet_owner_id", user_id).execute()
             reviews = reviews_result.data or []
             if reviews:
                 stats["average_rating"] = round(sum(r.get("rating", 0) for r in reviews) / len(reviews), 1)
@@ -1829,7 +2079,7 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
         
         # Favorite caregivers count
         try:
-            favorites_result = await db.table("user_favorites").select("id").eq("user_id", user_id).execute()
+            favorites_result = await db.table("user_favorites").select(ID).eq("user_id", user_id).execute()
             stats["favorite_caregivers"] = len(favorites_result.data or [])
         except Exception as e:
             logger.error(f"Error getting favorites: {e}")
@@ -1845,7 +2095,7 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
         raise HTTPException(status_code=500, detail=f"Failed to get user statistics: {str(e)}")
 
 @api_router.get("/stats/caregiver")
-async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db = Depends(get_db_client)):
+async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db = Depends(get_read_db_client)):
     """Get statistics for caregiver users"""
     try:
         if current_user.get("user_type") != "caregiver":
@@ -1855,7 +2105,7 @@ async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db
         logger.info(f"Getting caregiver stats for user: {user_id}")
         
         # Get caregiver profile
-        profile_result = await db.table("caregiver_profiles").select("*").eq("user_id", user_id).execute()
+        profile_result = await db.table("caregiver_profiles").select(CAREGIVER_PROFILE_RATING).eq("user_id", user_id).execute()
         if not profile_result.data:
             logger.warning(f"No caregiver profile found for user {user_id}")
             # Return default stats if no profile found
@@ -1881,7 +2131,7 @@ async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db
         
         # Booking stats
         try:
-            bookings_result = await db.table("bookings").select("id, booking_status, total_amount, created_at").eq("caregiver_id", caregiver_id).execute()
+            bookings_result = await db.table("bookings").select(BOOKING_STATE).eq("caregiver_id", caregiver_id).execute()
             bookings = bookings_result.data or []
             
             stats["total_bookings"] = len(bookings)
@@ -1908,7 +2158,7 @@ async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db
         
         # Active services
         try:
-            services_result = await db.table("caregiver_services").select("id").eq("caregiver_id", caregiver_id).eq("is_active", True).execute()
+            services_result = await db.table("caregiver_services").select(ID).eq("caregiver_id", caregiver_id).eq("is_active", True).execute()
             stats["active_services"] = len(services_result.data or [])
         except Exception as e:
             logger.error(f"Error getting services: {e}")
@@ -1924,7 +2174,7 @@ async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db
         raise HTTPException(status_code=500, detail=f"Failed to get caregiver statistics: {str(e)}")
 
 @api_router.get("/stats/caregiver/earnings")
-async def get_caregiver_earnings(current_user: dict = Depends(get_current_user), db = Depends(get_db_client)):
+async def get_caregiver_earnings(current_user: dict = Depends(get_current_user), db = Depends(get_read_db_client)):
     """Get earnings statistics for caregiver"""
     try:
         if current_user.get("user_type") != "caregiver":
@@ -1934,8 +2184,8 @@ async def get_caregiver_earnings(current_user: dict = Depends(get_current_user),
         logger.info(f"Getting caregiver earnings for user: {user_id}")
         
         # Get caregiver profile
-        profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", user_id).execute()
-        if not profile_result.data:
+        caregiver_id = await caregiver_id_resolver.resolve(db, user_id)
+        if not caregiver_id:
             logger.warning(f"No caregiver profile found for user {user_id}")
             # Return default earnings if no profile found
             return {
@@ -1947,11 +2197,9 @@ async def get_caregiver_earnings(current_user: dict = Depends(get_current_user),
                 "completed_payouts": 0
             }
         
-        caregiver_id = profile_result.data[0]["id"]
-        
         # Get completed bookings with amounts
         try:
-            bookings_result = await db.table("bookings").select("total_amount, created_at, start_datetime").eq("caregiver_id", caregiver_id).eq("booking_status", "completed").execute()
+            bookings_result = await db.table("bookings").select(BOOKING_EARNINGS).eq("caregiver_id", caregiver_id).eq("booking_status", "completed").execute()
             bookings = bookings_result.data or []
             logger.info(f"Found {len(bookings)} completed bookings for caregiver {caregiver_id}")
         except Exception as e:
@@ -2033,7 +2281,7 @@ async def get_caregiver_earnings(current_user: dict = Depends(get_current_user),
         raise HTTPException(status_code=500, detail=f"Failed to get caregiver earnings: {str(e)}")
 
 @api_router.get("/bookings/today")
-async def get_today_bookings(current_user: dict = Depends(get_current_user), db=Depends(get_db_client)):
+async def get_today_bookings(current_user: dict = Depends(get_current_user), db=Depends(get_read_db_client)):
     """Get today's bookings for current user"""
     try:
         today = datetime.utcnow().date()
@@ -2043,26 +2291,15 @@ async def get_today_bookings(current_user: dict = Depends(get_current_user), db=
         logger.info(f"Getting today's bookings for user {current_user['user_id']} between {today_start} and {today_end}")
         
         if current_user.get("user_type") == "pet_owner":
-            result = await db.table("bookings").select("""
-                *,
-                caregiver_profiles!inner(*, users!caregiver_profiles_user_id_fkey(first_name, last_name, profile_image_url)),
-                pets(name, species, breed),
-                caregiver_services(service_name, title)
-            """).eq("pet_owner_id", current_user["user_id"]).gte("start_datetime", today_start).lte("start_datetime", today_end).order("start_datetime").execute()
+            result = await db.table("bookings").select(BOOKING_FOR_OWNER).eq("pet_owner_id", current_user["user_id"]).gte("start_datetime", today_start).lte("start_datetime", today_end).order("start_datetime").execute()
         else:
             # Get caregiver profile first
-            profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", current_user["user_id"]).execute()
-            if not profile_result.data:
+            caregiver_id = await caregiver_id_resolver.resolve(db, current_user["user_id"])
+            if not caregiver_id:
                 logger.warning(f"No caregiver profile found for user {current_user['user_id']}")
                 return []
             
-            caregiver_id = profile_result.data[0]["id"]
-            result = await db.table("bookings").select("""
-                *,
-                users!bookings_pet_owner_id_fkey(first_name, last_name, profile_image_url),
-                pets(name, species, breed),
-                caregiver_services(service_name, title)
-            """).eq("caregiver_id", caregiver_id).gte("start_datetime", today_start).lte("start_datetime", today_end).order("start_datetime").execute()
+            result = await db.table("bookings").select(BOOKING_FOR_CAREGIVER).eq("caregiver_id", caregiver_id).gte("start_datetime", today_start).lte("start_datetime", today_end).order("start_datetime").execute()
         
         bookings = result.data or []
         logger.info(f"Found {len(bookings)} bookings for today")
@@ -2077,7 +2314,8 @@ async def update_booking_status(
     booking_id: str, 
     status_data: dict,
     current_user: dict = Depends(get_current_user), 
-    db=Depends(get_db_client)
+    db=Depends(get_db_client),
+    loaders: RequestLoaders = Depends(get_request_loaders)
 ):
     """Update booking status"""
     try:
@@ -2095,23 +2333,17 @@ async def update_booking_status(
         logger.info(f"Updating booking {booking_id} status to {new_status}")
         
         # Get booking details
-        booking_result = await db.table("bookings").select("*").eq("id", booking_id).execute()
-        
-        if not booking_result.data:
+        booking = await loaders.load("bookings", booking_id)
+        if not booking:
             raise HTTPException(status_code=404, detail="Booking not found")
         
-        booking = booking_result.data[0]
-        
         # Check permissions
         is_pet_owner = booking["pet_owner_id"] == current_user["user_id"]
         is_caregiver = False
         
         if current_user.get("user_type") == "caregiver":
-            # Get caregiver profile to check if they own this booking
-            profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", current_user["user_id"]).execute()
-            if profile_result.data:
-                caregiver_id = profile_result.data[0]["id"]
-                is_caregiver = booking["caregiver_id"] == caregiver_id
+            caregiver_id = await caregiver_id_resolver.resolve(db, current_user["user_id"])
+            is_caregiver = bool(caregiver_id) and booking["caregiver_id"] == caregiver_id
         
         if not (is_pet_owner or is_caregiver):
             raise HTTPException(status_code=403, detail="Not authorized to update this booking")
@@ -2148,6 +2380,8 @@ async def update_booking_status(
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to update booking status")
         
+        await refresh_caregiver_availability(db, booking["caregiver_id"])
+        
         logger.info(f"Successfully updated booking {booking_id} status to {new_status}")
         return {"message": "Booking status updated successfully", "booking": result.data[0]}
         
@@ -2162,6 +2396,7 @@ app.include_router(api_router)
 app.include_router(booking_router)
 app.include_router(stats_router)
 app.include_router(pets_router)
+app.include_router(map_router)
 # Root endpoint
 @app.get("/")
 async def root():
@@ -2170,4 +2405,22 @@ async def root():
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "database": "supabase", "timestamp": datetime.utcnow().isoformat()}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "database": "supabase",
+        "database_pool": db_manager.pool_stats(),
+        "database_resilience": db_resilience.stats(),
+        "database_slow_queries": slow_query_log.stats(),
+        "password_hashing": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "token_claims": claim_changes.stats(),
+        "refresh_tokens": refresh_token_service.stats(),
+        "login_throttle": login_throttle.stats(),
+        "database_replica": {
+            "configured": db_manager.has_replica,
+            "pool": db_manager.pool_stats(replica=True),
+            "resilience": replica_resilience.stats(),
+            "routing": read_your_writes.stats()
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
\ No newline at end of file
@@ -206,6 +206,7 @@ async def create_database_schema():
     -- Full-text search indexes
     CREATE INDEX IF NOT EXISTS idx_pets_description_fts ON pets USING GIN(to_tsvector('english', description));
     CREATE INDEX IF NOT EXISTS idx_caregiver_bio_fts ON caregiver_profiles USING GIN(to_tsvector('english', bio));
+    CREATE INDEX IF NOT EXISTS idx_service_title_fts ON caregiver_services USING GIN(to_tsvector('english', title));
     
     -- Payment transaction indexes
     CREATE INDEX IF NOT EXISTS idx_payment_transactions_session_id ON payment_transactions(session_id);
@@ -213,6 +214,121 @@ async def create_database_schema():
     CREATE INDEX IF NOT EXISTS idx_payment_transactions_user_id ON payment_transactions(user_id);
     """
     
+    # SQL statements for spatial search (single-statement function bodies, safe to split on ';')
+    spatial_sql = """
+    -- PostGIS location of each user, kept in sync with latitude/longitude
+    CREATE EXTENSION IF NOT EXISTS postgis;
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS location geography(Point, 4326)
+        GENERATED ALWAYS AS (
+            CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL
+                 THEN ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+            END
+        ) STORED;
+    CREATE INDEX IF NOT EXISTS idx_users_location ON users USING GIST(location);
+
+    -- Radius search over active services, nearest first, with keyset pagination on (distance_km, service id)
+    CREATE OR REPLACE FUNCTION search_caregivers_within_radius(
+        search_lat DOUBLE PRECISION,
+        search_lng DOUBLE PRECISION,
+        radius_km DOUBLE PRECISION,
+        filter_service_type TEXT DEFAULT NULL,
+        filter_min_rating NUMERIC DEFAULT NULL,
+        filter_max_price NUMERIC DEFAULT NULL,
+        after_distance_km DOUBLE PRECISION DEFAULT NULL,
+        after_service_id UUID DEFAULT NULL,
+        result_limit INTEGER DEFAULT 50
+    )
+    RETURNS TABLE (service JSONB, profile JSONB, caregiver JSONB, distance_km DOUBLE PRECISION)
+    LANGUAGE sql STABLE
+    AS $$
+        SELECT
+            to_jsonb(s.*),
+            to_jsonb(p.*),
+            to_jsonb(u.*) - 'password_hash' - 'location',
+            d.distance_km
+        FROM caregiver_services s
+        JOIN caregiver_profiles p ON p.id = s.caregiver_id
+        JOIN users u ON u.id = p.user_id
+        CROSS JOIN LATERAL (
+            SELECT ST_Distance(u.location, ST_SetSRID(ST_MakePoint(search_lng, search_lat), 4326)::geography) / 1000.0 AS distance_km
+        ) d
+        WHERE s.is_active
+          AND ST_DWithin(u.location, ST_SetSRID(ST_MakePoint(search_lng, search_lat), 4326)::geography, radius_km * 1000.0)
+          AND (filter_service_type IS NULL OR s.service_type = filter_service_type)
+          AND (filter_min_rating IS NULL OR p.rating >= filter_min_rating)
+          AND (filter_max_price IS NULL OR s.base_price <= filter_max_price)
+          AND (after_distance_km IS NULL OR (d.distance_km, s.id) > (after_distance_km, after_service_id))
+        ORDER BY d.distance_km, s.id
+        LIMIT result_limit
+    $$;
+    """
+    
+    # SQL statements for keyword search (single-statement function body, safe to split on ';')
+    keyword_sql = """
+    -- Keyword search over caregiver bios and service titles ranked by ts_rank, optionally within a radius.
+    -- Keyset pagination on (sort_key, service id) where sort_key is the negated rank, so the best match comes first
+    CREATE OR REPLACE FUNCTION search_caregivers_by_keyword(
+        search_query TEXT,
+        search_lat DOUBLE PRECISION DEFAULT NULL,
+        search_lng DOUBLE PRECISION DEFAULT NULL,
+        radius_km DOUBLE PRECISION DEFAULT NULL,
+        filter_service_type TEXT DEFAULT NULL,
+        filter_min_rating NUMERIC DEFAULT NULL,
+        filter_max_price NUMERIC DEFAULT NULL,
+        after_sort_key DOUBLE PRECISION DEFAULT NULL,
+        after_service_id UUID DEFAULT NULL,
+        result_limit INTEGER DEFAULT 20
+    )
+    RETURNS TABLE (service JSONB, profile JSONB, caregiver JSONB, rank DOUBLE PRECISION, distance_km DOUBLE PRECISION, sort_key DOUBLE PRECISION)
+    LANGUAGE sql STABLE
+    AS $$
+        WITH query AS (
+            SELECT websearch_to_tsquery('english', search_query) AS q
+        ),
+        -- Each branch matches the exact expression of its GIN index
+        matches AS (
+            SELECT s.id
+            FROM caregiver_services s
+            JOIN caregiver_profiles p ON p.id = s.caregiver_id, query
+            WHERE to_tsvector('english', p.bio) @@ query.q
+            UNION
+            SELECT s.id
+            FROM caregiver_services s, query
+            WHERE to_tsvector('english', s.title) @@ query.q
+        ),
+        ranked AS (
+            SELECT
+                s, p, u,
+                (ts_rank(to_tsvector('english', coalesce(p.bio, '')), query.q)
+                 + ts_rank(to_tsvector('english', s.title), query.q))::double precision AS rank,
+                CASE WHEN search_lat IS NOT NULL AND search_lng IS NOT NULL
+                     THEN ST_Distance(u.location, ST_SetSRID(ST_MakePoint(search_lng, search_lat), 4326)::geography) / 1000.0
+                END AS distance_km
+            FROM matches m
+            JOIN caregiver_services s ON s.id = m.id
+            JOIN caregiver_profiles p ON p.id = s.caregiver_id
+            JOIN users u ON u.id = p.user_id, query
+            WHERE s.is_active
+              AND (search_lat IS NULL OR search_lng IS NULL OR radius_km IS NULL
+                   OR ST_DWithin(u.location, ST_SetSRID(ST_MakePoint(search_lng, search_lat), 4326)::geography, radius_km * 1000.0))
+              AND (filter_service_type IS NULL OR s.service_type = filter_service_type)
+              AND (filter_min_rating IS NULL OR p.rating >= filter_min_rating)
+              AND (filter_max_price IS NULL OR s.base_price <= filter_max_price)
+        )
+        SELECT
+            to_jsonb(r.s),
+            to_jsonb(r.p),
+            to_jsonb(r.u) - 'password_hash' - 'location',
+            r.rank,
+            r.distance_km,
+            -r.rank
+        FROM ranked r
+        WHERE after_sort_key IS NULL OR (-r.rank, (r.s).id) > (after_sort_key, after_service_id)
+        ORDER BY -r.rank, (r.s).id
+        LIMIT result_limit
+    $$;
+    """
+    
     # Execute table creation
     try:
         logger.info("Creating database tables...")
@@ -233,6 +349,24 @@ async def create_database_schema():
                 result = await client.rpc('exec_sql', {'sql': statement.strip()}).execute()
                 logger.info(f"✓ Index creation statement executed")
                 
+        logger.info("Creating spatial search column, index and RPC...")
+        
+        # Split and execute spatial statements
+        spatial_statements = spatial_sql.split(';')
+        for statement in spatial_statements:
+            if statement.strip():
+                result = await client.rpc('exec_sql', {'sql': statement.strip()}).execute()
+                logger.info(f"✓ Spatial statement executed")
+                
+        logger.info("Creating keyword search RPC...")
+        
+        # Split and execute keyword search statements
+        keyword_statements = keyword_sql.split(';')
+        for statement in keyword_statements:
+            if statement.strip():
+                result = await client.rpc('exec_sql', {'sql': statement.strip()}).execute()
+                logger.info(f"✓ Keyword search statement executed")
+                
         logger.info("✅ Database schema created successfully!")
         
     except Exception as e:
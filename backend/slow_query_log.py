@@ -0,0 +1,283 @@
+"""
+Slow-query log of the PostgREST calls: the shape of every call slower than a
+threshold with its parameter values redacted, and optional EXPLAIN plans of a
+sample of them through the explain_slow_query RPC
+"""
+
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Calls slower than this are logged; 0 disables the log
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 500))
+
+# Share of slow reads explained through the RPC, 0 disables EXPLAIN; a shape is explained at most once per interval
+DB_SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("DB_SLOW_QUERY_EXPLAIN_RATE", 0))
+DB_SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("DB_SLOW_QUERY_EXPLAIN_INTERVAL", 600))
+
+# Distinct shapes whose counts are kept for /health, the least recently slow ones are dropped first
+DB_SLOW_QUERY_MAX_SHAPES = int(os.getenv("DB_SLOW_QUERY_MAX_SHAPES", 200))
+
+# Defined in supabase_schema.sql, plans a read without running it
+EXPLAIN_RPC = "explain_slow_query"
+
+REDACTED = "?"
+
+# Builder methods filtering on a column given as their first argument and a value as their last
+FILTER_METHODS = {
+    "eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "is_", "in_",
+    "contains", "contained_by", "overlaps", "text_search", "filter"
+}
+
+# Filters the RPC can rebuild, by their PostgREST operator
+EXPLAINABLE_OPERATORS = {"eq", "neq", "gt", "gte", "lt", "lte", "in", "is"}
+
+# column.operator.value inside or_() strings
+_OR_CONDITION = re.compile(r"([\w.]+?)\.(not\.)?(\w+)\.(\([^)]*\)|[^,()]+)")
+
+# Constants inside plan conditions, e.g. 'c1'::text or 4.5
+_PLAN_CONSTANT = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def _explain_value(value: Any) -> Any:
+    """Filter value as JSON the RPC can quote as a literal"""
+    if isinstance(value, (list, tuple, set)):
+        return [_explain_value(item) for item in value]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _redact_condition(match: re.Match) -> str:
+    column, negation, operator = match[1], match[2] or "", match[3]
+    return f"{column}.{negation}{operator}.{REDACTED}"
+
+
+class QueryShape:
+    """Table, filters, ordering and range of one call, rebuilt from the builder methods it went through"""
+
+    def __init__(self, table: str, operation: str, calls: Tuple[Tuple[str, tuple, dict], ...]):
+        self.table = table
+        self.operation = operation
+        self.columns: Optional[str] = None
+        self.params: List[str] = []
+        # (column, operator, value); values never leave this object unredacted except to the RPC
+        self.filters: List[Tuple[str, str, Any]] = []
+        self.order: List[Tuple[str, bool]] = []
+        self.limit: Optional[int] = None
+        self.offset: Optional[int] = None
+        self.modifiers: List[str] = []
+
+        negate = False
+        for name, args, kwargs in calls:
+            if name == "rpc":
+                self.params = sorted(args[0] or {}) if args else []
+            elif name == "select":
+                self.columns = args[0] if args else "*"
+                if kwargs.get("count"):
+                    self.modifiers.append(f"count={kwargs['count']}")
+            elif name == "not_":
+                negate = True
+                continue
+            elif name in FILTER_METHODS and args:
+                if name == "filter":
+                    column, operator, value = args[0], args[1], args[-1]
+                else:
+                    column, operator, value = args[0], name.rstrip("_"), args[-1]
+                self.filters.append((column, f"not.{operator}" if negate else operator, value))
+            elif name == "match" and args:
+                self.filters.extend((column, "eq", value) for column, value in args[0].items())
+            elif name == "or_" and args:
+                self.filters.append(("or", "or", args[0]))
+            elif name == "order" and args:
+                self.order.append((args[0], bool(kwargs.get("desc", False))))
+            elif name == "limit" and args:
+                self.limit = args[0]
+            elif name == "offset" and args:
+                self.offset = args[0]
+            elif name == "range" and len(args) >= 2:
+                self.offset, self.limit = args[0], args[1] - args[0] + 1
+            elif name in ("single", "maybe_single"):
+                self.modifiers.append(name)
+            negate = False
+
+    def _redacted_filters(self) -> List[str]:
+        filters = []
+        for column, operator, value in self.filters:
+            if operator == "or":
+                filters.append(f"or=({_OR_CONDITION.sub(_redact_condition, value)})")
+            elif operator.endswith("in"):
+                filters.append(f"{column}={operator}.({REDACTED})")
+            else:
+                filters.append(f"{column}={operator}.{REDACTED}")
+        return filters
+
+    def __str__(self) -> str:
+        """PostgREST-like request line, e.g. select bookings?booking_status=eq.?&order=created_at.desc&limit=20"""
+        if self.operation == "rpc":
+            return f"rpc {self.table}({', '.join(f'{name}={REDACTED}' for name in self.params)})"
+
+        parts = []
+        if self.columns is not None:
+            parts.append(f"select={self.columns}")
+        parts.extend(self._redacted_filters())
+        if self.order:
+            parts.append("order=" + ",".join(f"{column}.{'desc' if desc else 'asc'}" for column, desc in self.order))
+        if self.limit is not None:
+            parts.append(f"limit={self.limit}")
+        if self.offset:
+            parts.append(f"offset={self.offset}")
+        parts.extend(self.modifiers)
+        return f"{self.operation} {self.table}" + (f"?{'&'.join(parts)}" if parts else "")
+
+    @property
+    def fingerprint(self) -> str:
+        """Shape without the page, so every page of a listing counts as one shape"""
+        return re.sub(r"&(limit|offset)=\d+", "", str(self))
+
+    def explain_params(self) -> Optional[Dict[str, Any]]:
+        """Arguments of the RPC, None when the call is not a read it can rebuild"""
+        if self.operation != "select":
+            return None
+        return {
+            "query_table": self.table,
+            "query_filters": [
+                {"column": column, "op": operator, "value": _explain_value(value)}
+                for column, operator, value in self.filters
+                if operator in EXPLAINABLE_OPERATORS
+            ],
+            "query_order": [{"column": column, "desc": desc} for column, desc in self.order],
+            "query_limit": self.limit,
+            "query_offset": self.offset
+        }
+
+
+def summarize_plan(plan: Any) -> Dict[str, Any]:
+    """Top node, estimated cost and every sequential scan of an EXPLAIN (FORMAT JSON) result"""
+    if isinstance(plan, list):
+        plan = plan[0] if plan else {}
+    root = plan.get("Plan", {}) if isinstance(plan, dict) else {}
+
+    seq_scans = []
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") == "Seq Scan":
+            seq_scans.append(
+                f"{node.get('Relation Name')}"
+                + (f" filter {_PLAN_CONSTANT.sub(REDACTED, node['Filter'])}" if node.get("Filter") else "")
+            )
+        nodes.extend(node.get("Plans", []))
+
+    return {
+        "node": root.get("Node Type"),
+        "total_cost": root.get("Total Cost"),
+        "rows": root.get("Plan Rows"),
+        "seq_scans": seq_scans
+    }
+
+
+class SlowQueryLog:
+    """Logs every call slower than the threshold and counts them per shape.
+
+    A sample of the slow reads is explained in the background through the
+    EXPLAIN RPC, at most once per shape and interval, so the plan showing a
+    missing index sits next to the shape's counts in /health.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = DB_SLOW_QUERY_MS,
+        explain_rate: float = DB_SLOW_QUERY_EXPLAIN_RATE,
+        explain_interval: float = DB_SLOW_QUERY_EXPLAIN_INTERVAL,
+        max_shapes: int = DB_SLOW_QUERY_MAX_SHAPES
+    ):
+        self._threshold_ms = threshold_ms
+        self._explain_rate = explain_rate
+        self._explain_interval = explain_interval
+        self._max_shapes = max_shapes
+        self._shapes: Dict[str, Dict[str, Any]] = {}
+        self._explains: Set[asyncio.Task] = set()
+        self.slow_queries = 0
+        self.explains = 0
+        self.explain_failures = 0
+
+    def observe(self, table: str, operation: str, calls: tuple, duration_ms: float, client=None):
+        """Record one call; client is the uninstrumented client the EXPLAIN is sent with"""
+        if self._threshold_ms <= 0 or duration_ms < self._threshold_ms:
+            return
+
+        shape = QueryShape(table, operation, calls)
+        self.slow_queries += 1
+        logger.warning(f"Slow query {duration_ms:.0f} ms: {shape}")
+
+        fingerprint = shape.fingerprint
+        # Re-insert so the dict stays ordered by the last time each shape was slow
+        stats = self._shapes.pop(fingerprint, None) or {
+            "query": fingerprint, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "explained_at": None, "plan": None
+        }
+        stats["count"] += 1
+        stats["total_ms"] += duration_ms
+        stats["max_ms"] = max(stats["max_ms"], duration_ms)
+        self._shapes[fingerprint] = stats
+        while len(self._shapes) > self._max_shapes:
+            del self._shapes[next(iter(self._shapes))]
+
+        if client is not None and self._should_explain(shape, stats):
+            stats["explained_at"] = time.monotonic()
+            task = asyncio.create_task(self._explain(shape, stats, client))
+            self._explains.add(task)
+            task.add_done_callback(self._explains.discard)
+
+    def _should_explain(self, shape: QueryShape, stats: Dict[str, Any]) -> bool:
+        if self._explain_rate <= 0 or shape.operation != "select":
+            return False
+        explained_at = stats["explained_at"]
+        if explained_at is not None and time.monotonic() - explained_at < self._explain_interval:
+            return False
+        return random.random() < self._explain_rate
+
+    async def _explain(self, shape: QueryShape, stats: Dict[str, Any], client):
+        try:
+            result = await client.rpc(EXPLAIN_RPC, shape.explain_params()).execute()
+        except Exception as e:
+            self.explain_failures += 1
+            logger.warning(f"EXPLAIN of slow query failed: {shape}: {e}")
+            return
+
+        self.explains += 1
+        stats["plan"] = summarize_plan(result.data)
+        logger.warning(f"EXPLAIN of slow query {shape}: {stats['plan']}")
+
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        shapes = sorted(self._shapes.values(), key=lambda stats: stats["total_ms"], reverse=True)[:top]
+        return {
+            "threshold_ms": self._threshold_ms,
+            "explain_rate": self._explain_rate,
+            "slow_queries": self.slow_queries,
+            "explains": self.explains,
+            "explain_failures": self.explain_failures,
+            "shapes": [
+                {
+                    "query": stats["query"],
+                    "count": stats["count"],
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 1),
+                    "max_ms": round(stats["max_ms"], 1),
+                    "plan": stats["plan"]
+                }
+                for stats in shapes
+            ]
+        }
+
+
+# Global slow-query log instance
+slow_query_log = SlowQueryLog()
@@ -7,15 +7,17 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any
 from datetime import datetime, timedelta
 import logging
-from database import get_db_client
+from database import get_read_db_client
 from auth import get_current_user
+from caregiver_resolver import caregiver_id_resolver
+from projections import BOOKING_EARNINGS, BOOKING_STATE, BOOKING_STATUS, BOOKING_STATUS_START, CAREGIVER_PROFILE_RATING, ID, REVIEW_RATING
 
 logger = logging.getLogger(__name__)
 
 stats_router = APIRouter(prefix="/api/stats", tags=["statistics"])
 
 @stats_router.get("/user")
-async def get_user_stats(current_user: dict = Depends(get_current_user), db = Depends(get_db_client)):
+async def get_user_stats(current_user: dict = Depends(get_current_user), db = Depends(get_read_db_client)):
     """Get statistics for pet owner users"""
     try:
         if current_user.get("user_type") != "pet_owner":
@@ -27,7 +29,7 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
         stats = {}
         
         # Total bookings
-        bookings_result = await db.table("bookings").select("id, booking_status, total_amount").eq("pet_owner_id", user_id).execute()
+        bookings_result = await db.table("bookings").select(BOOKING_STATUS).eq("pet_owner_id", user_id).execute()
         bookings = bookings_result.data or []
         
         stats["total_bookings"] = len(bookings)
@@ -36,15 +38,15 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
         
         # Upcoming services
         current_time = datetime.utcnow().isoformat()
-        upcoming_result = await db.table("bookings").select("id").eq("pet_owner_id", user_id).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed"]).execute()
+        upcoming_result = await db.table("bookings").select(ID).eq("pet_owner_id", user_id).gte("start_datetime", current_time).in_("booking_status", ["pending", "confirmed"]).execute()
         stats["upcoming_services"] = len(upcoming_result.data or [])
         
         # Active pets
-        pets_result = await db.table("pets").select("id").eq("owner_id", user_id).eq("is_active", True).execute()
+        pets_result = await db.table("pets").select(ID).eq("owner_id", user_id).eq("is_active", True).execute()
         stats["active_pets"] = len(pets_result.data or [])
         
         # Average rating (from reviews given by this pet owner)
-        reviews_result = await db.table("reviews").select("rating").eq("pet_owner_id", user_id).execute()
+        reviews_result = await db.table("reviews").select(REVIEW_RATING).eq("pet_owner_id", user_id).execute()
         reviews = reviews_result.data or []
         if reviews:
             stats["average_rating"] = round(sum(r.get("rating", 0) for r in reviews) / len(reviews), 1)
@@ -52,7 +54,7 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
             stats["average_rating"] = 0
         
         # Favorite caregivers count
-        favorites_result = await db.table("user_favorites").select("id").eq("user_id", user_id).execute()
+        favorites_result = await db.table("user_favorites").select(ID).eq("user_id", user_id).execute()
         stats["favorite_caregivers"] = len(favorites_result.data or [])
         
         return stats
@@ -64,7 +66,7 @@ async def get_user_stats(current_user: dict = Depends(get_current_user), db = De
         raise HTTPException(status_code=500, detail="Failed to get user statistics")
 
 @stats_router.get("/caregiver")
-async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db = Depends(get_db_client)):
+async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db = Depends(get_read_db_client)):
     """Get statistics for caregiver users"""
     try:
         if current_user.get("user_type") != "caregiver":
@@ -73,7 +75,7 @@ async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db
         user_id = current_user["user_id"]
         
         # Get caregiver profile
-        profile_result = await db.table("caregiver_profiles").select("*").eq("user_id", user_id).execute()
+        profile_result = await db.table("caregiver_profiles").select(CAREGIVER_PROFILE_RATING).eq("user_id", user_id).execute()
         if not profile_result.data:
             raise HTTPException(status_code=404, detail="Caregiver profile not found")
         
@@ -87,7 +89,7 @@ async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db
         stats["total_reviews"] = int(profile.get("total_reviews", 0))
         
         # Booking stats
-        bookings_result = await db.table("bookings").select("id, booking_status, total_amount, created_at").eq("caregiver_id", caregiver_id).execute()
+        bookings_result = await db.table("bookings").select(BOOKING_STATE).eq("caregiver_id", caregiver_id).execute()
         bookings = bookings_result.data or []
         
         stats["total_bookings"] = len(bookings)
@@ -107,7 +109,7 @@ async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db
             stats["acceptance_rate"] = 0
         
         # Active services
-        services_result = await db.table("caregiver_services").select("id").eq("caregiver_id", caregiver_id).eq("is_active", True).execute()
+        services_result = await db.table("caregiver_services").select(ID).eq("caregiver_id", caregiver_id).eq("is_active", True).execute()
         stats["active_services"] = len(services_result.data or [])
         
         return stats
@@ -119,7 +121,7 @@ async def get_caregiver_stats(current_user: dict = Depends(get_current_user), db
         raise HTTPException(status_code=500, detail="Failed to get caregiver statistics")
 
 @stats_router.get("/caregiver/earnings")
-async def get_caregiver_earnings(current_user: dict = Depends(get_current_user), db = Depends(get_db_client)):
+async def get_caregiver_earnings(current_user: dict = Depends(get_current_user), db = Depends(get_read_db_client)):
     """Get earnings statistics for caregiver"""
     try:
         if current_user.get("user_type") != "caregiver":
@@ -128,14 +130,12 @@ async def get_caregiver_earnings(current_user: dict = Depends(get_current_user),
         user_id = current_user["user_id"]
         
         # Get caregiver profile
-        profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", user_id).execute()
-        if not profile_result.data:
+        caregiver_id = await caregiver_id_resolver.resolve(db, user_id)
+        if not caregiver_id:
             raise HTTPException(status_code=404, detail="Caregiver profile not found")
         
-        caregiver_id = profile_result.data[0]["id"]
-        
         # Get completed bookings with amounts
-        bookings_result = await db.table("bookings").select("total_amount, created_at, start_datetime").eq("caregiver_id", caregiver_id).eq("booking_status", "completed").execute()
+        bookings_result = await db.table("bookings").select(BOOKING_EARNINGS).eq("caregiver_id", caregiver_id).eq("booking_status", "completed").execute()
         bookings = bookings_result.data or []
         
         earnings = {}
@@ -192,7 +192,7 @@ async def get_caregiver_earnings(current_user: dict = Depends(get_current_user),
         raise HTTPException(status_code=500, detail="Failed to get caregiver earnings")
 
 @stats_router.get("/bookings")
-async def get_booking_stats(current_user: dict = Depends(get_current_user), db = Depends(get_db_client)):
+async def get_booking_stats(current_user: dict = Depends(get_current_user), db = Depends(get_read_db_client)):
     """Get booking statistics for current user"""
     try:
         user_id = current_user["user_id"]
@@ -202,7 +202,7 @@ async def get_booking_stats(current_user: dict = Depends(get_current_user), db =
         
         if user_type == "pet_owner":
             # Pet owner booking stats
-            bookings_result = await db.table("bookings").select("*").eq("pet_owner_id", user_id).execute()
+            bookings_result = await db.table("bookings").select(BOOKING_STATUS_START).eq("pet_owner_id", user_id).execute()
             bookings = bookings_result.data or []
             
             stats["total_bookings"] = len(bookings)
@@ -213,12 +213,11 @@ async def get_booking_stats(current_user: dict = Depends(get_current_user), db =
             
         elif user_type == "caregiver":
             # Caregiver booking stats
-            profile_result = await db.table("caregiver_profiles").select("id").eq("user_id", user_id).execute()
-            if not profile_result.data:
+            caregiver_id = await caregiver_id_resolver.resolve(db, user_id)
+            if not caregiver_id:
                 return {"error": "Caregiver profile not found"}
             
-            caregiver_id = profile_result.data[0]["id"]
-            bookings_result = await db.table("bookings").select("*").eq("caregiver_id", caregiver_id).execute()
+            bookings_result = await db.table("bookings").select(BOOKING_STATUS_START).eq("caregiver_id", caregiver_id).execute()
             bookings = bookings_result.data or []
             
             stats["total_bookings"] = len(bookings)
@@ -162,12 +162,183 @@ CREATE INDEX IF NOT EXISTS idx_caregiver_service_area ON caregiver_profiles USIN
 -- Full-text search indexes
 CREATE INDEX IF NOT EXISTS idx_pets_description_fts ON pets USING GIN(to_tsvector('english', description));
 CREATE INDEX IF NOT EXISTS idx_caregiver_bio_fts ON caregiver_profiles USING GIN(to_tsvector('english', bio));
+CREATE INDEX IF NOT EXISTS idx_service_title_fts ON caregiver_services USING GIN(to_tsvector('english', title));
 
 -- Payment transaction indexes
 CREATE INDEX IF NOT EXISTS idx_payment_transactions_session_id ON payment_transactions(session_id);
 CREATE INDEX IF NOT EXISTS idx_payment_transactions_booking_id ON payment_transactions(booking_id);
 CREATE INDEX IF NOT EXISTS idx_payment_transactions_user_id ON payment_transactions(user_id);
 
+-- PostGIS location of each user, kept in sync with latitude/longitude
+CREATE EXTENSION IF NOT EXISTS postgis;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS location geography(Point, 4326)
+    GENERATED ALWAYS AS (
+        CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL
+             THEN ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+        END
+    ) STORED;
+CREATE INDEX IF NOT EXISTS idx_users_location ON users USING GIST(location);
+
+-- Radius search over active services, nearest first, with keyset pagination on (distance_km, service id)
+CREATE OR REPLACE FUNCTION search_caregivers_within_radius(
+    search_lat DOUBLE PRECISION,
+    search_lng DOUBLE PRECISION,
+    radius_km DOUBLE PRECISION,
+    filter_service_type TEXT DEFAULT NULL,
+    filter_min_rating NUMERIC DEFAULT NULL,
+    filter_max_price NUMERIC DEFAULT NULL,
+    after_distance_km DOUBLE PRECISION DEFAULT NULL,
+    after_service_id UUID DEFAULT NULL,
+    result_limit INTEGER DEFAULT 50
+)
+RETURNS TABLE (service JSONB, profile JSONB, caregiver JSONB, distance_km DOUBLE PRECISION)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        to_jsonb(s.*),
+        to_jsonb(p.*),
+        to_jsonb(u.*) - 'password_hash' - 'location',
+        d.distance_km
+    FROM caregiver_services s
+    JOIN caregiver_profiles p ON p.id = s.caregiver_id
+    JOIN users u ON u.id = p.user_id
+    CROSS JOIN LATERAL (
+        SELECT ST_Distance(u.location, ST_SetSRID(ST_MakePoint(search_lng, search_lat), 4326)::geography) / 1000.0 AS distance_km
+    ) d
+    WHERE s.is_active
+      AND ST_DWithin(u.location, ST_SetSRID(ST_MakePoint(search_lng, search_lat), 4326)::geography, radius_km * 1000.0)
+      AND (filter_service_type IS NULL OR s.service_type = filter_service_type)
+      AND (filter_min_rating IS NULL OR p.rating >= filter_min_rating)
+      AND (filter_max_price IS NULL OR s.base_price <= filter_max_price)
+      AND (after_distance_km IS NULL OR (d.distance_km, s.id) > (after_distance_km, after_service_id))
+    ORDER BY d.distance_km, s.id
+    LIMIT result_limit
+$$;
+
+-- Keyword search over caregiver bios and service titles ranked by ts_rank, optionally within a radius.
+-- Keyset pagination on (sort_key, service id) where sort_key is the negated rank, so the best match comes first
+CREATE OR REPLACE FUNCTION search_caregivers_by_keyword(
+    search_query TEXT,
+    search_lat DOUBLE PRECISION DEFAULT NULL,
+    search_lng DOUBLE PRECISION DEFAULT NULL,
+    radius_km DOUBLE PRECISION DEFAULT NULL,
+    filter_service_type TEXT DEFAULT NULL,
+    filter_min_rating NUMERIC DEFAULT NULL,
+    filter_max_price NUMERIC DEFAULT NULL,
+    after_sort_key DOUBLE PRECISION DEFAULT NULL,
+    after_service_id UUID DEFAULT NULL,
+    result_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE (service JSONB, profile JSONB, caregiver JSONB, rank DOUBLE PRECISION, distance_km DOUBLE PRECISION, sort_key DOUBLE PRECISION)
+LANGUAGE sql STABLE
+AS $$
+    WITH query AS (
+        SELECT websearch_to_tsquery('english', search_query) AS q
+    ),
+    -- Each branch matches the exact expression of its GIN index
+    matches AS (
+        SELECT s.id
+        FROM caregiver_services s
+        JOIN caregiver_profiles p ON p.id = s.caregiver_id, query
+        WHERE to_tsvector('english', p.bio) @@ query.q
+        UNION
+        SELECT s.id
+        FROM caregiver_services s, query
+        WHERE to_tsvector('english', s.title) @@ query.q
+    ),
+    ranked AS (
+        SELECT
+            s, p, u,
+            (ts_rank(to_tsvector('english', coalesce(p.bio, '')), query.q)
+             + ts_rank(to_tsvector('english', s.title), query.q))::double precision AS rank,
+            CASE WHEN search_lat IS NOT NULL AND search_lng IS NOT NULL
+                 THEN ST_Distance(u.location, ST_SetSRID(ST_MakePoint(search_lng, search_lat), 4326)::geography) / 1000.0
+            END AS distance_km
+        FROM matches m
+        JOIN caregiver_services s ON s.id = m.id
+        JOIN caregiver_profiles p ON p.id = s.caregiver_id
+        JOIN users u ON u.id = p.user_id, query
+        WHERE s.is_active
+          AND (search_lat IS NULL OR search_lng IS NULL OR radius_km IS NULL
+               OR ST_DWithin(u.location, ST_SetSRID(ST_MakePoint(search_lng, search_lat), 4326)::geography, radius_km * 1000.0))
+          AND (filter_service_type IS NULL OR s.service_type = filter_service_type)
+          AND (filter_min_rating IS NULL OR p.rating >= filter_min_rating)
+          AND (filter_max_price IS NULL OR s.base_price <= filter_max_price)
+    )
+    SELECT
+        to_jsonb(r.s),
+        to_jsonb(r.p),
+        to_jsonb(r.u) - 'password_hash' - 'location',
+        r.rank,
+        r.distance_km,
+        -r.rank
+    FROM ranked r
+    WHERE after_sort_key IS NULL OR (-r.rank, (r.s).id) > (after_sort_key, after_service_id)
+    ORDER BY -r.rank, (r.s).id
+    LIMIT result_limit
+$$;
+
+-- Plan of a slow PostgREST read as the slow-query log captured it, without running it.
+-- Identifiers are quoted and operators come from a fixed list; only the service role may call it
+CREATE OR REPLACE FUNCTION explain_slow_query(
+    query_table TEXT,
+    query_filters JSONB DEFAULT '[]',
+    query_order JSONB DEFAULT '[]',
+    query_limit INTEGER DEFAULT NULL,
+    query_offset INTEGER DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SET statement_timeout = '5s'
+AS $$
+DECLARE
+    operators CONSTANT JSONB := '{"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}';
+    conditions TEXT[] := '{}';
+    orderings TEXT[] := '{}';
+    query_filter JSONB;
+    query_ordering JSONB;
+    statement TEXT;
+    plan JSONB;
+BEGIN
+    FOR query_filter IN SELECT * FROM jsonb_array_elements(query_filters) LOOP
+        IF query_filter->>'op' = 'in' THEN
+            -- An untyped array literal takes the column's type, so its index stays usable
+            conditions := conditions || format('%I = ANY (%L)', query_filter->>'column',
+                ARRAY(SELECT jsonb_array_elements_text(query_filter->'value'))::TEXT);
+        ELSIF query_filter->>'op' = 'is' AND lower(query_filter->>'value') IN ('null', 'true', 'false') THEN
+            conditions := conditions || format('%I IS %s', query_filter->>'column', upper(query_filter->>'value'));
+        ELSIF operators ? (query_filter->>'op') THEN
+            conditions := conditions || format('%I %s %L', query_filter->>'column', operators->>(query_filter->>'op'), query_filter->>'value');
+        END IF;
+    END LOOP;
+
+    FOR query_ordering IN SELECT * FROM jsonb_array_elements(query_order) LOOP
+        orderings := orderings || format('%I %s', query_ordering->>'column',
+            CASE WHEN (query_ordering->>'desc')::BOOLEAN THEN 'DESC' ELSE 'ASC' END);
+    END LOOP;
+
+    statement := format('SELECT * FROM %I', query_table);
+    IF array_length(conditions, 1) > 0 THEN
+        statement := statement || ' WHERE ' || array_to_string(conditions, ' AND ');
+    END IF;
+    IF array_length(orderings, 1) > 0 THEN
+        statement := statement || ' ORDER BY ' || array_to_string(orderings, ', ');
+    END IF;
+    IF query_limit IS NOT NULL THEN
+        statement := statement || format(' LIMIT %s', query_limit);
+    END IF;
+    IF query_offset IS NOT NULL THEN
+        statement := statement || format(' OFFSET %s', query_offset);
+    END IF;
+
+    EXECUTE 'EXPLAIN (FORMAT JSON) ' || statement INTO plan;
+    RETURN plan;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION explain_slow_query(TEXT, JSONB, JSONB, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION explain_slow_query(TEXT, JSONB, JSONB, INTEGER, INTEGER) TO service_role;
+
 -- Insert demo users
 INSERT INTO users (id, email, password_hash, first_name, last_name, user_type, is_active, email_verified, latitude, longitude) VALUES 
 ('550e8400-e29b-41d4-a716-446655440001'::uuid, 'john.petowner@demo.com', '$2b$12$LQv3c1yqBwLFD5DAQr4P6exKj5D.M5V5v8E2KpO5X9J8yP7qJ8h3q', 'John', 'Smith', 'pet_owner', true, true, 1.3521, 103.8198),
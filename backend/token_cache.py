@@ -0,0 +1,114 @@
+"""
+Process-wide LRU cache of verified JWT payloads, each kept until its token expires
+"""
+
+import os
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration, 0 disables the cache
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+
+# Told a verified payload, returns True if its token must no longer be accepted
+RevocationCheck = Callable[[Dict[str, Any]], bool]
+
+
+class TokenCache:
+    """Decoded payloads keyed by a SHA-256 digest of the token.
+
+    A hit skips the signature check and claim parsing of jwt.decode. Entries
+    are dropped once the token's exp has passed, so an expired token is
+    decoded again and rejected as before. The revocation check, when one is
+    set, runs on every verification, cached or not.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._revocation_check: Optional[RevocationCheck] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revoked = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        # The raw token is a bearer credential, only its digest is kept
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Copy of the verified payload, or None on a miss or once the token has expired"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(payload)
+
+    def set(self, token: str, payload: Dict[str, Any]):
+        """Store a payload jwt.decode has verified; tokens without exp are never cached"""
+        expires_at = payload.get("exp")
+        if self._max_entries <= 0 or not isinstance(expires_at, (int, float)):
+            return
+
+        key = self._key(token)
+        self._entries[key] = (float(expires_at), dict(payload))
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def invalidate(self, token: str):
+        """Forget one token, e.g. on logout"""
+        self._entries.pop(self._key(token), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def resize(self, max_entries: int):
+        self._max_entries = max_entries
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > max(self._max_entries, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set_revocation_check(self, check: Optional[RevocationCheck]):
+        """Install the hook deciding whether a verified token was revoked, None removes it"""
+        self._revocation_check = check
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        if self._revocation_check is None or not self._revocation_check(payload):
+            return False
+        self.revoked += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "revoked": self.revoked,
+            "revocation_check": self._revocation_check is not None
+        }
+
+
+# Global token cache instance
+token_cache = TokenCache()
@@ -0,0 +1,178 @@
+"""
+Verification and role state carried as signed access token claims, so gated endpoints skip reading it
+"""
+
+import os
+import time
+import logging
+from datetime import timedelta
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+from auth import AuthService, ACCESS_TOKEN_EXPIRE_MINUTES
+from row_cache import row_cache
+from projections import ROW_PROJECTIONS
+from caregiver_resolver import caregiver_id_resolver
+
+logger = logging.getLogger(__name__)
+
+# Version of the claim set below; tokens of any other version have their claims read again
+CLAIMS_VERSION = 1
+
+# Users whose state change is remembered; a change only matters while tokens issued before it are valid
+TOKEN_CLAIMS_MAX_USERS = int(os.getenv("TOKEN_CLAIMS_MAX_USERS", 100_000))
+
+# Response header carrying an access token reissued because the caller's claims changed
+REISSUED_TOKEN_HEADER = "X-Access-Token"
+
+# Claims of the caller a handler may trust in place of the users and caregiver_profiles rows
+CLAIMS = ("claims_version", "claims_at", "email_verified", "caregiver_id", "id_verification_status")
+
+# Token reissued while serving the request, set by the middleware and filled in by handlers
+reissued_token: ContextVar[Optional[Dict[str, str]]] = ContextVar("reissued_token", default=None)
+
+
+class ClaimChanges:
+    """Time the claimed state of each user last changed.
+
+    A token whose claims were read before the change is stale: the next
+    gated request reads the state again and reissues the token. Changes
+    are only known to the process that made them, which is why a claim
+    that denies access is always confirmed against the database first.
+    """
+
+    def __init__(self, ttl_seconds: float = ACCESS_TOKEN_EXPIRE_MINUTES * 60, max_users: int = TOKEN_CLAIMS_MAX_USERS):
+        self._ttl_seconds = ttl_seconds
+        self._max_users = max_users
+        self._changed_at: Dict[str, float] = {}
+        self.changes = 0
+        self.stale = 0
+
+    def note_change(self, user_id: str):
+        now = time.time()
+        # Re-insert so the dict stays ordered by change time
+        self._changed_at.pop(str(user_id), None)
+        self._changed_at[str(user_id)] = now
+        self.changes += 1
+        self._prune(now)
+
+    def is_fresh(self, payload: Dict[str, Any]) -> bool:
+        """Whether the token's claims are of this version and were read after the user's last change"""
+        if payload.get("claims_version") != CLAIMS_VERSION:
+            return False
+        changed_at = self._changed_at.get(str(payload.get("user_id")))
+        if changed_at is not None and changed_at > payload.get("claims_at", 0):
+            self.stale += 1
+            return False
+        return True
+
+    def _prune(self, now: float):
+        while self._changed_at:
+            user_id, changed_at = next(iter(self._changed_at.items()))
+            if now - changed_at < self._ttl_seconds and len(self._changed_at) <= self._max_users:
+                break
+            del self._changed_at[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"users": len(self._changed_at), "changes": self.changes, "stale_tokens": self.stale}
+
+
+async def _fetch_row(db, table: str, column: str, value: str) -> Optional[Dict[str, Any]]:
+    result = await db.table(table).select(ROW_PROJECTIONS[table]).eq(column, value).execute()
+    return result.data[0] if result.data else None
+
+
+def make_claims(email_verified: bool, caregiver_id: Optional[str] = None, id_verification_status: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "claims_version": CLAIMS_VERSION,
+        "claims_at": time.time(),
+        "email_verified": bool(email_verified),
+        "caregiver_id": caregiver_id,
+        "id_verification_status": id_verification_status
+    }
+
+
+async def load_claims(db, user: Dict[str, Any], cached: bool = True) -> Dict[str, Any]:
+    """Claims of a user row; caregivers also need their profile, read past the row cache unless `cached`"""
+    if user.get("user_type") != "caregiver":
+        return make_claims(user.get("email_verified"))
+
+    if cached:
+        profile = await row_cache.get(
+            "caregiver_profiles", user["id"],
+            lambda: _fetch_row(db, "caregiver_profiles", "user_id", user["id"]),
+            column="user_id"
+        )
+    else:
+        profile = await _fetch_row(db, "caregiver_profiles", "user_id", user["id"])
+    if not profile:
+        return make_claims(user.get("email_verified"))
+    caregiver_id_resolver.prime(user["id"], profile["id"])
+    return make_claims(
+        user.get("email_verified"), profile["id"], profile.get("id_verification_status") or "not_submitted"
+    )
+
+
+def issue_access_token(
+    user_id: str,
+    email: str,
+    user_type: str,
+    claims: Dict[str, Any],
+    expires_at: Optional[float] = None
+) -> str:
+    """Signed access token; `expires_at` keeps the exp of the token it replaces"""
+    return AuthService.create_access_token(data={
+        "sub": email,
+        "user_id": user_id,
+        "user_type": user_type,
+        "email": email,
+        **{name: claims.get(name) for name in CLAIMS}
+    }, expires_delta=timedelta(seconds=expires_at - time.time()) if expires_at is not None else None)
+
+
+def reissue(current_user: Dict[str, Any], **changes) -> Dict[str, Any]:
+    """Caller's payload with changed claims, handed back as a new token in the response headers.
+
+    The new token expires when the caller's token does, so reissuing never
+    extends a session; only a refresh token does.
+    """
+    refreshed = {**current_user, **changes, "claims_version": CLAIMS_VERSION, "claims_at": time.time()}
+    token = issue_access_token(
+        refreshed["user_id"], refreshed["email"], refreshed["user_type"], refreshed, current_user.get("exp")
+    )
+    reissued = reissued_token.get()
+    if reissued is not None:
+        reissued["access_token"] = token
+    return refreshed
+
+
+async def current_claims(
+    db,
+    current_user: Dict[str, Any],
+    confirm: Optional[Callable[[Dict[str, Any]], bool]] = None
+) -> Dict[str, Any]:
+    """Claims of the caller, straight from the token unless it is stale or `confirm` rejects them.
+
+    Otherwise the user is read from the database, not the row cache, so a
+    caller verified in another process is not turned away on an outdated
+    claim. The token is reissued only if the claims it carries changed.
+    """
+    if claim_changes.is_fresh(current_user):
+        if current_user.get("caregiver_id"):
+            caregiver_id_resolver.prime(current_user["user_id"], current_user["caregiver_id"])
+        if confirm is None or confirm(current_user):
+            return current_user
+
+    user = await _fetch_row(db, "users", "id", current_user["user_id"])
+    if not user:
+        return {**current_user, "email_verified": False, "caregiver_id": None, "id_verification_status": None}
+
+    claims = await load_claims(db, user, cached=False)
+    if current_user.get("claims_version") == CLAIMS_VERSION and all(
+        current_user.get(name) == claims[name] for name in CLAIMS if name not in ("claims_version", "claims_at")
+    ):
+        return {**current_user, **claims}
+    return reissue(current_user, **claims)
+
+
+# Global claim change tracker
+claim_changes = ClaimChanges()
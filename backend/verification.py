@@ -19,6 +19,10 @@ except ImportError:
 from supabase import AsyncClient
 from fastapi import HTTPException
 import logging
+from row_cache import row_cache
+from caregiver_resolver import caregiver_id_resolver
+from token_claims import claim_changes
+from projections import ROW_PROJECTIONS, USER, VERIFICATION_TOKEN
 
 logger = logging.getLogger(__name__)
 
@@ -134,7 +138,7 @@ class VerificationService:
         """Verify email token and update user"""
         try:
             # Get verification token
-            result = await db.table("verification_tokens").select("*").eq("verification_token", verification_token).eq("is_used", False).execute()
+            result = await db.table("verification_tokens").select(VERIFICATION_TOKEN).eq("verification_token", verification_token).eq("is_used", False).execute()
             
             if not result.data:
                 return False
@@ -157,6 +161,8 @@ class VerificationService:
                 "email_verified": True,
                 "updated_at": datetime.utcnow().isoformat()
             }).eq("id", token_data["user_id"]).execute()
+            row_cache.invalidate("users", token_data["user_id"])
+            claim_changes.note_change(token_data["user_id"])
             
             logger.info(f"Email verified for user {token_data['user_id']}")
             return True
@@ -190,6 +196,8 @@ class VerificationService:
                 "id_verification_status": "pending",
                 "updated_at": datetime.utcnow().isoformat()
             }).eq("user_id", user_id).execute()
+            row_cache.invalidate("caregiver_profiles", user_id, column="user_id")
+            claim_changes.note_change(user_id)
             
             logger.info(f"ID verification request created for user {user_id}")
             return verification_id
@@ -198,16 +206,19 @@ class VerificationService:
             logger.error(f"Failed to create ID verification request: {e}")
             raise HTTPException(status_code=500, detail="Failed to submit ID verification")
     
+    @staticmethod
+    async def _fetch_row(db: AsyncClient, table: str, column: str, value: str) -> Optional[Dict[str, Any]]:
+        result = await db.table(table).select(ROW_PROJECTIONS[table]).eq(column, value).execute()
+        return result.data[0] if result.data else None
+    
     async def check_user_verification_status(self, db: AsyncClient, user_id: str) -> Dict[str, Any]:
         """Check user's verification status"""
         try:
             # Get user info
-            user_result = await db.table("users").select("*").eq("id", user_id).execute()
-            if not user_result.data:
+            user = await row_cache.get("users", user_id, lambda: self._fetch_row(db, "users", "id", user_id))
+            if not user:
                 raise HTTPException(status_code=404, detail="User not found")
             
-            user = user_result.data[0]
-            
             verification_status = {
                 "email_verified": user.get("email_verified", False),
                 "id_verification_status": None,
@@ -218,9 +229,12 @@ class VerificationService:
             
             # Check ID verification for caregivers
             if user.get("user_type") == "caregiver":
-                profile_result = await db.table("caregiver_profiles").select("*").eq("user_id", user_id).execute()
-                if profile_result.data:
-                    profile = profile_result.data[0]
+                profile = await row_cache.get(
+                    "caregiver_profiles", user_id,
+                    lambda: self._fetch_row(db, "caregiver_profiles", "user_id", user_id),
+                    column="user_id"
+                )
+                if profile:
                     verification_status["id_verification_status"] = profile.get("id_verification_status", "not_submitted")
             
             # Determine permissions
@@ -271,7 +285,7 @@ class OAuthService:
                 raise HTTPException(status_code=400, detail="No email in OAuth data")
             
             # Check if user exists
-            existing_user = await db.table("users").select("*").eq("email", email).execute()
+            existing_user = await db.table("users").select(USER).eq("email", email).execute()
             
             if existing_user.data:
                 # User exists, return existing user
@@ -323,6 +337,7 @@ class OAuthService:
                         "created_at": datetime.utcnow().isoformat()
                     }
                     await db.table("caregiver_profiles").insert(caregiver_profile).execute()
+                    caregiver_id_resolver.prime(created_user["id"], caregiver_profile["id"])
                 
                 logger.info(f"New OAuth user created: {email}")
                 return created_user
@@ -0,0 +1,32 @@
+"""
+Availability schedules are matched in the schedule timezone, whatever offset the search window carries
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from availability_index import parse_schedule, schedule_allows  # noqa: E402
+
+# Monday 9 to 5 in the default schedule timezone, Asia/Singapore (UTC+8)
+WEEKLY = parse_schedule({"monday": {"start": "09:00", "end": "17:00"}})
+SINGAPORE = timezone(timedelta(hours=8))
+
+
+def test_utc_window_is_matched_in_schedule_time():
+    # Monday 2026-10-12 09:00 to 11:00 in Singapore
+    assert schedule_allows(WEEKLY, datetime(2026, 10, 12, 1, tzinfo=timezone.utc), datetime(2026, 10, 12, 3, tzinfo=timezone.utc))
+    # Monday 17:00 to 18:00 in Singapore, after hours
+    assert not schedule_allows(WEEKLY, datetime(2026, 10, 12, 9, tzinfo=timezone.utc), datetime(2026, 10, 12, 10, tzinfo=timezone.utc))
+
+
+def test_same_window_with_any_offset_gives_the_same_answer():
+    local = (datetime(2026, 10, 12, 9, tzinfo=SINGAPORE), datetime(2026, 10, 12, 11, tzinfo=SINGAPORE))
+    naive_utc = (datetime(2026, 10, 12, 1), datetime(2026, 10, 12, 3))
+    assert schedule_allows(WEEKLY, *local)
+    assert schedule_allows(WEEKLY, *naive_utc)
+    # Sunday 23:00 UTC is already Monday 07:00 in Singapore, before hours
+    assert not schedule_allows(WEEKLY, datetime(2026, 10, 11, 23, tzinfo=timezone.utc), datetime(2026, 10, 12, 0, 30, tzinfo=timezone.utc))
@@ -0,0 +1,59 @@
+"""
+DataLoader batches the lookups of one tick into a single query and keeps the batch alive until it is done
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi import Depends, FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from database import (  # noqa: E402
+    DataLoader, RequestLoaders, get_db_client, get_read_db_client, get_read_request_loaders
+)
+from fake_supabase import FakeAsyncClient, FakeDatabase  # noqa: E402
+
+
+def test_loads_of_one_tick_share_a_query():
+    database = FakeDatabase()
+    database.insert("pets", [{"id": f"pet-{i}", "name": f"Pet {i}"} for i in range(3)])
+    client = FakeAsyncClient(database)
+
+    async def load():
+        loader = DataLoader(client, "pets")
+        futures = [loader.load(f"pet-{i}") for i in range(3)] + [loader.load("missing")]
+        rows = await asyncio.gather(*futures)
+        return loader, rows
+
+    loader, rows = asyncio.run(load())
+
+    assert [row and row["name"] for row in rows] == ["Pet 0", "Pet 1", "Pet 2", None]
+    assert client.call_count == 1
+    assert not loader._dispatches
+
+
+def test_read_loaders_use_the_read_client():
+    database = FakeDatabase()
+    database.insert("pets", {"id": "pet-0", "name": "Pet 0"})
+    primary, replica = FakeAsyncClient(FakeDatabase()), FakeAsyncClient(database)
+
+    app = FastAPI()
+
+    @app.get("/pets/{pet_id}")
+    async def get_pet(pet_id: str, loaders: RequestLoaders = Depends(get_read_request_loaders)):
+        return await loaders.load("pets", pet_id)
+
+    async def primary_client():
+        return primary
+
+    async def replica_client():
+        return replica
+
+    app.dependency_overrides[get_db_client] = primary_client
+    app.dependency_overrides[get_read_db_client] = replica_client
+
+    assert TestClient(app).get("/pets/pet-0").json()["name"] == "Pet 0"
+    assert (primary.call_count, replica.call_count) == (0, 1)
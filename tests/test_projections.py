@@ -0,0 +1,185 @@
+"""
+Column projections only select what the functions selecting them return or read
+"""
+
+import ast
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import models  # noqa: E402
+import projections  # noqa: E402
+from projections import Projection  # noqa: E402
+
+# Modules serving requests; scripts and benchmarks may select what they like
+APP_MODULES = [
+    "server.py", "booking_management.py", "stats_endpoints.py", "pets_endpoints.py",
+    "map_endpoints.py", "verification.py", "geo_index.py", "availability_index.py",
+    "caregiver_resolver.py", "token_claims.py", "refresh_tokens.py"
+]
+
+
+def all_projections():
+    return {
+        name: value for name, value in vars(projections).items()
+        if isinstance(value, Projection)
+    }
+
+
+def module_trees():
+    return {module: ast.parse((BACKEND_DIR / module).read_text()) for module in APP_MODULES}
+
+
+def read_keys(tree):
+    """Keys a function reads from rows: row["key"], row.get("key") and row.pop("key")"""
+    keys = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant):
+            keys.add(node.slice.value)
+        elif (
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr in ("get", "pop") and node.args and isinstance(node.args[0], ast.Constant)
+        ):
+            keys.add(node.args[0].value)
+    return keys
+
+
+def functions(tree):
+    """Module functions and class methods by name"""
+    found = {}
+    for node in tree.body:
+        members = node.body if isinstance(node, ast.ClassDef) else [node]
+        for member in members:
+            if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                found.setdefault(member.name, []).append(member)
+    return found
+
+
+def imported_from(tree):
+    """Names a module imports from other app modules, mapped to that module"""
+    return {
+        alias.asname or alias.name: f"{node.module}.py"
+        for node in tree.body if isinstance(node, ast.ImportFrom) and f"{node.module}.py" in APP_MODULES
+        for alias in node.names
+    }
+
+
+def called_names(function):
+    """Functions called by name, or as methods of self or cls"""
+    names = set()
+    for node in ast.walk(function):
+        if not isinstance(node, ast.Call):
+            continue
+        if isinstance(node.func, ast.Name):
+            names.add(node.func.id)
+        elif (
+            isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name)
+            and node.func.value.id in ("self", "cls")
+        ):
+            names.add(node.func.attr)
+    return names
+
+
+def route_fields(function):
+    """Fields of the response_model a route handler declares"""
+    fields = set()
+    for decorator in function.decorator_list:
+        for keyword in decorator.keywords if isinstance(decorator, ast.Call) else []:
+            model = getattr(models, keyword.value.id, None) if isinstance(keyword.value, ast.Name) else None
+            if keyword.arg == "response_model" and hasattr(model, "model_fields"):
+                fields |= set(model.model_fields)
+    return fields
+
+
+class AppFunctions:
+    """Every function of the app modules, with the functions it calls followed across modules"""
+
+    def __init__(self):
+        trees = module_trees()
+        self.functions = {module: functions(tree) for module, tree in trees.items()}
+        self.imports = {module: imported_from(tree) for module, tree in trees.items()}
+
+    def referencing(self, name, table=None):
+        """Functions using a projection by name, or loading rows of its table by name when it is shared"""
+        for module, by_name in self.functions.items():
+            for function in (function for overloads in by_name.values() for function in overloads):
+                used = {node.id for node in ast.walk(function) if isinstance(node, ast.Name)}
+                tables = {node.value for node in ast.walk(function) if isinstance(node, ast.Constant)}
+                if name in used or (table is not None and table in tables):
+                    yield module, function
+
+    def reachable(self, module, function):
+        """The function and every app function it calls, directly or not"""
+        seen, pending = {}, [(module, function)]
+        while pending:
+            module, function = pending.pop()
+            if id(function) in seen:
+                continue
+            seen[id(function)] = function
+            for name in called_names(function):
+                callee_module = module if name in self.functions[module] else self.imports[module].get(name)
+                if callee_module is not None:
+                    pending.extend((callee_module, callee) for callee in self.functions[callee_module].get(name, []))
+        return seen.values()
+
+
+def with_parts(projection):
+    """A projection and every projection it was combined from"""
+    yield projection
+    for part in projection.parts:
+        yield from with_parts(part)
+
+
+def embedded_projections():
+    """Ids of the projections selected as embeds, whose rows go out with the rows embedding them"""
+    embedded, pending = set(), list(all_projections().values())
+    while pending:
+        for item in (item for projection in with_parts(pending.pop()) for item in projection.embeds):
+            for part in with_parts(item.projection):
+                if id(part) not in embedded:
+                    embedded.add(id(part))
+                    pending.append(part)
+    return embedded
+
+
+def test_projections_select_only_columns_returned_or_read():
+    app = AppFunctions()
+    tables = {id(projection): table for table, projection in projections.ROW_PROJECTIONS.items()}
+    embedded = embedded_projections()
+
+    for name, projection in all_projections().items():
+        # DataLoader and row cache rows are selected with the table's shared projection
+        selecting = list(app.referencing(name, tables.get(id(projection))))
+        if not selecting:
+            assert id(projection) in embedded, f"{name} is never selected"
+            continue
+
+        used = set(projection.response.model_fields) if projection.response else set()
+        for module, function in selecting:
+            used |= route_fields(function)
+            for reached in app.reachable(module, function):
+                used |= read_keys(reached)
+        unused = set(projection.columns) - used
+        where = sorted(f"{module}:{function.name}" for module, function in selecting)
+        assert not unused, f"{name} selects {sorted(unused)}, which neither its response model nor {where} read"
+
+
+def test_projections_never_select_everything():
+    for name, projection in all_projections().items():
+        assert "*" not in projection, f"{name} selects every column: {projection}"
+
+
+def test_password_hash_is_only_selected_by_login():
+    selecting = {name for name, projection in all_projections().items() if "password_hash" in projection}
+    assert selecting == {"USER_LOGIN"}
+
+
+def test_handlers_select_through_projections():
+    for module, tree in module_trees().items():
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "select"):
+                continue
+            literals = [arg for arg in node.args if isinstance(arg, (ast.Constant, ast.JoinedStr))]
+            assert not literals, f"{module}:{node.lineno} selects a literal column list instead of a projection"